@@ -0,0 +1,716 @@
+import os
+import sys
+import glob
+import time
+import builtins
+import contextlib
+import argparse
+import tracemalloc
+
+import numpy as np
+
+import colonization as col
+
+def check_args(parser):
+    parser.add_argument("-v", "--verbose", action='store_true', help="Verbose mode.")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="Number of passes over the saves.")
+
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    header = subparsers.add_parser("header", help="Time loading saves and their headers.")
+    header.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    codec = subparsers.add_parser("codec", help="Time enum lookups per record, rebuilt dicts vs codec tables.")
+    codec.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    colony = subparsers.add_parser("colony", help="Time colony decoding: OldColony, Colony and ColonyTable.")
+    colony.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    batch = subparsers.add_parser("batch", help="Time parallel decoding with 1, 2, 4 and 8 worker processes.")
+    batch.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+    batch.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to try.")
+
+    diff = subparsers.add_parser("diff", help="Time diffing each save against the previous one.")
+    diff.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    history = subparsers.add_parser("history", help="Compare storing saves whole with colonization.SaveHistory.")
+    history.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+    history.add_argument("-c", "--cache", type=int, default=8, help="Number of rebuilt saves SaveHistory keeps.")
+
+    write = subparsers.add_parser("write", help="Time editing one power per save: whole-file save vs in-place patch.")
+    write.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+    write.add_argument("scratch", help="Directory the saves are copied to before being edited.")
+
+    memory = subparsers.add_parser("memory", help="Measure memory held by decoded records per save with tracemalloc.")
+    memory.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    spatial = subparsers.add_parser("spatial", help="Time radius queries around every colony: linear scan vs SpatialIndex.")
+    spatial.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+    spatial.add_argument("-r", "--radius", type=int, default=2, help="Query radius in tiles.")
+
+    pathing = subparsers.add_parser("pathing", help="Time land distance from every colony to the nearest village: A* per pair vs one distance field.")
+    pathing.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    render = subparsers.add_parser("render", help="Time rendering all four views: per-tile dict loop vs lookup arrays, plus PNG output.")
+    render.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    villages = subparsers.add_parser("villages", help="Time the highest English alarm of each tribe: Village objects vs VillageTable.")
+    villages.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    logistics = subparsers.add_parser("logistics", help="Time trade route evaluation: A* per leg of every route vs RouteEvaluator, and cached results.")
+    logistics.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    archive = subparsers.add_parser("archive", help="Time scanning many saves from a directory vs one SaveArchive.")
+    archive.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+    archive.add_argument("scratch", help="Directory the copies of the saves and the archives are written to.")
+    archive.add_argument("-c", "--count", type=int, default=10000, help="Number of saves to scan, cycling through the directory.")
+
+    sites = subparsers.add_parser("sites", help="Time scoring every tile as a colony site: per-tile loop vs SiteScorer.")
+    sites.add_argument("directory", help="Directory to look for COLONY??.SAV files in.")
+
+    args = parser.parse_args()
+
+    if hasattr(args, "directory"):
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        args.files = sorted(glob.glob(os.path.join(args.directory, "COLONY??.SAV")))
+        if not args.files:
+            raise FileNotFoundError(f"No COLONY??.SAV files in {args.directory}")
+
+    print(args)
+    return args
+
+class IOCounter():
+    """Counts files opened through open() and, on Linux, read syscalls made by
+    this process while the counter is active.
+    """
+    def __read_syscalls(self):
+        try:
+            with self.__open("/proc/self/io") as f:
+                stats = dict(line.split(": ") for line in f.read().splitlines())
+            return int(stats["syscr"])
+        except (OSError, KeyError):
+            return None
+
+    def __counting_open(self, *args, **kwargs):
+        self.opens += 1
+        return self.__open(*args, **kwargs)
+
+    def __enter__(self):
+        self.opens = 0
+        self.reads = None
+        self.__open = builtins.open
+        self.__start = self.__read_syscalls()
+        builtins.open = self.__counting_open
+        return self
+
+    def __exit__(self, *exc):
+        builtins.open = self.__open
+        end = self.__read_syscalls()
+        if self.__start is not None and end is not None:
+            # Reading /proc/self/io itself costs one read syscall
+            self.reads = end - self.__start - 1
+
+@contextlib.contextmanager
+def open_saves(files):
+    """Opens every save in files lazily and closes them on leaving the block.
+    """
+    with contextlib.ExitStack() as stack:
+        yield [stack.enter_context(col.SaveFile(path, lazy=True)) for path in files]
+
+def measure(label, func, files, repeat):
+    """Runs func over every file repeat times and reports wall time and I/O per file.
+    """
+    with IOCounter() as io:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for path in files:
+                func(path)
+        elapsed = time.perf_counter() - start
+
+    loads = repeat * len(files)
+    reads = f"{io.reads / loads:6.2f}" if io.reads is not None else "   n/a"
+    print(f"  {label:<24} {elapsed / loads * 1e6:10.1f} us/file  {io.opens / loads:6.2f} opens/file  {reads} reads/file")
+    return elapsed
+
+def bench_header(args):
+    def reread(path):
+        # Previous behaviour: the save is read once for its data and again for its header
+        with open(path, "rb") as binary_file:
+            data = binary_file.read()
+        return data, col.Header.from_file(path)
+
+    def shared(path):
+        with open(path, "rb") as binary_file:
+            data = binary_file.read()
+        return data, col.Header(data, path=path)
+
+    def savefile(path):
+        with col.SaveFile(path, lazy=True) as save:
+            return save.header
+
+    print(f"Loading {len(args.files)} saves x {args.repeat}")
+    before = measure("read + Header.from_file", reread, args.files, args.repeat)
+    after = measure("read + Header(data)", shared, args.files, args.repeat)
+    measure("SaveFile(lazy=True)", savefile, args.files, args.repeat)
+    print(f"  Speedup: {before / after:.2f}x")
+
+def load_records(files):
+    """Collects the raw bytes of every unit, colony, village and trade route in files.
+    """
+    records = {'units': [], 'colonies': [], 'villages': [], 'trade_routes': []}
+    with open_saves(files) as saves:
+        for save in saves:
+            header = save.header
+            sections = [
+                ('units', header.units_start_address, col.Unit, header.unit_count),
+                ('colonies', header.colonies_start_address, col.Colony, header.colony_count),
+                ('villages', header.villages_start_address, col.Village, header.village_count),
+                ('trade_routes', header.trade_routes_start_address, col.TradeRoute, col.TradeRoute.count),
+            ]
+            for name, start, record_type, count in sections:
+                for i in range(0, count):
+                    offset = start + i * record_type.byte_length
+                    records[name].append(bytes(save.data[offset:offset + record_type.byte_length]))
+    return records
+
+def time_per_record(func, records, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in records:
+            func(data)
+    return (time.perf_counter() - start) / (repeat * max(len(records), 1))
+
+def bench_codec(args):
+    # Each pair performs the same enum lookups for one record: first the way the
+    # decoders used to, rebuilding the reverse dicts per record, then with the codec tables.
+    def unit_dicts(data):
+        {val: key for key, val in col.Unit.forms.items()}[data[2]]
+        {val: key for key, val in col.Unit.powers.items()}[data[3] & 0xF]
+        {val: key for key, val in col.Unit.orders.items()}[data[8]]
+        {val: key for key, val in {**col.Colonist.specialties, **col.Colonist.occupations}.items()}.get(data[23])
+        lookup = {val: key for key, val in col.Unit.supplies.items()}
+        cargoes = int.from_bytes(data[13:16], 'little')
+        [lookup[(cargoes >> (offset * 4)) & 0xF] for offset in range(data[12])]
+
+    def unit_tables(data):
+        col.codec.decode(col.Unit.form_names, data[2])
+        col.codec.decode(col.Unit.power_names, data[3] & 0xF)
+        col.codec.decode(col.Unit.order_names, data[8])
+        col.Colonist.specialty_names[data[23]]
+        cargoes = int.from_bytes(data[13:16], 'little')
+        [col.Unit.supply_names[(cargoes >> (offset * 4)) & 0xF] for offset in range(data[12])]
+
+    def colony_dicts(data):
+        lookup = {val: key for key, val in col.Colonist.specialties.items()}
+        [(lookup[data[0x20 + i]], lookup[data[0x40 + i]]) for i in range(data[0x1F])]
+        next(key for key, value in col.Colony.constructables.items() if value == data[0x94])
+
+    def colony_tables(data):
+        [(col.codec.decode(col.Colonist.specialty_names, data[0x20 + i]),
+          col.codec.decode(col.Colonist.specialty_names, data[0x40 + i])) for i in range(data[0x1F])]
+        col.codec.decode(col.Colony.constructable_names, data[0x94])
+
+    def village_dicts(data):
+        {val: key for key, val in col.Village.powers.items()}[data[2]]
+        lookup = {val: key for key, val in col.Village.supplies.items()}
+        lookup[data[8]], lookup[data[9]]
+
+    def village_tables(data):
+        col.codec.decode(col.Village.power_names, data[2])
+        col.codec.decode(col.Village.supply_names, data[8]), col.codec.decode(col.Village.supply_names, data[9])
+
+    def route_dicts(data):
+        lookup = {val: key for key, val in col.TradeRoute.supplies.items()}
+        for offset in range(0, 10 * data[33], 10):
+            cargoes = int.from_bytes(data[37 + offset:43 + offset], 'little')
+            [lookup[(cargoes >> (item * 4)) & 0xF] for item in range(12)]
+
+    def route_tables(data):
+        for offset in range(0, 10 * data[33], 10):
+            cargoes = int.from_bytes(data[37 + offset:43 + offset], 'little')
+            [col.TradeRoute.supply_names[(cargoes >> (item * 4)) & 0xF] for item in range(12)]
+
+    records = load_records(args.files)
+    print(f"Enum lookups per record over {len(args.files)} saves x {args.repeat}")
+    print(f"  {'Section':<14} {'Records':>8} {'dicts':>10} {'tables':>10} {'Speedup':>8}")
+    for name, before, after in [('units', unit_dicts, unit_tables), ('colonies', colony_dicts, colony_tables),
+                                ('villages', village_dicts, village_tables), ('trade_routes', route_dicts, route_tables)]:
+        old = time_per_record(before, records[name], args.repeat)
+        new = time_per_record(after, records[name], args.repeat)
+        speedup = old / new if new else float('nan')
+        print(f"  {name:<14} {len(records[name]):>8} {old * 1e6:7.2f} us {new * 1e6:7.2f} us {speedup:7.2f}x")
+
+def bench_colony(args):
+    def old_colony(data):
+        colony = col.buildings.OldColony()
+        colony.unpack(data)
+
+    with open_saves(args.files) as saves:
+        records = load_records(args.files)['colonies']
+        count = max(len(records), 1)
+
+        print(f"Decoding {len(records)} colonies from {len(saves)} saves x {args.repeat}")
+        old = time_per_record(old_colony, records, args.repeat)
+        new = time_per_record(col.Colony, records, args.repeat)
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for save in saves:
+                col.ColonyTable(save.buffer, save.header.colonies_start_address, save.header.colony_count)
+        batch = (time.perf_counter() - start) / (args.repeat * count)
+
+        print(f"  {'OldColony.unpack':<24} {old * 1e6:8.2f} us/colony")
+        print(f"  {'Colony':<24} {new * 1e6:8.2f} us/colony  {old / new:6.2f}x")
+        print(f"  {'ColonyTable (per save)':<24} {batch * 1e6:8.2f} us/colony  {old / batch:6.2f}x")
+
+def bench_batch(args):
+    # Repeat the file list rather than the whole run so each pool is started once
+    files = args.files * args.repeat
+
+    print(f"Decoding {len(files)} saves with colonization.batch.decode_tables on {os.cpu_count()} CPUs")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        failed = sum(1 for _, _, error in col.batch.decode_tables(files, workers=workers) if error is not None)
+        elapsed = time.perf_counter() - start
+
+        if baseline is None:
+            baseline = elapsed
+        print(f"  {workers:>2} workers  {elapsed:8.3f} s  {len(files) / elapsed:8.1f} saves/s  {baseline / elapsed:5.2f}x  {failed} failed")
+
+def bench_diff(args):
+    def byte_loop(left, right, layout):
+        # The per-byte comparison hex_compare used before colonization.diff
+        changes = []
+        for address, vals in enumerate(zip(left, right)):
+            if vals[0] != vals[1]:
+                for field_name, start, length in layout.sections:
+                    if address >= start:
+                        label = field_name
+                changes.append((address, label))
+        return changes
+
+    saves = []
+    for path in args.files:
+        with open(path, "rb") as binary_file:
+            saves.append(binary_file.read())
+    aligned = [col.diff.align(left, right) for left, right in zip(saves, saves[1:])]
+    pairs = max(len(aligned), 1)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        count = sum(len(byte_loop(left, right, layout)) for left, right, layout, _ in aligned)
+    loop = (time.perf_counter() - start) / (args.repeat * pairs)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, changes, _, _ in col.diff.diff_history(saves):
+            pass
+    engine = (time.perf_counter() - start) / (args.repeat * pairs)
+
+    print(f"Diffing {len(aligned)} consecutive pairs ({count} changed bytes) x {args.repeat}")
+    print(f"  {'Per-byte loop':<24} {loop * 1e3:8.3f} ms/pair")
+    print(f"  {'colonization.diff':<24} {engine * 1e3:8.3f} ms/pair  {loop / engine:6.1f}x")
+
+def bench_history(args):
+    raw = sum(os.path.getsize(path) for path in args.files)
+
+    start = time.perf_counter()
+    history = col.SaveHistory.from_files(args.files, cache_size=args.cache)
+    build = time.perf_counter() - start
+
+    def read_file(turn):
+        with open(args.files[turn], "rb") as binary_file:
+            return binary_file.read()
+
+    def timed(func):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for turn in range(len(args.files)):
+                func(turn)
+        return (time.perf_counter() - start) / (args.repeat * len(args.files))
+
+    disk = timed(read_file)
+    cached = timed(history.__getitem__)
+    cold = col.SaveHistory.from_files(args.files, cache_size=1)
+    uncached = timed(lambda turn: cold[len(args.files) - 1 - turn])
+
+    print(f"History of {len(args.files)} saves, built in {build * 1e3:.1f} ms")
+    print(f"  {'Whole files':<24} {raw:>10} bytes")
+    print(f"  {'SaveHistory':<24} {history.stored_size():>10} bytes  {raw / max(history.stored_size(), 1):6.2f}x smaller")
+    print(f"  {'Read file':<24} {disk * 1e6:10.1f} us/turn")
+    print(f"  {'SaveHistory, cached':<24} {cached * 1e6:10.1f} us/turn")
+    print(f"  {'SaveHistory, replayed':<24} {uncached * 1e6:10.1f} us/turn")
+
+def bench_write(args):
+    os.makedirs(args.scratch, exist_ok=True)
+    copies = [os.path.join(args.scratch, os.path.basename(path)) for path in args.files]
+    for path, copy in zip(args.files, copies):
+        with open(path, "rb") as source, open(copy, "wb") as target:
+            target.write(source.read())
+
+    def edit(path):
+        writer = col.SaveFileWriter.from_file(path)
+        address = writer._header.powers_start_address + col.Power.features['Gold'][0]
+        gold = int.from_bytes(writer.data[address:address + 3], 'little')
+        writer.write(address, ((gold + 1) % col.Power.gold_max).to_bytes(3, 'little'))
+        return writer
+
+    def save(path):
+        # save_data reports every file it writes
+        with contextlib.redirect_stdout(None):
+            edit(path).save(path)
+
+    def patch(path):
+        edit(path).patch()
+
+    saved = measure("save (atomic rewrite)", save, copies, args.repeat)
+    patched = measure("patch (dirty ranges)", patch, copies, args.repeat)
+    print(f"  Speedup: {saved / patched:.2f}x")
+
+def traced(func):
+    """Returns (bytes still allocated after func returns, result of func).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def bench_memory(args):
+    def views(save, start, record_type, count):
+        return [save.buffer[address:address + record_type.byte_length]
+                for address in range(start, start + count * record_type.byte_length, record_type.byte_length)]
+
+    def old_colonies(save):
+        colonies = []
+        for view in views(save, save.header.colonies_start_address, col.Colony, save.header.colony_count):
+            # The original decoder needs bytes to decode the name
+            colony = col.buildings.OldColony()
+            colony.unpack(bytes(view))
+            colonies.append(colony)
+        return colonies
+
+    def villages(save):
+        decoded = []
+        for view in views(save, save.header.villages_start_address, col.Village, save.header.village_count):
+            village = col.Village()
+            village.unpack(view)
+            decoded.append(village)
+        return decoded
+
+    decoders = [
+        ('Unit', lambda save: [col.Unit(view) for view in views(save, save.header.units_start_address, col.Unit, save.header.unit_count)]),
+        ('OldColony', old_colonies),
+        ('Colony', lambda save: [col.Colony(view) for view in views(save, save.header.colonies_start_address, col.Colony, save.header.colony_count)]),
+        ('Village', villages),
+        ('UnitTable', lambda save: col.UnitTable(save.buffer, save.header.units_start_address, save.header.unit_count)),
+        ('ColonyTable', lambda save: col.ColonyTable(save.buffer, save.header.colonies_start_address, save.header.colony_count)),
+    ]
+
+    with open_saves(args.files) as saves:
+        print(f"Bytes held by decoded records, averaged over {len(saves)} saves")
+        for label, decode in decoders:
+            total = 0
+            for save in saves:
+                total += traced(lambda: decode(save))[0]
+            print(f"  {label:<24} {total / len(saves):10.0f} bytes/save")
+
+def bench_spatial(args):
+    with open_saves(args.files) as saves:
+        queries = [(save, colony.position) for save in saves for colony in save.colonies]
+
+        # Positions are collected up front so the scan only pays for the comparisons
+        records = {id(save): [('units', [tuple(position) for position in save.unit_table.positions.tolist()]),
+                              ('colonies', [colony.position for colony in save.colonies]),
+                              ('villages', [village.position for village in save.villages])] for save in saves}
+
+        def scan(save, x, y):
+            # Previous approach: test every unit, colony and village
+            found = []
+            for kind, positions in records[id(save)]:
+                found += [(kind, index) for index, (px, py) in enumerate(positions)
+                          if abs(px - x) <= args.radius and abs(py - y) <= args.radius]
+            return found
+
+        def timed(func):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for save, (x, y) in queries:
+                    func(save, x, y)
+            return (time.perf_counter() - start) / (args.repeat * max(len(queries), 1))
+
+        start = time.perf_counter()
+        for save in saves:
+            save.spatial_index
+        build = (time.perf_counter() - start) / len(saves)
+
+        linear = timed(scan)
+        indexed = timed(lambda save, x, y: save.spatial_index.radius(x, y, args.radius))
+
+        print(f"Radius {args.radius} queries around {len(queries)} colonies in {len(saves)} saves x {args.repeat}")
+        print(f"  {'Build SpatialIndex':<24} {build * 1e6:10.1f} us/save")
+        print(f"  {'Linear scan':<24} {linear * 1e6:10.1f} us/query")
+        print(f"  {'SpatialIndex.radius':<24} {indexed * 1e6:10.1f} us/query  {linear / indexed:6.1f}x")
+
+def bench_pathing(args):
+    with open_saves(args.files) as saves:
+
+        start = time.perf_counter()
+        finders = [col.Pathfinder.for_map(save.maps) for save in saves]
+        build = (time.perf_counter() - start) / len(saves)
+
+        def per_pair(save, finder):
+            villages = [village.position for village in save.villages]
+            # Costs are paid on entering a tile, so search in the same direction as the field
+            return [min([finder.distance(village, colony.position) for village in villages], default=float('inf'))
+                    for colony in save.colonies]
+
+        def field(save, finder):
+            distance = finder.distance_field([village.position for village in save.villages])
+            return distance[save.colony_table.records['y'], save.colony_table.records['x']].tolist()
+
+        results = {}
+        for label, func in [('A* per colony/village', per_pair), ('Distance field', field)]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[label] = [func(save, finder) for save, finder in zip(saves, finders)]
+            results[label + ' time'] = (time.perf_counter() - start) / (args.repeat * len(saves))
+
+        agree = all(np.allclose(a, b) for a, b in zip(results['A* per colony/village'], results['Distance field']))
+        per_pair_time, field_time = results['A* per colony/village time'], results['Distance field time']
+        print(f"Nearest village by land for every colony in {len(saves)} saves x {args.repeat}")
+        print(f"  {'Build cost grid':<24} {build * 1e3:8.2f} ms/save")
+        print(f"  {'A* per colony/village':<24} {per_pair_time * 1e3:8.2f} ms/save")
+        print(f"  {'Distance field':<24} {field_time * 1e3:8.2f} ms/save  {per_pair_time / field_time:6.1f}x  results agree: {agree}")
+
+def bench_render(args):
+    with open_saves(args.files) as saves:
+        maps = [save.maps for save in saves]
+
+        def per_tile(map):
+            # Previous approach: Map.display's per-call table building and row joins
+            frames = []
+            for view in col.Map.get_views():
+                subset = map.array(view).tobytes()
+                palette = col.render.palette(view)[0].tobytes().decode('ascii')
+                table = {}
+                for tile in subset:
+                    if tile not in table:
+                        table[tile] = palette[tile]
+                lines = [''.join([table[x] for x in subset[start:start + map.width]]) for start in range(0, map.width * map.height, map.width)]
+                frames.append('\n'.join(lines))
+            return frames
+
+        def lookup(map):
+            return [map.text(view, labels=False) for view in col.Map.get_views()]
+
+        def png(map):
+            return [col.render.png_bytes(map.image(view, scale=4)) for view in col.Map.get_views()]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            col.render.terrain_palette.__wrapped__()
+        palette_time = (time.perf_counter() - start) / args.repeat
+
+        results = {}
+        for label, func in [('Per-tile loop', per_tile), ('Lookup arrays', lookup), ('PNG, 4 px per tile', png)]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[label] = [func(map) for map in maps]
+            results[label + ' time'] = (time.perf_counter() - start) / (args.repeat * len(maps))
+
+        agree = all(old == [frame.rstrip('\n') for frame in new] for old, new in zip(results['Per-tile loop'], results['Lookup arrays']))
+        loop_time = results['Per-tile loop time']
+        print(f"Rendering all four views of {len(maps)} saves x {args.repeat}")
+        print(f"  {'Build terrain palette':<24} {palette_time * 1e3:8.2f} ms once per process")
+        print(f"  {'Per-tile loop':<24} {loop_time * 1e3:8.2f} ms/save")
+        print(f"  {'Lookup arrays':<24} {results['Lookup arrays time'] * 1e3:8.2f} ms/save  {loop_time / results['Lookup arrays time']:6.1f}x  text agrees: {agree}")
+        print(f"  {'PNG, 4 px per tile':<24} {results['PNG, 4 px per tile time'] * 1e3:8.2f} ms/save")
+
+def bench_villages(args):
+    def objects(path):
+        # Previous approach: decode a Village per record and loop over them
+        highest = {}
+        with col.SaveFile(path, lazy=True) as save:
+            for power, alarm in [(village.power, village.english_alarm) for village in save.villages]:
+                highest[power] = max(highest.get(power, 0), alarm)
+        return highest
+
+    def table(path):
+        with col.SaveFile(path, lazy=True) as save:
+            return save.village_table.by_tribe(save.village_table.alarm('English'))
+
+    results = {}
+    for label, func in [('Village objects', objects), ('VillageTable', table)]:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            results[label] = [func(path) for path in args.files]
+        results[label + ' time'] = (time.perf_counter() - start) / (args.repeat * len(args.files))
+
+    agree = results['Village objects'] == results['VillageTable']
+    objects_time, table_time = results['Village objects time'], results['VillageTable time']
+    print(f"Highest English alarm per tribe in {len(args.files)} saves x {args.repeat}")
+    print(f"  {'Village objects':<24} {objects_time * 1e6:10.1f} us/save")
+    print(f"  {'VillageTable':<24} {table_time * 1e6:10.1f} us/save  {objects_time / table_time:6.1f}x  results agree: {agree}")
+
+def bench_logistics(args):
+    with open_saves(args.files) as saves:
+        for save in saves:
+            save.trade_routes
+            col.Pathfinder.for_save(save, domain='land')
+            col.Pathfinder.for_save(save, domain='sea')
+
+        def per_leg(save):
+            # Previous approach: an A* search for every leg of every route
+            costs = []
+            positions = save.colony_table.positions.tolist()
+            for route in save.trade_routes:
+                locations = [stop.location for stop in route.destinations]
+                if len(locations) < 2 or any(location >= save.header.colony_count for location in locations):
+                    costs.append(0.0)
+                    continue
+                finder = col.Pathfinder.for_save(save, domain='sea' if route.sea else 'land')
+                costs.append(sum(finder.distance(tuple(positions[start]), tuple(positions[end]))
+                                 for start, end in zip(locations, locations[1:] + locations[:1])))
+            return costs
+
+        results = {}
+        for save in saves:
+            save.logistics.routes
+
+        for label, func in [('A* per leg', per_leg),
+                            ('RouteEvaluator', lambda save: col.RouteEvaluator(save).routes['cost'].tolist()),
+                            ('SaveFile.logistics', lambda save: save.logistics.routes['cost'].tolist())]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[label] = [func(save) for save in saves]
+            results[label + ' time'] = (time.perf_counter() - start) / (args.repeat * len(saves))
+
+        agree = all(np.allclose(a, b) for a, b in zip(results['A* per leg'], results['RouteEvaluator']))
+        leg_time = results['A* per leg time']
+        print(f"Round trip cost of {sum(len(save.trade_routes) for save in saves)} trade routes in {len(saves)} saves x {args.repeat}")
+        print(f"  {'A* per leg':<24} {leg_time * 1e3:8.2f} ms/save")
+        print(f"  {'RouteEvaluator':<24} {results['RouteEvaluator time'] * 1e3:8.2f} ms/save  {leg_time / results['RouteEvaluator time']:6.1f}x  results agree: {agree}")
+        print(f"  {'SaveFile.logistics':<24} {results['SaveFile.logistics time'] * 1e3:8.2f} ms/save  already evaluated")
+
+def bench_archive(args):
+    if not os.path.isdir(args.scratch):
+        raise FileNotFoundError(args.scratch)
+
+    # Fill the scratch directory with count copies of the saves
+    copies = os.path.join(args.scratch, "saves")
+    os.makedirs(copies, exist_ok=True)
+    files = []
+    for index in range(args.count):
+        destination = os.path.join(copies, f"{index:05d}.SAV")
+        if not os.path.isfile(destination):
+            with open(args.files[index % len(args.files)], "rb") as f:
+                data = f.read()
+            with open(destination, "wb") as f:
+                f.write(data)
+        files.append(destination)
+
+    print(f"Scanning {len(files)} saves x {args.repeat}")
+    archives = {}
+    for dedup in col.SaveArchive.dedups:
+        archives[dedup] = os.path.join(args.scratch, f"saves-{dedup}.car")
+        start = time.perf_counter()
+        stats = col.SaveArchive.write(archives[dedup], files, dedup=dedup)
+        print(f"  {'Write, dedup ' + str(dedup):<24} {time.perf_counter() - start:10.2f} s  {stats['chunks']:6d} chunks  {stats['bytes'] / 2**20:8.1f} MiB of {stats['input'] / 2**20:.1f} MiB")
+
+    def scan_file(path):
+        with col.SaveFile(path, lazy=True) as save:
+            return len(save.colony_table)
+
+    before = measure("Directory", scan_file, files, args.repeat)
+    for dedup, path in archives.items():
+        with col.SaveArchive(path) as archive:
+            def scan_archive(index):
+                with archive.open(index) as save:
+                    return len(save.colony_table)
+
+            after = measure(f"Archive, dedup {dedup}", scan_archive, range(len(archive)), args.repeat)
+        print(f"  Speedup: {before / after:.2f}x")
+
+def bench_sites(args):
+    with open_saves(args.files) as saves:
+
+        # Any pattern will do for timing
+        scorer = col.SiteScorer(prime=col.PrimePattern(period=16, residues=(0,)))
+
+        def occupied(save):
+            return [colony.position for colony in save.colonies] + [village.position for village in save.villages]
+
+        def per_tile(save):
+            # Previous approach: visit every tile and its neighbours in Python
+            map = save.maps
+            terrain = map.array(col.map.TERRAIN).tolist()
+            primes = scorer.prime.live(map).tolist()
+            water = map.is_water().tolist()
+            rivers = map.has_river().tolist()
+            arctic = map.is_special('Arctic').tolist()
+            taken = occupied(save)
+            weights = scorer.weights
+
+            scores = np.full((map.height, map.width), -np.inf)
+            for y in range(1, map.height - 1):
+                for x in range(1, map.width - 1):
+                    if water[y][x] or arctic[y][x]:
+                        continue
+                    if any(max(abs(x - ox), abs(y - oy)) <= scorer.min_distance for ox, oy in taken):
+                        continue
+                    score = 0.0
+                    coastal = False
+                    for dx, dy in [(0, 0)] + col.SiteScorer.steps:
+                        score += scorer.values[terrain[y + dy][x + dx]] + weights['prime'] * primes[y + dy][x + dx]
+                        coastal |= water[y + dy][x + dx]
+                    scores[y, x] = score + weights['coastal'] * coastal + weights['river_site'] * rivers[y][x]
+            return scores
+
+        results = {}
+        for label, func in [('Per-tile loop', per_tile), ('SiteScorer.scores', lambda save: scorer.scores(save.maps, occupied(save)))]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                results[label] = [func(save) for save in saves]
+            results[label + ' time'] = (time.perf_counter() - start) / (args.repeat * len(saves))
+
+        agree = all(np.allclose(a, b) for a, b in zip(results['Per-tile loop'], results['SiteScorer.scores']))
+        loop_time, vector_time = results['Per-tile loop time'], results['SiteScorer.scores time']
+        print(f"Colony site scores for every tile in {len(saves)} saves x {args.repeat}")
+        print(f"  {'Per-tile loop':<24} {loop_time * 1e3:8.2f} ms/save")
+        print(f"  {'SiteScorer.scores':<24} {vector_time * 1e3:8.2f} ms/save  {loop_time / vector_time:6.1f}x  results agree: {agree}")
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    try:
+        args = check_args(parser)
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+    benchmarks = {
+        "header": bench_header,
+        "codec": bench_codec,
+        "colony": bench_colony,
+        "batch": bench_batch,
+        "diff": bench_diff,
+        "history": bench_history,
+        "write": bench_write,
+        "memory": bench_memory,
+        "spatial": bench_spatial,
+        "pathing": bench_pathing,
+        "render": bench_render,
+        "villages": bench_villages,
+        "logistics": bench_logistics,
+        "archive": bench_archive,
+        "sites": bench_sites,
+    }
+    benchmarks[args.benchmark](args)
+
+if __name__ == "__main__":
+    main()
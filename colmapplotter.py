@@ -1,6 +1,8 @@
 import os
 import sys
+import glob
 import argparse
+import functools
 
 import colonization as col
 
@@ -12,12 +14,40 @@ def check_args(parser):
     group.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
  
     parser.add_argument("-s", "--slot", type=int, default=0, help="Save game slot to load.")
+    parser.add_argument("-o", "--output", default=None, help="Directory to write an image of each view to instead of printing the maps.")
+    parser.add_argument("--format", choices=sorted(col.render.writers), default="png", help="Image format for --output.")
+    parser.add_argument("--scale", type=int, default=4, help="Pixels per tile in images.")
+    parser.add_argument("--primes", action='store_true', help="Mark the prime resources fitted to the save on terrain images.")
+    parser.add_argument("--views", type=int, nargs="+", default=col.Map.get_views(), help="Views to display or write.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Write images for every save in --directory using this many worker processes.")
 
     args = parser.parse_args()
 
     if args.directory is None and args.file is None:
         raise ValueError("You must specify a file using --file or --directory and --slot")
 
+    for view in args.views:
+        if view not in col.Map.get_views():
+            raise ValueError(f"View {view} is not a supported value in {col.Map.get_views()}")
+    if args.scale < 1:
+        raise ValueError(f"Scale must be positive, got {args.scale}")
+    if args.output is not None and not os.path.isdir(args.output):
+        raise FileNotFoundError(args.output)
+    if args.primes and args.output is None:
+        raise ValueError("--primes needs an --output directory for the images")
+
+    if args.jobs is not None:
+        if args.directory is None or args.output is None:
+            raise ValueError("--jobs needs a --directory of save games and an --output directory")
+        if args.jobs < 1:
+            raise ValueError(f"Jobs must be positive, got {args.jobs}")
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        args.files = sorted(glob.glob(os.path.join(args.directory, "COLONY??.SAV")))
+        print(args)
+        return args
+
     if args.directory is not None:
         if not os.path.isdir(args.directory):
             raise FileNotFoundError(args.directory)
@@ -35,12 +65,46 @@ def check_args(parser):
     return args
 
 def display_map(args):
-    display_map_new(args)
+    if args.output is None:
+        display_map_new(args)
+        return
+
+    write = functools.partial(write_images, output=args.output, format=args.format, scale=args.scale, views=tuple(args.views), primes=args.primes)
+    if args.jobs is None:
+        print('\n'.join(write(args.file)))
+        return
+
+    for path, written, error in col.batch.map_saves(write, args.files, workers=args.jobs):
+        print('\n'.join(written) if error is None else f"Failed to read {path}: {error}")
+
+def write_images(path, output, format='png', scale=4, views=(0, 1, 2, 3), primes=False):
+    """Writes one image per view of the save in path, returns the files written.
+
+    With primes, the terrain image marks the live prime resources of the
+    PrimePattern fitted to the map, when one fits.
+    """
+    map = col.Map(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+
+    marks = None
+    if primes:
+        pattern = col.PrimePattern.for_map(map)
+        if pattern is None:
+            print(f"No prime pattern fits the suppressed ocean tiles of {path}")
+        else:
+            marks = pattern.live(map)
+
+    written = []
+    for view in views:
+        destination = os.path.join(output, f"{name}_view{view}.{format}")
+        col.render.writers[format](destination, map.image(view, scale=scale, marks=marks if view == col.map.TERRAIN else None))
+        written.append(destination)
+    return written
 
 def display_map_new(args):
     map = col.Map(args.file)
 
-    for view in col.Map.get_views():
+    for view in args.views:
         print(f"Map View:\t{view}")
         print(f"Colonies:\t{map.colonies}, Units: {map.units}, Villages: {map.villages}")
         print(f"Map Shape:\t{map.shape()}")
@@ -2,6 +2,10 @@
 # Maps from structured code in python files to what is exposed to
 # importers of this package
 
+from . import codec
+from . import schema
+from . import render
+
 from .map import(
     Map,
     Tile
@@ -9,6 +13,7 @@ from .map import(
 
 from .units import(
     Unit,
+    UnitTable,
     Colonist
 )
 
@@ -19,15 +24,56 @@ from .trade import(
 
 from .buildings import(
     Village,
-    Colony
+    Colony,
+    ColonyTable,
+    VillageTable
 )
 
 from .powers import(
     Power
 )
 
+from .layout import(
+    Layout
+)
+
 from .header import(
     SaveFileWriter,
     SaveFile,
     Header
-)
\ No newline at end of file
+)
+
+from .store import(
+    SaveStore
+)
+
+from . import batch
+from . import diff
+
+from .history import(
+    SaveHistory
+)
+
+from .spatial import(
+    SpatialIndex
+)
+
+from .pathing import(
+    Pathfinder
+)
+
+from .prime import(
+    PrimePattern
+)
+
+from .sites import(
+    SiteScorer
+)
+
+from .logistics import(
+    RouteEvaluator
+)
+
+from .archive import(
+    SaveArchive
+)
@@ -0,0 +1,212 @@
+import os
+import mmap
+import struct
+import hashlib
+import warnings
+
+import numpy as np
+
+import colonization
+
+class SaveArchive():
+    """Many saves in one memory mapped file.
+
+    The file starts with a fixed header, followed by the stored chunks back to
+    back and then the index. A save is a run of chunks: the whole file as one
+    chunk, or with dedup='section' one chunk per section (see Layout.sections)
+    so sections that repeat across saves, such as unchanged maps, are stored
+    once. Chunks are keyed by SHA-1 and every distinct chunk is written once.
+
+    The index is read with numpy.frombuffer straight off the map, so opening
+    an archive costs one open() whatever the number of saves, and finding save
+    N is two array lookups. A save stored as one chunk is returned as a
+    memoryview slice of the map without copying; a save split into sections
+    is joined into new bytes.
+
+    Args:
+        path (str): Path to an archive written by SaveArchive.write().
+    """
+    magic = b'COLARCH1'
+
+    # magic, save count, chunk count, piece count, index address
+    header = struct.Struct('<8sIIIQ')
+
+    saves_dtype = np.dtype([('first', '<u4'), ('pieces', '<u4'), ('size', '<u4')])
+    chunks_dtype = np.dtype([('offset', '<u8'), ('length', '<u4'), ('hash', 'S20')])
+
+    dedups = [None, 'save', 'section']
+
+    def __init__(self, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Failed to read {path}")
+
+        self.file_path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.data)
+
+        magic, save_count, chunk_count, piece_count, index = SaveArchive.header.unpack_from(self.buffer)
+        if magic != SaveArchive.magic:
+            raise ValueError(f"Unrecognized file type: {path}")
+
+        self.saves = np.frombuffer(self.buffer, dtype=SaveArchive.saves_dtype, count=save_count, offset=index)
+        index += self.saves.nbytes
+        self.pieces = np.frombuffer(self.buffer, dtype='<u4', count=piece_count, offset=index)
+        index += self.pieces.nbytes
+        self.chunks = np.frombuffer(self.buffer, dtype=SaveArchive.chunks_dtype, count=chunk_count, offset=index)
+        index += self.chunks.nbytes
+
+        # Names of the saves, '\n' separated
+        self.names = bytes(self.buffer[index:]).decode('utf-8').split('\n') if save_count else []
+        self.__positions = None
+
+    def __len__(self):
+        return len(self.saves)
+
+    def data_of(self, index):
+        """Contents of save index, a memoryview into the archive when it is one chunk.
+        """
+        if index < 0:
+            index += len(self.saves)
+        if index not in range(0, len(self.saves)):
+            raise IndexError(f"save index {index} out of range for {len(self.saves)} saves")
+
+        first, count, _ = self.saves[index].tolist()
+        if count == 1:
+            offset, length, _ = self.chunks[self.pieces[first]].tolist()
+            return self.buffer[offset:offset + length]
+
+        chunks = self.chunks[self.pieces[first:first + count]]
+        return b''.join([self.buffer[offset:offset + length] for offset, length in zip(chunks['offset'].tolist(), chunks['length'].tolist())])
+
+    def index(self, name):
+        """Position of the save stored under name.
+        """
+        if self.__positions is None:
+            self.__positions = {name: position for position, name in enumerate(self.names)}
+        return self.__positions[name]
+
+    def open(self, index, lazy=True):
+        """Returns save index as a SaveFile over the archive's memory map.
+
+        The SaveFile and its records keep the archive's memory map alive
+        after the archive is closed.
+        """
+        return colonization.SaveFile.from_data(self.data_of(index), path=self.names[index], lazy=lazy)
+
+    def __getitem__(self, index):
+        return self.open(index)
+
+    def __iter__(self):
+        for index in range(0, len(self.saves)):
+            yield self.open(index)
+
+    def close(self):
+        """Releases the memory map.
+
+        While saves, records or arrays taken from the archive are still
+        referenced the map is left to be unmapped with the last of them, with
+        a ResourceWarning as in SaveFile.close().
+        """
+        self.saves = self.pieces = self.chunks = None
+        if self.buffer is None:
+            return
+        try:
+            self.buffer.release()
+            self.data.close()
+        except BufferError:
+            # Exported to a save or record that is still referenced
+            warnings.warn(f"{self.file_path}: saves still reference the archive, "
+                          "it is unmapped once they are dropped", ResourceWarning, stacklevel=2)
+        self.buffer = self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def split(data, dedup):
+        """Returns the (start, end) of each chunk data is stored as.
+        """
+        if dedup == 'section':
+            return colonization.SaveHistory.spans(data)
+        return [(0, len(data))]
+
+    @staticmethod
+    def write(path, files, dedup='save', names=None):
+        """Writes the saves in files to a new archive at path.
+
+        The archive is written next to path and renamed over it once complete,
+        like SaveFile.save_data().
+
+        Args:
+            path (str): Archive to write.
+            files (list): Paths of the saves, stored in this order.
+            dedup (str): None to store every save, 'save' to store identical
+                saves once, or 'section' to store identical sections once.
+            names (list): Name of each save, defaults to its path.
+
+        Returns:
+            dict: 'saves', 'chunks' and 'bytes' written, and 'input' bytes read.
+        """
+        if dedup not in SaveArchive.dedups:
+            raise ValueError(f"dedup must be one of {SaveArchive.dedups}")
+        files = list(files)
+        names = list(files if names is None else names)
+        if len(names) != len(files):
+            raise ValueError("names must have one entry per file")
+        if any('\n' in name for name in names):
+            raise ValueError("names must not contain newlines")
+
+        saves = np.zeros(len(files), dtype=SaveArchive.saves_dtype)
+        pieces = []
+        chunks = []
+        seen = {}
+        total = 0
+
+        temporary = path + '.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(bytes(SaveArchive.header.size))
+                offset = SaveArchive.header.size
+
+                for row, file in zip(saves, files):
+                    with open(file, 'rb') as binary_file:
+                        data = binary_file.read()
+                    total += len(data)
+
+                    row['first'] = len(pieces)
+                    row['size'] = len(data)
+                    spans = SaveArchive.split(data, dedup)
+                    row['pieces'] = len(spans)
+
+                    for start, end in spans:
+                        chunk = data[start:end]
+                        digest = hashlib.sha1(chunk).digest()
+                        if dedup is None or digest not in seen:
+                            seen[digest] = len(chunks)
+                            chunks.append((offset, len(chunk), digest))
+                            f.write(chunk)
+                            offset += len(chunk)
+                        pieces.append(seen[digest])
+
+                index = offset
+                f.write(saves.tobytes())
+                f.write(np.array(pieces, dtype='<u4').tobytes())
+                f.write(np.array(chunks, dtype=SaveArchive.chunks_dtype).tobytes())
+                f.write('\n'.join(names).encode('utf-8'))
+                size = f.tell()
+
+                f.seek(0)
+                f.write(SaveArchive.header.pack(SaveArchive.magic, len(saves), len(chunks), len(pieces), index))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.isfile(temporary):
+                os.remove(temporary)
+            raise
+
+        return {'saves': len(saves), 'chunks': len(chunks), 'bytes': size, 'input': total}
@@ -0,0 +1,61 @@
+import os
+import itertools
+import concurrent.futures
+
+from .store import SaveStore
+
+def _apply(func, path):
+    # Runs in the worker. Errors come back as text so one bad save does not
+    # abort the batch and nothing unpicklable crosses the process boundary.
+    try:
+        return func(path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def chunk_size(count, workers):
+    """Number of saves handed to a worker at a time, about four chunks per worker.
+    """
+    return max(1, count // (workers * 4))
+
+def map_saves(func, paths, workers=None, chunksize=None):
+    """Applies func to every save in paths over a pool of processes.
+
+    Saves are independent, so each worker parses its own files. func must be a
+    module level function so it can be sent to the workers, and should return
+    something compact such as structured arrays, dicts or text rather than
+    SaveFile objects.
+
+    Args:
+        func (callable): Called with the path of each save.
+        paths (list): Paths of the saves.
+        workers (int): Number of processes, defaults to the number of CPUs.
+            With 1 the saves are processed in this process.
+        chunksize (int): Saves sent to a worker at a time, see chunk_size().
+
+    Yields:
+        tuple: (path, result, error) in the order of paths. error is None on
+        success, otherwise result is None and error describes the failure.
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = chunk_size(len(paths), workers)
+
+    if workers == 1:
+        for path in paths:
+            yield (path,) + _apply(func, path)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_apply, itertools.repeat(func), paths, chunksize=chunksize)
+        for path, (result, error) in zip(paths, results):
+            yield path, result, error
+
+def decode_tables(paths, workers=None, chunksize=None):
+    """Decodes saves into the per-table structured arrays of SaveStore.decode.
+
+    Yields:
+        tuple: (path, tables, error) as from map_saves.
+    """
+    return map_saves(SaveStore.decode, paths, workers=workers, chunksize=chunksize)
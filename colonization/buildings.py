@@ -1,4 +1,70 @@
+import array
+import struct
+import collections.abc
+
+import numpy as np
+
+from . import codec
+from .schema import Field, Schema
+from .table import RecordTable, record_layout
+from .powers import Power
 from .units import Colonist, Unit
+
+class FlagView(collections.abc.MutableMapping):
+    """Dict style access, name -> bool, to a bitmask stored as an int attribute.
+
+    Args:
+        owner: Object holding the bitmask.
+        attribute (str): Name of the int attribute on owner.
+        bits (dict): Names and the bit offset of each.
+    """
+    __slots__ = ('owner', 'attribute', 'bits')
+
+    def __init__(self, owner, attribute, bits):
+        self.owner = owner
+        self.attribute = attribute
+        self.bits = bits
+
+    def __getitem__(self, name):
+        return bool(getattr(self.owner, self.attribute) >> self.bits[name] & 0x1)
+
+    def __setitem__(self, name, value):
+        mask = getattr(self.owner, self.attribute) & ~(1 << self.bits[name])
+        setattr(self.owner, self.attribute, mask | int(bool(value)) << self.bits[name])
+
+    def __delitem__(self, name):
+        raise TypeError("flags cannot be removed")
+
+    def __iter__(self):
+        return iter(self.bits)
+
+    def __len__(self):
+        return len(self.bits)
+
+class StockView(collections.abc.MutableMapping):
+    """Dict style access, name -> amount, to an array indexed by supply code.
+    """
+    __slots__ = ('stock', 'codes')
+
+    def __init__(self, stock, codes):
+        self.stock = stock
+        self.codes = codes
+
+    def __getitem__(self, name):
+        return self.stock[self.codes[name]]
+
+    def __setitem__(self, name, value):
+        self.stock[self.codes[name]] = value
+
+    def __delitem__(self, name):
+        raise TypeError("supplies cannot be removed")
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __len__(self):
+        return len(self.codes)
+
 class Village():
     byte_length = 18
 
@@ -14,18 +80,35 @@ class Village():
                 'Muskets': 0xF}
     supplies['(None)'] = 0xFF
 
+    power_names = codec.lookup_table(powers)
+    supply_names = codec.lookup_table(supplies)
+
     unknowns = [(3, 3), (5, 7)]
     # Byte 3 is probably capital when 0x04 and 0x00 is regular
     # Byte 3 goes 0 -> 2 when training farmer
     # Byte 7 seems constant 0xFF
- 
+
+    schema = Schema(byte_length, [
+        Field('x', 0), Field('y', 1), Field('power', 2, enum=powers), Field('hitpoints', 4),
+        Field('last_bought', 8, enum=supplies), Field('last_sold', 9, enum=supplies),
+        Field('english_alarm', 10), Field('english_attacks', 11),
+        Field('french_alarm', 12), Field('french_attacks', 13),
+        Field('spanish_alarm', 14), Field('spanish_attacks', 15),
+        Field('dutch_alarm', 16), Field('dutch_attacks', 17)
+    ])
+
+    __slots__ = ('position', 'power', 'hitpoints', 'last_bought', 'last_sold',
+                 'english_alarm', 'english_attacks', 'french_alarm', 'french_attacks',
+                 'spanish_alarm', 'spanish_attacks', 'dutch_alarm', 'dutch_attacks', 'data')
 
     def __init__(self):
+        # Enum fields hold names. power is None, the name codec.lookup_table
+        # gives codes without one, until the tribe is set
         self.position = (0, 0)
-        self.power = 0
+        self.power = None
         self.hitpoints = 0
-        self.last_bought = 0xFF
-        self.last_sold = 0xFF
+        self.last_bought = '(None)'
+        self.last_sold = '(None)'
         self.english_alarm = 0
         self.english_attacks = 0
         self.french_alarm = 0
@@ -34,40 +117,40 @@ class Village():
         self.spanish_attacks = 0
         self.dutch_alarm = 0
         self.dutch_attacks = 0
-        self.unknown = b''
+        self.data = None
+
+    @property
+    def unknown(self):
+        if self.data is None:
+            return b''
+        return b''.join([self.data[start:end + 1] for start, end in Village.unknowns])
 
     def pack(self):
-        print('packing')
+        """Encodes the village back into its 18 bytes.
+
+        A village that was not unpacked needs its power, the tribe, set first.
+        """
+        if self.power is None and self.data is None:
+            raise ValueError("village power must be set to one of Village.powers")
+        values = {name: getattr(self, name) for name in Village.schema.by_name
+                  if name not in ('x', 'y') and getattr(self, name) is not None}
+        values['x'], values['y'] = self.position
+        return Village.schema.pack(values, self.data)
 
     def unpack(self, data):
         if len(data) != Village.byte_length:
             raise ValueError
-        
-        self.position = (data[0], data[1])
-        lookup = {val: key for key, val in Village.powers.items()}
-        self.power = lookup[data[2]]
-        self.hitpoints = data[4]
-        lookup = {val: key for key, val in Village.supplies.items()}
-        self.last_bought = lookup[data[8]]
-        self.last_sold = lookup[data[9]]
-        self.english_alarm = data[10]
-        self.english_attacks = data[11]
-        self.french_alarm = data[12]
-        self.french_attacks = data[13]
-        self.spanish_alarm = data[14]
-        self.spanish_attacks = data[15]
-        self.dutch_alarm = data[16]
-        self.dutch_attacks = data[17]
-        self.unknown = b''.join([data[start:end + 1] for start, end in Village.unknowns])
 
-        
+        self.data = data
+        values = Village.schema.unpack(data)
+        self.position = (values.pop('x'), values.pop('y'))
+        for name, value in values.items():
+            setattr(self, name, value)
 
-    def __str__(self):
-        lookup = {val: key for key, val in Village.powers.items()}
-        power = lookup[self.power & 0xF]  #Only 4 LSB is power, 4 MSB unknown
 
+    def __str__(self):
         out = f'Position: {self.position[0]:>3d},{self.position[1]:>3d}\n'
-        out += f'Power: {power}\n'
+        out += f'Power: {self.power}\n'
         out += f'  Hit points: {self.hitpoints}\n'
         out += f'  Last Bought: {self.last_bought}\n'
         out += f'  Last Sold: {self.last_sold}\n'
@@ -110,6 +193,8 @@ class Colony():
 
     powers = {'England': 0x00, 'France': 0x01, 'Spain': 0x02,
               'Netherlands': 0x03}
+    power_names = codec.lookup_table(powers)
+    constructable_names = codec.lookup_table(constructables)
 
     supplies = {'Food': 0x0, 'Sugar': 0x1, 'Tobacco': 0x2,
                 'Cotton': 0x3, 'Furs': 0x4, 'Lumber': 0x5,
@@ -126,6 +211,22 @@ class Colony():
 
     unused = [(120, 131, 0xFF)]
 
+    # Buildings and custom house exports are bitmasks indexed by the codes
+    # of Colony.buildings and Colony.supplies. unused is checked on decode
+    # and never written.
+    schema = Schema(byte_length, [
+        Field('x', 0), Field('y', 1), Field('name', 2, size=0x17, kind='str'), Field('power', 0x1A),
+        Field('colonist_count', 0x1F),
+        Field('occupations', 0x20, size=32, count=32, length='colonist_count', enum=Colonist.specialties),
+        Field('specialties', 0x40, size=32, count=32, length='colonist_count', enum=Colonist.specialties),
+        Field('times', 0x60, size=16, count=32, bits=4, length='colonist_count'),
+        Field('fields', 0x70, size=8, count=8), Field('unused', 120, size=12, kind='bytes'),
+        Field('built', 0x84, size=6), Field('custom_house', 0x8A, size=2),
+        Field('hammers', 0x92, size=2), Field('constructing', 0x94, enum=constructables),
+        Field('storage', 0x9A, size=32, count=16),
+        Field('counts', 0xBA, size=4, count=4), Field('bells', 0xC2, size=2)
+    ])
+
     building_hierarchy = [['Stockade', 'Fort', 'Fortress'],
                           ['Armory', 'Magazine', 'Arsenal'],
                           ['Docks', 'Drydock', 'Shipyard'],
@@ -140,20 +241,27 @@ class Colony():
                           ['Church', 'Cathedral'],
                           ['Blacksmith\'s House', 'Blacksmith\'s Shop','Iron Works']]
 
+    # Order of the colonist indices of the fields around the colony at 0x70
+    field_names = ['N', 'E', 'S', 'W', 'NW', 'NE', 'SE', 'SW']
+
+    # Buildings, exports and storage are kept as two ints and an array rather
+    # than dicts; built, custom_house and storage expose them as mappings
+    __slots__ = ('position', 'name', 'power', 'colonists', 'field_indices', 'built_mask',
+                 'exports_mask', 'hammers', 'constructing', 'stock', 'bells',
+                 'english_count', 'french_count', 'spanish_count', 'dutch_count', 'data')
+
     def __init__(self, data):
         self.position = (0, 0)
         self.name = ''
         self.power = None
         self.colonists = []
-        self.fields = {'N': None, 'E': None, 'S': None, 'W': None,
-                       'NW': None, 'NE': None, 'SE': None, 'SW': None}
-        self.built = {}
-        self.custom_house = {}
+        self.field_indices = bytes([0xFF]) * len(Colony.field_names)
+        self.built_mask = 0
+        self.exports_mask = 0
         self.hammers = 0
         self.constructing = None
-        self.storage = {}
+        self.stock = array.array('H', bytes(2 * len(Colony.supplies)))
         self.bells = 0
-        self.unknown = b''
         self.english_count = 1
         self.french_count = 1
         self.spanish_count = 1
@@ -163,57 +271,86 @@ class Colony():
         try:
             if len(data) != Colony.byte_length:
                 raise ValueError
-            
-            self.position = (data[0], data[1])
-            self.name = data[2:0x19].decode('ascii').split(chr(0))[0]
-            self.power = data[0x1A]
-            
-            lookup = {val: key for key, val in Colonist.specialties.items()}
-            for offset in range(data[0x1F]):
+
+            values = Colony.schema.unpack(data)
+            self.position = (values['x'], values['y'])
+            self.name = values['name']
+            self.power = values['power']
+
+            for occupation, specialty, time in zip(values['occupations'], values['specialties'], values['times']):
                 worker = Colonist()
-                worker.occupation = lookup[data[0x20 + offset]]
-                worker.specialty = lookup[data[0x40 + offset]]
-                if offset % 2:
-                    worker.time = data[0x60 + offset // 2] >> 4 & 0x0F
-                else:
-                    worker.time = data[0x60 + offset // 2] & 0x0F
+                worker.occupation = occupation
+                worker.specialty = specialty
+                worker.time = time
                 self.colonists.append(worker)
-            for offset, location in enumerate(self.fields):
-                self.fields[location] = data[0x70 + offset]
-            for name, offset in Colony.buildings.items():
-                temp = int.from_bytes(data[0x84:0x8A], "little")
-                temp = (temp >> offset) & 0x1
-                self.built[name] = bool(temp)
-
-            for name, offset in Colony.supplies.items():
-                temp = int.from_bytes(data[0x8A:0x8C], "little")
-                temp = (temp >> offset) & 0x1
-                self.custom_house[name] = bool(temp)
-                
-            self.hammers = int.from_bytes(data[0x92:0x94], "little")
-            self.constructing = next(key for key, value in Colony.constructables.items() if value == data[0x94])
-
-            for name, offset in Colony.supplies.items():
-                stock = data[0x9A + 2 * offset: 0x9C + 2 * offset]
-                self.storage[name] = int.from_bytes(stock, "little")
-            self.english_count = data[0xBA]
-            self.french_count = data[0xBB]
-            self.spanish_count = data[0xBC]
-            self.dutch_count = data[0xBD]
-            self.bells = int.from_bytes(data[0xC2:0xC4], "little")
-            
-            self.unknown = b''.join([data[start:end + 1] for start, end in Colony.unknowns])
+
+            self.field_indices = bytes(values['fields'])
+            self.built_mask = values['built']
+            self.exports_mask = values['custom_house']
+
+            self.hammers = values['hammers']
+            self.constructing = values['constructing']
+
+            self.stock = array.array('H', values['storage'])
+
+            self.english_count, self.french_count, self.spanish_count, self.dutch_count = values['counts']
+            self.bells = values['bells']
+
             for start, stop, val in Colony.unused:
-                for address in range(start, stop+1):
-                    if data[address] != val:
-                        raise ValueError(f'******** Unexpected value at {address} in colony {self.name}. Expected: {val}, Read: {data[address]} *******')
+                expected = bytes([val]) * (stop - start + 1)
+                if values['unused'] != expected:
+                    address = start + next(i for i, x in enumerate(values['unused']) if x != val)
+                    raise ValueError(f'******** Unexpected value at {address} in colony {self.name}. Expected: {val}, Read: {data[address]} *******')
         except Exception as e:
             print(f"An error occurred when creating a colony: {e}")
             raise e
 
+    @property
+    def fields(self):
+        """Colonist index working each field around the colony, 0xFF when unworked.
+        """
+        return dict(zip(Colony.field_names, self.field_indices))
+
+    @fields.setter
+    def fields(self, value):
+        self.field_indices = bytes(value[name] for name in Colony.field_names)
+
+    @property
+    def built(self):
+        return FlagView(self, 'built_mask', Colony.buildings)
+
+    @property
+    def custom_house(self):
+        return FlagView(self, 'exports_mask', Colony.supplies)
+
+    @property
+    def storage(self):
+        return StockView(self.stock, Colony.supplies)
+
+    @property
+    def unknown(self):
+        return b''.join([self.data[start:end + 1] for start, end in Colony.unknowns])
+
+    def pack(self):
+        """Encodes the colony back into its 202 bytes.
+        """
+        values = {
+            'x': self.position[0], 'y': self.position[1], 'name': self.name, 'power': self.power,
+            'colonist_count': len(self.colonists),
+            'occupations': [worker.occupation for worker in self.colonists],
+            'specialties': [worker.specialty for worker in self.colonists],
+            'times': [worker.time for worker in self.colonists],
+            'fields': list(self.field_indices),
+            'built': self.built_mask, 'custom_house': self.exports_mask,
+            'hammers': self.hammers, 'constructing': self.constructing,
+            'storage': list(self.stock),
+            'counts': [self.english_count, self.french_count, self.spanish_count, self.dutch_count],
+            'bells': self.bells,
+        }
+        return Colony.schema.pack(values, self.data)
+
     def __str__(self):
-        lookup = {val: key for key, val in Colony.powers.items()}
-        power = lookup[self.power & 0xF]  #Only 4 LSB is power, 4 MSB unknown
+        power = codec.decode(Colony.power_names, self.power & 0xF)  #Only 4 LSB is power, 4 MSB unknown
 
         out = f'Name: {self.name}\n'\
               f'Position: {self.position}\n'\
@@ -423,3 +560,156 @@ class OldColony():
 
         out += '  Unknown: ' + "  ".join(['{:02x}'.format(x) for x in self.unknown]).upper()
         return out
+
+class ColonyTable(RecordTable):
+    """All colonies of a save decoded at once into a NumPy structured array.
+
+    Bitmasks are kept whole (buildings, custom_house) and can be tested with
+    built() and exporting(). Colonist columns hold codes for the first
+    colonist_count entries; counts holds the English, French, Spanish and Dutch
+    counts in that order. valid is False where the unused bytes are not 0xFF.
+    Indexing the table returns a Colony for that record.
+    """
+    record_type = Colony
+
+    layout = record_layout(Colony.byte_length, [
+        ('x', 0, 'u1'), ('y', 1, 'u1'), ('name', 2, 'S23'), ('power', 0x1A, 'u1'),
+        ('colonist_count', 0x1F, 'u1'), ('occupations', 0x20, ('u1', 32)),
+        ('specialties', 0x40, ('u1', 32)), ('times', 0x60, ('u1', 16)),
+        ('fields', 0x70, ('u1', 8)), ('unused', 120, ('u1', 12)),
+        ('buildings', 0x84, ('u1', 6)), ('custom_house', 0x8A, '<u2'),
+        ('hammers', 0x92, '<u2'), ('constructing', 0x94, 'u1'),
+        ('storage', 0x9A, ('<u2', 16)), ('counts', 0xBA, ('u1', 4)), ('bells', 0xC2, '<u2')
+    ])
+
+    dtype = np.dtype([
+        ('x', 'u1'), ('y', 'u1'), ('name', 'U23'), ('power', 'u1'),
+        ('colonist_count', 'u1'), ('occupations', 'u1', 32), ('specialties', 'u1', 32),
+        ('times', 'u1', 32), ('fields', 'u1', 8), ('buildings', 'u8'),
+        ('custom_house', 'u2'), ('hammers', 'u2'), ('constructing', 'u1'),
+        ('storage', 'u2', 16), ('counts', 'u1', 4), ('bells', 'u2'), ('valid', '?')
+    ])
+
+    def decode(self, raw):
+        records = np.zeros(len(raw), dtype=ColonyTable.dtype)
+        for name in ['x', 'y', 'power', 'colonist_count', 'occupations', 'specialties', 'fields',
+                     'custom_house', 'hammers', 'constructing', 'storage', 'counts', 'bells']:
+            records[name] = raw[name]
+
+        records['name'] = [name.split(b'\0')[0].decode('ascii') for name in raw['name']]
+
+        # Teaching times are packed two nibbles per byte, even colonists in the low nibble
+        packed = raw['times']
+        records['times'] = np.stack([packed & 0xF, packed >> 4], axis=-1).reshape(len(raw), 32)
+
+        # 6 byte little endian building mask
+        shifts = np.arange(0, 48, 8, dtype=np.uint64)
+        records['buildings'] = np.bitwise_or.reduce(raw['buildings'].astype(np.uint64) << shifts, axis=-1)
+
+        records['valid'] = np.all(raw['unused'] == 0xFF, axis=-1)
+        return records
+
+    @property
+    def positions(self):
+        """(count, 2) array of colony (x, y) positions.
+        """
+        return np.stack([self.records['x'], self.records['y']], axis=-1)
+
+    def built(self, name):
+        """Boolean array, True for colonies that have the named building.
+        """
+        return (self.records['buildings'] >> np.uint64(Colony.buildings[name])) & np.uint64(1) == 1
+
+    def exporting(self, name):
+        """Boolean array, True for colonies whose custom house exports the named supply.
+        """
+        return (self.records['custom_house'] >> Colony.supplies[name]) & 1 == 1
+
+    def stock(self, name):
+        """Array of the amount of the named supply in each colony.
+        """
+        return self.records['storage'][:, Colony.supplies[name]]
+
+class VillageTable(RecordTable):
+    """All villages of a save decoded at once into a NumPy structured array.
+
+    alarm and attacks hold one column per European power in Power.order
+    (English, French, Spanish, Dutch), so a question such as the highest
+    English alarm of each tribe is one array operation, see alarm() and
+    by_tribe(). power, last_bought and last_sold hold the raw codes of
+    Village.powers and Village.supplies. Indexing the table returns a Village
+    for that record.
+    """
+    record_type = Village
+
+    layout = record_layout(Village.byte_length, [
+        ('x', 0, 'u1'), ('y', 1, 'u1'), ('power', 2, 'u1'), ('hitpoints', 4, 'u1'),
+        ('last_bought', 8, 'u1'), ('last_sold', 9, 'u1'), ('relations', 10, ('u1', 8))
+    ])
+
+    dtype = np.dtype([
+        ('x', 'u1'), ('y', 'u1'), ('power', 'u1'), ('hitpoints', 'u1'),
+        ('last_bought', 'u1'), ('last_sold', 'u1'),
+        ('alarm', 'u1', 4), ('attacks', 'u1', 4)
+    ])
+
+    def decode(self, raw):
+        records = np.zeros(len(raw), dtype=VillageTable.dtype)
+        for name in ['x', 'y', 'power', 'hitpoints', 'last_bought', 'last_sold']:
+            records[name] = raw[name]
+
+        # Alarm and attacks alternate, one pair per power
+        records['alarm'] = raw['relations'][:, 0::2]
+        records['attacks'] = raw['relations'][:, 1::2]
+        return records
+
+    def __getitem__(self, index):
+        village = Village()
+        village.unpack(self.view(index))
+        return village
+
+    @property
+    def positions(self):
+        """(count, 2) array of village (x, y) positions.
+        """
+        return np.stack([self.records['x'], self.records['y']], axis=-1)
+
+    @staticmethod
+    def power_column(power):
+        if power not in Power.order[0:Power.count]:
+            raise ValueError(f"power must be one of {Power.order[0:Power.count]}")
+        return Power.order.index(power)
+
+    def alarm(self, power):
+        """Array of each village's alarm towards the named European power.
+        """
+        return self.records['alarm'][:, VillageTable.power_column(power)]
+
+    def attacks(self, power):
+        """Array of the attacks each village has suffered from the named European power.
+        """
+        return self.records['attacks'][:, VillageTable.power_column(power)]
+
+    def of_tribe(self, name):
+        """Boolean array, True for villages of the named tribe.
+        """
+        return self.records['power'] == Village.powers[name]
+
+    def by_tribe(self, values, reduce=np.maximum):
+        """Reduces a per village array over the villages of each tribe.
+
+        Example: table.by_tribe(table.alarm('English')) gives the highest
+        English alarm of every tribe.
+
+        Args:
+            values (numpy.ndarray): One value per village.
+            reduce (numpy.ufunc): Binary ufunc to combine values with.
+
+        Returns:
+            dict: Tribe name -> reduced value, for tribes with villages.
+        """
+        tribes, groups = np.unique(self.records['power'], return_inverse=True)
+        order = np.argsort(groups, kind='stable')
+        starts = np.searchsorted(groups[order], np.arange(len(tribes)))
+        reduced = reduce.reduceat(np.asarray(values)[order], starts) if len(order) else []
+        return {codec.decode(Village.power_names, tribe): value for tribe, value in zip(tribes.tolist(), np.asarray(reduced).tolist())}
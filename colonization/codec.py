@@ -0,0 +1,27 @@
+# Lookup tables shared by the record decoders.
+#
+# The enum dicts on the record classes map names to the byte values stored in a
+# save. Decoding needs the reverse direction, so each dict is inverted once at
+# import into a 256 entry tuple indexed by byte value.
+
+def lookup_table(mapping, default=None, size=256):
+    """Inverts a dict of name -> code into a tuple indexed by code.
+
+    Args:
+        mapping (dict): Names and the byte values that encode them.
+        default: Entry for codes that have no name.
+        size (int): Number of entries, 256 covers any byte.
+    """
+    table = [default] * size
+    for name, code in mapping.items():
+        table[code] = name
+    return tuple(table)
+
+def decode(table, code):
+    """Looks up code in a table from lookup_table, raising KeyError for codes
+    that have no name just like the dict it was built from.
+    """
+    name = table[code]
+    if name is None:
+        raise KeyError(code)
+    return name
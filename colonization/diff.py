@@ -0,0 +1,226 @@
+import numpy as np
+
+from .buildings import Village
+from .layout import Layout
+
+# One row per differing byte. section indexes Layout.sections, offset is the
+# address relative to the start of that section and record/byte split it by
+# the section's record length. x and y are only set for map sections.
+change_dtype = np.dtype([
+    ('address', 'u4'), ('old', 'u1'), ('new', 'u1'), ('section', 'u1'),
+    ('offset', 'u4'), ('record', 'u4'), ('byte', 'u4'), ('x', 'i4'), ('y', 'i4')
+])
+
+# Sections whose record count can differ between saves: section index in
+# Layout.sections, count attribute, singular and plural names
+variable_sections = [(1, 'colony_count', 'colony', 'colonies'),
+                     (2, 'unit_count', 'unit', 'units'),
+                     (4, 'village_count', 'village', 'villages')]
+
+def align(left, right):
+    """Lines up two saves whose colony, unit or village counts differ.
+
+    Each section whose count differs is blanked out in both saves, and the right
+    save is cut or padded so everything after it lines up with the left save.
+
+    Args:
+        left, right (bytes-like): Contents of the two saves.
+
+    Returns:
+        tuple: (left, right, layout, dropped) with left and right as uint8
+        arrays, layout the Layout both now follow (the left one) and dropped a
+        list of (singular, plural, left count, right count) for each blanked section.
+    """
+    layouts = [Layout.from_data(left), Layout.from_data(right)]
+    left = np.frombuffer(left, dtype=np.uint8)
+    right = np.frombuffer(right, dtype=np.uint8)
+
+    dropped = []
+    shift = 0
+    for index, count, single, plural in variable_sections:
+        counts = [getattr(layout, count) for layout in layouts]
+        if counts[0] == counts[1]:
+            continue
+
+        left_start, left_end = (layouts[0].sections[index][1], layouts[0].sections[index + 1][1])
+        right_start, right_end = (layouts[1].sections[index][1] - shift, layouts[1].sections[index + 1][1] - shift)
+
+        blank = np.zeros(left_end - left_start, dtype=np.uint8)
+        left = np.concatenate([left[:left_start], blank, left[left_end:]])
+        right = np.concatenate([right[:right_start], blank, right[right_end:]])
+
+        shift += (right_end - right_start) - (left_end - left_start)
+        dropped.append((single, plural, counts[0], counts[1]))
+
+    return left, right, layouts[0], dropped
+
+def diff_bytes(left, right, layout):
+    """Finds every differing byte between two saves that share a layout.
+
+    Args:
+        left, right (bytes-like): Contents of the two saves, see align().
+        layout (Layout): Layout of both saves.
+
+    Returns:
+        numpy.ndarray: Array of change_dtype, one row per change, in address order.
+    """
+    left = np.frombuffer(left, dtype=np.uint8)
+    right = np.frombuffer(right, dtype=np.uint8)
+
+    if any(left[0x0C:0x10] != right[0x0C:0x10]):
+        raise ValueError("Different map size")
+    if len(left) != len(right):
+        raise ValueError("File sizes different")
+
+    addresses = np.flatnonzero(left != right)
+    changes = np.zeros(len(addresses), dtype=change_dtype)
+    changes['address'] = addresses
+    changes['old'] = left[addresses]
+    changes['new'] = right[addresses]
+
+    # Label each change with the last section starting at or before it
+    starts = np.array([start for _, start, _ in layout.sections])
+    lengths = np.array([length for _, _, length in layout.sections])
+    section = np.searchsorted(starts, addresses, side='right') - 1
+    offset = addresses - starts[section]
+
+    changes['section'] = section
+    changes['offset'] = offset
+    changes['record'] = offset // lengths[section]
+    changes['byte'] = offset % lengths[section]
+
+    maps = np.isin(section, [i for i, (name, _, _) in enumerate(layout.sections) if name in Layout.map_names])
+    changes['x'] = np.where(maps, offset % layout.map_width, -1)
+    changes['y'] = np.where(maps, offset // layout.map_width, -1)
+    return changes
+
+def diff(left, right):
+    """Aligns two saves and returns (changes, layout, dropped), see align() and diff_bytes().
+    """
+    left, right, layout, dropped = align(left, right)
+    return diff_bytes(left, right, layout), layout, dropped
+
+def diff_history(saves):
+    """Diffs each save against the one before it.
+
+    Args:
+        saves (iterable): Contents of saves in order, e.g. one per turn.
+
+    Yields:
+        tuple: (index, changes, layout, dropped) where index is the later save.
+    """
+    previous = None
+    for index, data in enumerate(saves):
+        if previous is not None:
+            yield (index,) + diff(previous, data)
+        previous = data
+
+def render(changes, layout):
+    """Formats changes as the lines hex_compare prints.
+    """
+    lines = []
+    for change in changes.tolist():
+        address, old, new, section, offset, record, byte, x, y = change
+        label, _, group = layout.sections[section]
+
+        line = f'Change at 0x{address:04X}: 0x{old:02X} -> 0x{new:02X}  {label:13} (0x{offset:04X}'
+        if group > 1:
+            line += f', Group {record} Byte {byte}'
+        elif x >= 0:
+            line += f' Position ({x}),({y})'
+        lines.append(line + ')')
+    return lines
+
+class RecordChange():
+    """A colony, unit or village that was inserted, deleted or modified between two saves.
+
+    left and right are the record's index in each save (None when it is absent
+    from that save). fields maps each changed field to its (old, new) values.
+    """
+    def __init__(self, section, kind, key, left=None, right=None, fields=None):
+        self.section = section
+        self.kind = kind
+        self.key = key
+        self.left = left
+        self.right = right
+        self.fields = fields or {}
+
+    def __str__(self):
+        index = self.left if self.right is None else self.right
+        out = f'{self.kind.capitalize()} {self.section[:-1] if self.section != "colonies" else "colony"} {index} {self.key}'
+        for name, (old, new) in self.fields.items():
+            out += f'\n    {name}: {old} -> {new}'
+        return out
+
+def table_rows(records):
+    """Converts a structured array to a list of dicts of plain Python values.
+    """
+    names = records.dtype.names
+    # tolist() per column so array fields become lists rather than ndarrays
+    columns = [records[name].tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+def village_rows(villages):
+    names = [name for name in Village.__slots__ if name != 'data'] + ['unknown']
+    return [{name: getattr(village, name) for name in names} for village in villages]
+
+# How each section is read from a SaveFile and which fields identify a record
+record_sections = {
+    'colonies': (lambda save: table_rows(save.colony_table.records),
+                 lambda row: (row['name'], row['x'], row['y'])),
+    'units': (lambda save: table_rows(save.unit_table.records),
+              lambda row: (row['x'], row['y'], row['form'], row['power'])),
+    'villages': (lambda save: village_rows(save.villages),
+                 lambda row: row['position']),
+}
+
+def match_records(section, left, right, key):
+    """Pairs up records by key using a hashed index of the right save.
+
+    Records that share a key, such as units stacked on one tile, are paired
+    in the order they appear.
+
+    Returns:
+        list: RecordChange for every deleted, inserted or modified record.
+    """
+    index = {}
+    for position, row in enumerate(right):
+        index.setdefault(key(row), []).append(position)
+    for positions in index.values():
+        positions.reverse()
+
+    changes = []
+    for position, row in enumerate(left):
+        candidates = index.get(key(row))
+        if not candidates:
+            changes.append(RecordChange(section, 'deleted', key(row), left=position))
+            continue
+
+        other = candidates.pop()
+        fields = {name: (value, right[other][name]) for name, value in row.items() if value != right[other][name]}
+        if fields:
+            changes.append(RecordChange(section, 'modified', key(row), left=position, right=other, fields=fields))
+
+    inserted = sorted(position for positions in index.values() for position in positions)
+    changes.extend(RecordChange(section, 'inserted', key(right[position]), right=position) for position in inserted)
+    return changes
+
+def diff_records(left, right, sections=None):
+    """Compares the colonies, units and villages of two saves record by record.
+
+    Unlike diff_bytes this works when the record counts differ. Colonies are
+    identified by name and position, units by position, form and power, and
+    villages by position.
+
+    Args:
+        left, right (SaveFile): The two saves.
+        sections (list): Names from record_sections to compare, defaults to all.
+
+    Returns:
+        list: RecordChange for every record that differs.
+    """
+    changes = []
+    for section in sections or record_sections:
+        rows, key = record_sections[section]
+        changes.extend(match_records(section, rows(left), rows(right), key))
+    return changes
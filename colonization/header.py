@@ -1,101 +1,398 @@
 import os
-import binascii
+import mmap
+import bisect
+import numbers
+import warnings
+
+import numpy as np
+
 import colonization
 
 class SaveFileWriter():
-    def __init__(self, data):
+    """Edits a copy of a save in memory and writes it back.
+
+    Every write is applied with slice assignment and the byte range it touched
+    is recorded against the section it falls in. save() writes a whole new file
+    atomically, patch() writes only the dirty ranges into an existing copy of
+    the save.
+
+    Args:
+        data (bytes-like): Contents of a COLONY 'sav' file.
+        path (str): File the data was read from, the default target of patch().
+    """
+    def __init__(self, data, path=None):
         self._data = bytearray(data)
         self._header = colonization.Header(self._data)
+        self.file_path = path
+
+        # Section name -> sorted, non-overlapping [start, end) address ranges
+        self.dirty = {}
 
         # TODO: check that data is a valid save?
 
-    def write_power(self, data=None, index=None):
-        if len(data) != colonization.Power.byte_length:
-            raise ValueError(f"invalid data length, got {len(data)}, expected {colonization.Power.byte_length}")
-        if data is None:
-            raise ValueError("data must not be None")
+    @classmethod
+    def from_file(cls, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Failed to read {path}")
+
+        with open(path, "rb") as binary_file:
+            return cls(binary_file.read(), path=path)
+
+    @property
+    def data(self):
+        return self._data
+
+    def write(self, address, data):
+        """Copies data into the save at address and marks the bytes that changed dirty.
+
+        Returns:
+            tuple: (start, end) of the changed bytes, None if nothing changed.
+        """
+        end = address + len(data)
+        if address < 0 or end > len(self._data):
+            raise ValueError(f"write of {len(data)} bytes at {address:#x} is outside the save ({len(self._data)} bytes)")
+
+        # Only the bytes that actually change are marked dirty
+        changed = np.flatnonzero(np.frombuffer(self._data, dtype=np.uint8, count=len(data), offset=address) !=
+                                 np.frombuffer(data, dtype=np.uint8))
+        if not len(changed):
+            return None
+        self._data[address:end] = data
+        end = address + int(changed[-1]) + 1
+        address += int(changed[0])
+
+        # Attribute the write to the last section starting at or before it
+        starts = [start for _, start, _ in self._header.layout.sections]
+        section = self._header.layout.sections[bisect.bisect_right(starts, address) - 1][0]
+        self.__mark(section, address, end)
+        return (address, end)
+
+    def __mark(self, section, start, end):
+        ranges = self.dirty.setdefault(section, [])
+        ranges.append((start, end))
+        ranges.sort()
+
+        # Merge ranges that overlap or touch
+        merged = [ranges[0]]
+        for range_start, range_end in ranges[1:]:
+            if range_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], range_end))
+            else:
+                merged.append((range_start, range_end))
+        self.dirty[section] = merged
+
+    def dirty_ranges(self):
+        """Returns every dirty (start, end) range in address order.
+        """
+        return sorted(span for ranges in self.dirty.values() for span in ranges)
+
+    @staticmethod
+    def power_index(index):
         if index is None:
             raise ValueError("index must not be None")
-        
+
         if isinstance(index, str):
-            if index not in colonization.Power.order[0:3]:
-                raise ValueError(f"power must be one of {colonization.Power.order[0:3]}")
+            if index not in colonization.Power.order[0:colonization.Power.count]:
+                raise ValueError(f"power must be one of {colonization.Power.order[0:colonization.Power.count]}")
             
             index = colonization.Power.order.index(index)
 
-        if isinstance(index, int):
-            if index not in range(0,len(colonization.Power.order)):
-                raise ValueError(f"power index must be one of {range(0,len(colonization.Power.order))}")
+        if not isinstance(index, numbers.Integral) or isinstance(index, bool):
+            raise ValueError(f"power index must be a power name or an integer, got {index!r}")
+        if index not in range(0, colonization.Power.count):
+            raise ValueError(f"power index must be one of {range(0, colonization.Power.count)}")
+
+        return int(index)
+
+    def write_power(self, data=None, index=None):
+        if data is None:
+            raise ValueError("data must not be None")
+        if len(data) != colonization.Power.byte_length:
+            raise ValueError(f"invalid data length, got {len(data)}, expected {colonization.Power.byte_length}")
+
+        index = self.power_index(index)
 
         # To serialize the powers, fetch start address and compute the offset based on the power index.
         address = self._header.powers_start_address + index * colonization.Power.byte_length
 
         # Update object in memory
-        for i in range(0, len(data)):
-            self._data[address + i] = data[i]
+        return self.write(address, data)
+
+    def write_powers(self, edits):
+        """Sets tax rates and gold of several powers at once.
+
+        Every value is checked before anything is written, so an invalid edit
+        leaves the save untouched. Each field is written with one slice
+        assignment.
+
+        Args:
+            edits (dict): Power index or name -> dict of field -> value, with
+                fields 'tax' and 'gold', e.g. {'Dutch': {'gold': 5000}}.
+
+        Returns:
+            list: (start, end) address ranges that changed.
+        """
+        writes = []
+        for index, values in edits.items():
+            start = self._header.powers_start_address + self.power_index(index) * colonization.Power.byte_length
+            for name, value in values.items():
+                colonization.Power.check(name, value)
+                field = colonization.Power.schema.by_name[name]
+                writes.append((start + field.offset, int(value).to_bytes(field.size, 'little')))
+
+        changed = [self.write(address, data) for address, data in writes]
+        return [span for span in changed if span is not None]
 
     def save(self, path, overwrite=True):
         SaveFile.save_data(data=self._data, path=path, overwrite=overwrite)
+        self.dirty = {}
 
-class SaveFile():
-    def __parse(self):
-        if not self.data:
-            raise ValueError("No data has been read from a file yet!")
+    def patch(self, path=None):
+        """Writes only the dirty ranges into an existing copy of the save.
 
-        # Parse header        
-        self.header = Header.from_file(self.file_path)
+        The file must hold the same save the writer was created from, so its
+        length is checked before anything is written.
 
-        # Parse Colonies
-        self.colonies = []
-        for i in range(0, self.header.colony_count):
-            colony_start = self.header.colonies_start_address + i * colonization.Colony.byte_length
-            colony_end   = colony_start + colonization.Colony.byte_length
+        Args:
+            path (str): File to patch, defaults to the file the data came from.
 
-            colony = colonization.Colony(self.data[colony_start:colony_end])
-            print(binascii.hexlify(self.data[colony_start:colony_end]))
-            print(self.data[colony_start:colony_end])
-            self.colonies.append(colony)
-        
-        # Parse Units
-        self.units = []
-        for i in range(0, self.header.unit_count):
-            unit_start = self.header.units_start_address + i * colonization.Unit.byte_length
-            unit_end   = unit_start + colonization.Unit.byte_length
+        Returns:
+            int: Number of bytes written.
+        """
+        destination = path if path is not None else self.file_path
+        if destination is None:
+            raise ValueError("path must not be None")
+        if os.path.getsize(destination) != len(self._data):
+            raise ValueError(f"{destination} is {os.path.getsize(destination)} bytes, expected {len(self._data)}")
+
+        written = 0
+        with open(destination, 'r+b') as f:
+            for start, end in self.dirty_ranges():
+                chunk = memoryview(self._data)[start:end]
+                if hasattr(os, 'pwrite'):
+                    written += os.pwrite(f.fileno(), chunk, start)
+                else:
+                    f.seek(start)
+                    written += f.write(chunk)
+
+        self.dirty = {}
+        return written
 
-            #print(f"Reading unit from {hex(unit_start)} to {hex(unit_end)}")
-            #print(binascii.hexlify(self.data[colony_start:colony_end]))
-            #print(self.data[colony_start:colony_end])
+class SaveFile():
+    """Reads a COLONY save file and exposes its sections.
 
-            unit = colonization.Unit(self.data[unit_start:unit_end])
+    Sections (colonies, units, powers, villages, maps and trade routes) are
+    decoded the first time they are accessed. Records reference slices of a
+    shared memoryview over the file contents rather than copies of it.
 
-            if unit.position[0] > self.header.map_width or unit.position[1] > self.header.map_height:
-                print(f"Warning: unit is at position {unit.position} but map is of shape {(self.header.map_width, self.header.map_height)}!")
+    Args:
+        path (str): Path to a COLONY 'sav' file.
+        lazy (bool): Memory map the file and defer decoding each section until
+            it is first used. When False the file is read into memory and all
+            sections are decoded up front.
+    """
+    def __parse(self):
+        if not self.data:
+            raise ValueError("No data has been read from a file yet!")
 
-            self.units.append(unit)
-        
-        # Parse Powers
-        self.powers = []
-        for i in range(0, 4): # There are only four powers - TODO: constants
-            power_start = self.header.powers_start_address + i * colonization.Power.byte_length
-            power_end   = power_start + colonization.Power.byte_length
+        # Parse header from the buffer that was already read
+        self.header = Header(self.buffer, path=self.file_path)
 
-            power = colonization.Power(self.data[power_start:power_end], order=i)
+        if not self.lazy:
+            for section in SaveFile.sections:
+                getattr(self, section)
 
-            self.powers.append(power)
+    def __records(self, start, record_type, count):
+        # Yields zero-copy views of count consecutive records beginning at start
+        for i in range(0, count):
+            record_start = start + i * record_type.byte_length
+            yield self.buffer[record_start:record_start + record_type.byte_length]
 
     def __reader(self):
         with open(self.file_path, "rb") as binary_file:
-            # Read the whole file at once
-            self.data = binary_file.read()
+            if self.lazy:
+                self.data = mmap.mmap(binary_file.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                # Read the whole file at once
+                self.data = binary_file.read()
 
-    def __init__(self, path):
+        self.buffer = memoryview(self.data)
+
+    def __init__(self, path, lazy=False):
         if not os.path.isfile(path):
             raise FileNotFoundError(f"Failed to read {path}")
         
         self.file_path = path
+        self.lazy = lazy
+        self._sections = {}
         self.__reader()
         self.__parse()
-    
+
+    @classmethod
+    def from_data(cls, data, path=None, lazy=False):
+        """Builds a SaveFile over the contents of a save that are already in memory.
+
+        Args:
+            data (bytes-like): Contents of a COLONY 'sav' file. A memoryview,
+                such as a slice of a SaveArchive, is used without copying.
+            path (str): Optional name the data was read from.
+            lazy (bool): Defer decoding each section until it is first used.
+                When False all sections are decoded up front, as for
+                SaveFile(path).
+
+        close() releases data when it is a memoryview.
+        """
+        instance = cls.__new__(cls)
+        instance.file_path = path
+        instance.lazy = lazy
+        instance._sections = {}
+        instance.data = data
+        instance.buffer = memoryview(data)
+        instance.__parse()
+        return instance
+
+    # Names of the sections that are decoded on first access
+    sections = ['colonies', 'units', 'powers', 'villages', 'maps', 'trade_routes']
+
+    @property
+    def colonies(self):
+        if 'colonies' not in self._sections:
+            self._sections['colonies'] = [
+                colonization.Colony(data) for data in
+                self.__records(self.header.colonies_start_address, colonization.Colony, self.header.colony_count)
+            ]
+        return self._sections['colonies']
+
+    @property
+    def colony_table(self):
+        """All colonies decoded in one pass into a ColonyTable.
+        """
+        if 'colony_table' not in self._sections:
+            self._sections['colony_table'] = colonization.ColonyTable(self.buffer, self.header.colonies_start_address, self.header.colony_count)
+        return self._sections['colony_table']
+
+    @property
+    def units(self):
+        if 'units' not in self._sections:
+            units = []
+            stray = []
+            for data in self.__records(self.header.units_start_address, colonization.Unit, self.header.unit_count):
+                unit = colonization.Unit(data)
+
+                # Units in or sailing to Europe are expected off the map
+                x, y = unit.position
+                europe = colonization.SpatialIndex.europe
+                if (x >= self.header.map_width or y >= self.header.map_height) and x not in europe and y not in europe:
+                    stray.append(unit.position)
+
+                units.append(unit)
+            self._sections['units'] = units
+
+            if stray:
+                warnings.warn(f"{self.file_path}: units at {stray} are off the map of shape "
+                              f"{(self.header.map_width, self.header.map_height)}", stacklevel=2)
+        return self._sections['units']
+
+    @property
+    def unit_table(self):
+        """All units decoded in one pass into a UnitTable.
+        """
+        if 'unit_table' not in self._sections:
+            self._sections['unit_table'] = colonization.UnitTable(self.buffer, self.header.units_start_address, self.header.unit_count)
+        return self._sections['unit_table']
+
+    @property
+    def powers(self):
+        if 'powers' not in self._sections:
+            self._sections['powers'] = [
+                colonization.Power(data, order=i) for i, data in
+                enumerate(self.__records(self.header.powers_start_address, colonization.Power, colonization.Power.count))
+            ]
+        return self._sections['powers']
+
+    @property
+    def villages(self):
+        if 'villages' not in self._sections:
+            villages = []
+            for data in self.__records(self.header.villages_start_address, colonization.Village, self.header.village_count):
+                village = colonization.Village()
+                village.unpack(data)
+                villages.append(village)
+            self._sections['villages'] = villages
+        return self._sections['villages']
+
+    @property
+    def village_table(self):
+        """All villages decoded in one pass into a VillageTable.
+        """
+        if 'village_table' not in self._sections:
+            self._sections['village_table'] = colonization.VillageTable(self.buffer, self.header.villages_start_address, self.header.village_count)
+        return self._sections['village_table']
+
+    @property
+    def spatial_index(self):
+        """A SpatialIndex of the units, colonies and villages, built on first use.
+        """
+        if 'spatial_index' not in self._sections:
+            self._sections['spatial_index'] = colonization.SpatialIndex.from_save(self)
+        return self._sections['spatial_index']
+
+    @property
+    def logistics(self):
+        """A RouteEvaluator of the trade routes, built on first use.
+        """
+        if 'logistics' not in self._sections:
+            self._sections['logistics'] = colonization.RouteEvaluator(self)
+        return self._sections['logistics']
+
+    @property
+    def maps(self):
+        if 'maps' not in self._sections:
+            self._sections['maps'] = colonization.Map.from_data(self.buffer, path=self.file_path, layout=self.header.layout)
+        return self._sections['maps']
+
+    @property
+    def trade_routes(self):
+        if 'trade_routes' not in self._sections:
+            routes = []
+            for data in self.__records(self.header.trade_routes_start_address, colonization.TradeRoute, colonization.TradeRoute.count):
+                route = colonization.TradeRoute()
+                route.unpack(data)
+                routes.append(route)
+            self._sections['trade_routes'] = routes
+        return self._sections['trade_routes']
+
+    def close(self):
+        """Drops decoded sections and releases the underlying file buffer.
+
+        Records, tables and map arrays taken from the save may still reference
+        the buffer. They stay valid: the buffer is then left to be freed with
+        the last of them instead of being released here, and a ResourceWarning
+        says so. Python hides ResourceWarning unless run with -X dev or
+        -W default.
+        """
+        self._sections = {}
+        if self.buffer is None:
+            return
+        try:
+            self.buffer.release()
+            if isinstance(self.data, mmap.mmap):
+                self.data.close()
+            elif isinstance(self.data, memoryview):
+                # e.g. a slice of a SaveArchive, which cannot close while it is held
+                self.data.release()
+        except BufferError:
+            # Exported to a record or array that is still referenced
+            warnings.warn(f"{self.file_path}: records still reference the save, "
+                          "its buffer is freed once they are dropped", ResourceWarning, stacklevel=2)
+        self.buffer = self.data = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     @staticmethod
     def save_data(data=None, path=None, overwrite=True):
         if data is None:
@@ -108,8 +405,19 @@ class SaveFile():
         if os.path.isfile(destination) and not overwrite:
             raise FileExistsError(f"Refusing to overwrite existing file: {destination}")
 
-        with open(destination, 'wb') as f:
-            f.write(bytearray(data))
+        # Write next to the destination and rename over it, so a failed write
+        # never leaves a truncated save behind
+        temporary = destination + '.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, destination)
+        except BaseException:
+            if os.path.isfile(temporary):
+                os.remove(temporary)
+            raise
 
         print(f"Wrote {len(data)} bytes to file: {destination}")
 
@@ -122,7 +430,7 @@ class SaveFile():
         if os.path.isfile(destination) and not overwrite:
             raise FileExistsError(f"Refusing to overwrite existing file: {destination}")
 
-        self.save_data(self.data, self.file_path, overwrite)
+        self.save_data(self.data, destination, overwrite)
 
 class Header():
     byte_length = 0x186
@@ -135,24 +443,6 @@ class Header():
     """Processes colonization header objects and file overview offsets.
     """
 
-    """
-    ('Colonies     ', 0x186, col.Colony.byte_length),
-    ('Units        ', 0x186 + col.Colony.byte_length * num_col, col.Unit.byte_length),
-    ('Powers       ', 0x186 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit, col.Power.byte_length),
-    ('Villages     ', 0x676 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit, col.Village.byte_length),
-
-    ('Unknown B    ', 0x676 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill, col.Map.byte_length),
-
-    ('Terrain Map  ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 0 * map_width * map_height, col.Map.byte_length),
-    ('Unknown Map C', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 1 * map_width * map_height, col.Map.byte_length),
-    ('Visible Map  ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 2 * map_width * map_height, col.Map.byte_length),
-    ('Unknown Map D', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 3 * map_width * map_height, col.Map.byte_length),
-    ('Unknown E    ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.Map.byte_length),
-    ('Unknown F    ', 0xDB5 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.Map.byte_length),
-
-    ('Trade Routes ', 0xE23 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.TradeRoute.byte_length)
-    """
-
     def __parse(self):
         if not self.data:
             raise ValueError("No data has been read from a file yet!")
@@ -162,19 +452,22 @@ class Header():
         if marker != self.__marker:
             raise Exception(f"Unrecognized file type: {self.file_path}")
 
-        # Read in object counts for offset computing
-        self.colony_count = self.data[0x2E]
-        self.unit_count = self.data[0x2C]
-        self.village_count = self.data[0x2A]
-        self.map_width = int.from_bytes(self.data[0x0C:0x0E], 'little')
-        self.map_height = int.from_bytes(self.data[0x0E:0x10], 'little')
-
-        # Compute base offsets of object groups. They are in order of appearance:
-        # Colonies -> Units -> Powers -> Village -> [Maps] -> Trade Routes
-        self.colonies_start_address = Header.base_offset + Header.byte_length
-        self.units_start_address = self.colonies_start_address + colonization.Colony.byte_length * self.colony_count
-        self.powers_start_address = self.units_start_address + colonization.Unit.byte_length * self.unit_count
-        self.villages_start_address = self.powers_start_address + colonization.Village.byte_length * self.village_count
+        # Object counts, map size and the offsets of object groups all come
+        # from the shared layout for this header
+        self.layout = colonization.Layout.from_data(self.data)
+
+        self.colony_count = self.layout.colony_count
+        self.unit_count = self.layout.unit_count
+        self.village_count = self.layout.village_count
+        self.map_width = self.layout.map_width
+        self.map_height = self.layout.map_height
+
+        self.colonies_start_address = self.layout.colonies_start_address
+        self.units_start_address = self.layout.units_start_address
+        self.powers_start_address = self.layout.powers_start_address
+        self.villages_start_address = self.layout.villages_start_address
+        self.maps_start_address = self.layout.maps_start_address
+        self.trade_routes_start_address = self.layout.trade_routes_start_address
 
     def __init__(self, data, path=None):
         self.data = data
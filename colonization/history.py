@@ -0,0 +1,195 @@
+import collections
+
+import numpy as np
+
+import colonization
+
+class SaveHistory():
+    """Stores a run of saves, e.g. every autosave of a game, as deltas.
+
+    The first save is kept whole. Every later save is stored as the changes to
+    the save before it, section by section: a section that keeps its length is
+    stored as runs of changed bytes, one whose length changed (because a colony,
+    unit or village was added or removed) is stored whole. Turns are rebuilt on
+    demand by replaying deltas from the nearest cached turn before them, and the
+    most recently rebuilt turns are kept in an LRU cache.
+
+    Args:
+        cache_size (int): Number of rebuilt saves to keep in memory.
+    """
+    # One row per run of changed bytes: section index in Layout.sections,
+    # offset within that section, number of bytes in the payload and whether
+    # the run replaces the whole section
+    run_dtype = np.dtype([('section', 'u1'), ('offset', 'u4'), ('length', 'u4'), ('whole', '?')])
+
+    # Changed bytes closer together than this are stored as a single run, since
+    # each run costs a run_dtype row
+    gap = run_dtype.itemsize
+
+    def __init__(self, cache_size=8):
+        self.cache_size = cache_size
+        self.base = None
+        self.deltas = []
+        self.__cache = collections.OrderedDict()
+        self.__last = None
+
+    def __len__(self):
+        return 0 if self.base is None else len(self.deltas) + 1
+
+    @classmethod
+    def from_files(cls, paths, cache_size=8):
+        """Builds a history from saves in turn order.
+        """
+        history = cls(cache_size=cache_size)
+        for path in paths:
+            with colonization.SaveFile(path, lazy=True) as save:
+                history.append(save.buffer)
+        return history
+
+    @staticmethod
+    def spans(data):
+        """Returns (start, end) of every section of a save, see Layout.sections.
+        """
+        starts = [start for _, start, _ in colonization.Layout.from_data(data).sections]
+        return list(zip(starts, starts[1:] + [len(data)]))
+
+    @staticmethod
+    def delta(old, new):
+        """Encodes new as changes to old.
+
+        Args:
+            old, new (bytes-like): Contents of consecutive saves.
+
+        Returns:
+            tuple: (runs, payload) with runs an array of run_dtype and payload
+            the uint8 bytes of every run concatenated.
+        """
+        old_bytes = np.frombuffer(old, dtype=np.uint8)
+        new_bytes = np.frombuffer(new, dtype=np.uint8)
+
+        runs = []
+        payload = []
+        for section, ((old_start, old_end), (new_start, new_end)) in enumerate(zip(SaveHistory.spans(old), SaveHistory.spans(new))):
+            after = new_bytes[new_start:new_end]
+            if old_end - old_start != new_end - new_start:
+                runs.append((section, 0, len(after), True))
+                payload.append(after)
+                continue
+
+            changed = np.flatnonzero(old_bytes[old_start:old_end] != after)
+            if not len(changed):
+                continue
+
+            # Split where the distance to the next changed byte exceeds gap
+            breaks = np.flatnonzero(np.diff(changed) > SaveHistory.gap)
+            starts = changed[np.concatenate([[0], breaks + 1])]
+            ends = changed[np.concatenate([breaks, [len(changed) - 1]])] + 1
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                runs.append((section, start, end - start, False))
+                payload.append(after[start:end])
+
+        runs = np.array(runs, dtype=SaveHistory.run_dtype)
+        payload = np.concatenate(payload) if payload else np.zeros(0, dtype=np.uint8)
+        return runs, payload
+
+    @staticmethod
+    def patch(old, runs, payload):
+        """Rebuilds a save from the one before it and a delta from delta().
+
+        Returns:
+            bytes: Contents of the later save.
+        """
+        old_bytes = np.frombuffer(old, dtype=np.uint8)
+        sections = [old_bytes[start:end] for start, end in SaveHistory.spans(old)]
+
+        position = 0
+        for section, offset, length, whole in runs.tolist():
+            changed = payload[position:position + length]
+            position += length
+
+            if whole:
+                sections[section] = changed
+                continue
+            if not sections[section].flags.writeable:
+                sections[section] = sections[section].copy()
+            sections[section][offset:offset + length] = changed
+
+        return np.concatenate(sections).tobytes()
+
+    def append(self, data):
+        """Adds the next turn.
+
+        Args:
+            data (bytes-like): Contents of the save.
+
+        Returns:
+            int: Index of the new turn.
+        """
+        data = bytes(data)
+        if self.base is None:
+            self.base = data
+        else:
+            self.deltas.append(self.delta(self.__last, data))
+        self.__last = data
+
+        turn = len(self) - 1
+        self.__remember(turn, data)
+        return turn
+
+    def __remember(self, turn, data):
+        self.__cache[turn] = data
+        self.__cache.move_to_end(turn)
+        while len(self.__cache) > self.cache_size:
+            self.__cache.popitem(last=False)
+
+    def __getitem__(self, turn):
+        """Returns the contents of the save at turn as bytes.
+        """
+        if turn < 0:
+            turn += len(self)
+        if turn not in range(0, len(self)):
+            raise IndexError(f"turn {turn} out of range for {len(self)} turns")
+
+        if turn in self.__cache:
+            self.__cache.move_to_end(turn)
+            return self.__cache[turn]
+
+        # Replay from the latest cached turn before this one, or the base
+        cached = [index for index in self.__cache if index < turn]
+        start = max(cached) if cached else 0
+        data = self.__cache[start] if cached else self.base
+        for index in range(start, turn):
+            data = self.patch(data, *self.deltas[index])
+
+        self.__remember(turn, data)
+        return data
+
+    def stored_size(self):
+        """Returns the number of bytes held by the base and every delta.
+        """
+        if self.base is None:
+            return 0
+        return len(self.base) + sum(runs.nbytes + payload.nbytes for runs, payload in self.deltas)
+
+    def write(self, path):
+        """Writes the history to a compressed .npz file.
+        """
+        columns = {'base': np.frombuffer(self.base, dtype=np.uint8)}
+        for turn, (runs, payload) in enumerate(self.deltas, 1):
+            columns[f'runs_{turn}'] = runs
+            columns[f'payload_{turn}'] = payload
+
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **columns)
+
+    @classmethod
+    def read(cls, path, cache_size=8):
+        """Loads a history written by write().
+        """
+        history = cls(cache_size=cache_size)
+        with np.load(path) as data:
+            history.base = data['base'].tobytes()
+            turns = sum(1 for name in data.files if name.startswith('runs_'))
+            history.deltas = [(data[f'runs_{turn}'], data[f'payload_{turn}']) for turn in range(1, turns + 1)]
+        history.__last = history[len(history) - 1]
+        return history
@@ -0,0 +1,86 @@
+import functools
+
+from .buildings import Colony, Village
+from .powers import Power
+from .trade import TradeRoute
+from .units import Unit
+
+class Layout():
+    """Start addresses of every section of a save.
+
+    The sections are in order of appearance:
+    Header -> Colonies -> Units -> Powers -> Villages -> Unknown B -> [Maps] ->
+    Unknown E -> Unknown F -> Trade Routes
+
+    Only the colony, unit and village counts and the map size vary between
+    saves, so layouts are cached on those five values and shared by every save
+    that has them, which is why the address sequences are tuples. Use
+    Layout.from_data() rather than building one directly.
+    """
+    header_length = 0x186
+
+    # Sections whose length does not depend on the save
+    unknown_b_length = 0x547
+    unknown_e_length = 0x1F8
+    unknown_f_length = 0x6E
+
+    # Number of map views stored back to back
+    map_views = 4
+    map_names = ['Terrain Map', 'Unknown Map C', 'Visible Map', 'Unknown Map D']
+
+    def __init__(self, colony_count, unit_count, village_count, map_width, map_height):
+        self.colony_count = colony_count
+        self.unit_count = unit_count
+        self.village_count = village_count
+        self.map_width = map_width
+        self.map_height = map_height
+        self.map_size = map_width * map_height
+
+        self.colonies_start_address = self.header_length
+        self.units_start_address = self.colonies_start_address + Colony.byte_length * colony_count
+        self.powers_start_address = self.units_start_address + Unit.byte_length * unit_count
+        self.villages_start_address = self.powers_start_address + Power.byte_length * Power.count
+        self.unknown_b_start_address = self.villages_start_address + Village.byte_length * village_count
+        self.maps_start_address = self.unknown_b_start_address + self.unknown_b_length
+        self.map_start_addresses = tuple(self.maps_start_address + view * self.map_size for view in range(self.map_views))
+        self.unknown_e_start_address = self.maps_start_address + self.map_views * self.map_size
+        self.unknown_f_start_address = self.unknown_e_start_address + self.unknown_e_length
+        self.trade_routes_start_address = self.unknown_f_start_address + self.unknown_f_length
+        self.end_address = self.trade_routes_start_address + TradeRoute.byte_length * TradeRoute.count
+
+        # name, start address, record length
+        self.sections = tuple(
+            [('Header', 0, self.header_length),
+             ('Colonies', self.colonies_start_address, Colony.byte_length),
+             ('Units', self.units_start_address, Unit.byte_length),
+             ('Powers', self.powers_start_address, Power.byte_length),
+             ('Villages', self.villages_start_address, Village.byte_length),
+             ('Unknown B', self.unknown_b_start_address, 1)] +
+            [(name, address, 1) for name, address in zip(self.map_names, self.map_start_addresses)] +
+            [('Unknown E', self.unknown_e_start_address, 1),
+             ('Unknown F', self.unknown_f_start_address, 1),
+             ('Trade Routes', self.trade_routes_start_address, TradeRoute.byte_length)]
+        )
+
+    @staticmethod
+    def read_counts(data):
+        """Reads the colony, unit and village counts and the map size from a header.
+        """
+        return (data[0x2E], data[0x2C], data[0x2A],
+                int.from_bytes(data[0x0C:0x0E], 'little'),
+                int.from_bytes(data[0x0E:0x10], 'little'))
+
+    @classmethod
+    def from_data(cls, data):
+        """Returns the layout of the save in data.
+
+        Args:
+            data (bytes-like): Contents of a COLONY 'sav' file, at least its header.
+        """
+        return cls.cached(*cls.read_counts(data))
+
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def cached(cls, colony_count, unit_count, village_count, map_width, map_height):
+        return cls(colony_count, unit_count, village_count, map_width, map_height)
+
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+import colonization
+from .pathing import Pathfinder
+from .trade import TradeRoute
+
+class RouteEvaluator():
+    """Estimates how many goods each trade route of a save moves per turn.
+
+    A route's stops are read as indices into the save's colonies. One carrier
+    is simulated over the route: at each stop it unloads the supplies the stop
+    lists as unloads, then fills its free holds with the stop's loads, up to
+    100 of a supply per hold and no more than the colony has in storage. The
+    carrier goes round twice and only the second round is counted, so goods
+    loaded at the last stop and unloaded at the first are included. The time
+    for a round is the Pathfinder cost of its legs divided by the carrier's
+    movement points.
+
+    Each distinct leg between two colonies is searched once with A* and
+    shared by every route that uses it, and the Pathfinder is cached on the
+    Map.
+    SaveFile.logistics keeps one RouteEvaluator per save, so its results are
+    only computed once.
+
+    Args:
+        save (SaveFile): The save to evaluate.
+        holds (dict): Cargo holds of the carrier, for 'land' and 'sea' routes.
+        moves (dict): Movement points per turn of the carrier.
+    """
+    # A wagon train and a caravel
+    holds = {'land': 2, 'sea': 2}
+    moves = {'land': 1, 'sea': 4}
+
+    # Goods carried in one hold
+    hold_size = 100
+
+    dtype = np.dtype([
+        ('route', 'u1'), ('name', 'U32'), ('sea', '?'), ('stops', 'u1'),
+        ('cost', 'f4'), ('turns', 'u2'), ('delivered', 'u2', 16),
+        ('cargo', 'u4'), ('throughput', 'f4'), ('valid', '?')
+    ])
+
+    def __init__(self, save, holds=None, moves=None):
+        self.save = save
+        self.holds = dict(RouteEvaluator.holds, **(holds or {}))
+        self.moves = dict(RouteEvaluator.moves, **(moves or {}))
+        self.legs = {}
+        self._routes = None
+
+    def leg_cost(self, domain, start, end):
+        """Movement points from colony start to colony end, searched once per (domain, start, end).
+        """
+        key = (domain, start, end)
+        if key not in self.legs:
+            positions = self.save.colony_table.positions
+            finder = Pathfinder.for_save(self.save, domain=domain)
+            self.legs[key] = finder.distance(tuple(positions[start].tolist()), tuple(positions[end].tolist()))
+        return self.legs[key]
+
+    def simulate(self, route):
+        """Goods of each supply delivered in one round of a route.
+
+        Returns:
+            numpy.ndarray: 16 amounts indexed by TradeRoute.supplies code.
+        """
+        storage = self.save.colony_table.records['storage']
+        holds = self.holds['sea' if route.sea else 'land']
+
+        cargo = {}
+        delivered = np.zeros(16, dtype=np.int64)
+        for lap in range(2):
+            for stop in route.destinations:
+                for supply in stop.unloads:
+                    if supply in cargo and lap == 1:
+                        delivered[TradeRoute.supplies[supply]] += cargo[supply]
+                    cargo.pop(supply, None)
+
+                for supply in stop.loads:
+                    if supply in cargo or len(cargo) >= holds:
+                        continue
+                    amount = min(RouteEvaluator.hold_size, int(storage[stop.location, TradeRoute.supplies[supply]]))
+                    if amount > 0:
+                        cargo[supply] = amount
+        return delivered
+
+    def evaluate(self, route):
+        """Evaluates one trade route, returns a row of RouteEvaluator.dtype.
+        """
+        row = np.zeros((), dtype=RouteEvaluator.dtype)
+        row['name'] = route.name
+        row['sea'] = route.sea
+        row['stops'] = len(route.destinations)
+
+        locations = [stop.location for stop in route.destinations]
+        if len(locations) < 2 or any(location >= self.save.header.colony_count for location in locations):
+            return row
+
+        domain = 'sea' if route.sea else 'land'
+        cost = sum(self.leg_cost(domain, start, end) for start, end in zip(locations, locations[1:] + locations[:1]))
+        row['cost'] = cost
+        if not math.isfinite(cost):
+            return row
+
+        turns = max(1, math.ceil(cost / self.moves[domain]))
+        delivered = self.simulate(route)
+        row['turns'] = turns
+        row['delivered'] = delivered
+        row['cargo'] = delivered.sum()
+        row['throughput'] = delivered.sum() / turns
+        row['valid'] = True
+        return row
+
+    @property
+    def routes(self):
+        """Every trade route of the save evaluated, one row of RouteEvaluator.dtype each.
+
+        Routes with fewer than two stops, stops that are not colonies, or a
+        leg that cannot be travelled are left with valid False.
+        """
+        if self._routes is None:
+            routes = np.zeros(len(self.save.trade_routes), dtype=RouteEvaluator.dtype)
+            for index, route in enumerate(self.save.trade_routes):
+                routes[index] = self.evaluate(route)
+            routes['route'] = np.arange(len(routes))
+            routes.flags.writeable = False
+            self._routes = routes
+        return self._routes
+
+def evaluate_routes(path):
+    """Evaluates the trade routes of the save in path.
+
+    A module level function so it can be used with batch.map_saves.
+
+    Returns:
+        numpy.ndarray: RouteEvaluator.routes, copied off the file buffer.
+    """
+    with colonization.SaveFile(path, lazy=True) as save:
+        return save.logistics.routes.copy()
@@ -1,11 +1,14 @@
-from posixpath import basename
-from colonization.buildings import Colony, Village
-from colonization.units import Unit
+from colonization.layout import Layout
+from colonization import render
 import os
-import sys
-import string
 
+import numpy as np
+
+# Map views in the order they are stored
 TERRAIN = 0
+MASK = 1
+VISIBLE = 2
+UNKNOWN_D = 3
 
 class Tile():
     byte_length = 1
@@ -55,12 +58,25 @@ class Tile():
         'Sea Lane Major River': 218
     }
 
+    # Bits of a terrain map byte, see Format.md
+    terrain_bits = {'Base': 0x07, 'Forest': 0x08, 'Special': 0x10,
+                    'Hills': 0x20, 'River': 0x40, 'Prominent': 0x80}
+
+    # Special types set both the Special and Forest bits over a base value
+    specials = {'Arctic': 0x18, 'Ocean': 0x19, 'Sea Lane': 0x1A}
+
+    # Bits of a mask map byte, see Format.md
+    mask_bits = {'Unit': 0x01, 'Colony': 0x02, 'Suppress Prime': 0x04,
+                 'Road': 0x08, 'Pacific': 0x20, 'Plowed': 0x40}
+
     def __init__(self):
         pass
 
 class Map():
     byte_length = 1
-    base_offset = 0xBBD
+
+    # Number of views stored back to back in a save
+    count = Layout.map_views
 
     __views = [0, 1, 2, 3]
     #views = range(0, 4) # TOOD: Replace with enums
@@ -80,94 +96,173 @@ class Map():
         if not self.data:
             raise ValueError("No data has been read from a file yet!")
 
-        self.colonies = self.data[0x2e]
-        self.units = self.data[0x2c]
-        self.villages = self.data[0x2a]
-        self.width = self.data[0x0C]
-        self.height = self.data[0x0E]
+        if self.layout is None:
+            self.layout = Layout.from_data(self.data)
+
+        self.colonies = self.layout.colony_count
+        self.units = self.layout.unit_count
+        self.villages = self.layout.village_count
+        self.width = self.layout.map_width
+        self.height = self.layout.map_height
+
+        # Arrays derived from the views, such as pathfinding cost grids, keyed by their builder
+        self.cache = {}
 
-        self.views = []
-        for offset in self.__views:
-            address = self.base_offset + self.colonies * Colony.byte_length + self.units * Unit.byte_length
-            address += self.villages * Village.byte_length + offset * self.width * self.height
-            subset = self.data[address:address + self.width * self.height]
-            self.views.append((subset, {}))
+        self.addresses = self.layout.map_start_addresses
 
     def __init__(self, path):
         if not os.path.isfile(path):
             raise FileNotFoundError(f"Failed to read {path}")
         
+        self.layout = None
         self.__reader(path)
         self.__parse()
 
+    @classmethod
+    def from_data(cls, data, path=None, layout=None):
+        """Builds a map over data that has already been read from a save.
+
+        Args:
+            data (bytes-like): Contents of a COLONY 'sav' file. array()
+                reads the views from it in place, without copying.
+            path (str): Optional path the data was read from.
+            layout (Layout): Layout of data if it has already been computed.
+        """
+        instance = cls.__new__(cls)
+        instance.file_path = path
+        instance.data = data
+        instance.layout = layout
+        instance.__parse()
+        return instance
+
     def get_views():
         return Map.__views
 
     def shape(self):
         return (self.width, self.height)
 
+    def array(self, view):
+        """Returns a view of the map as a (height, width) NumPy array of bytes.
+
+        The array is a read-only window onto the save data, indexed as
+        array[y, x] with the same (column, row) positions units and colonies use.
+
+        Args:
+            view (int): The view (0 to 3) to return.
+        """
+        if not view in self.__views:
+            raise ValueError(f"View {view} is not a supported value in {self.__views}")
+
+        data = np.frombuffer(self.data, dtype=np.uint8, count=self.width * self.height, offset=self.addresses[view])
+        return data.reshape(self.height, self.width)
+
+    def terrain_flag(self, name):
+        """Boolean (height, width) array of tiles with the named Tile.terrain_bits bit set.
+        """
+        return self.array(TERRAIN) & Tile.terrain_bits[name] != 0
+
+    def mask_flag(self, name):
+        """Boolean (height, width) array of tiles with the named Tile.mask_bits bit set.
+        """
+        return self.array(MASK) & Tile.mask_bits[name] != 0
+
+    def base(self):
+        """Base terrain type (0 to 7) of every tile.
+        """
+        return self.array(TERRAIN) & Tile.terrain_bits['Base']
+
+    def is_special(self, name=None):
+        """Tiles of a special type, or of the named one in Tile.specials.
+        """
+        special = Tile.terrain_bits['Special'] | Tile.terrain_bits['Forest']
+        if name is None:
+            return self.array(TERRAIN) & special == special
+        return self.array(TERRAIN) & (special | Tile.terrain_bits['Base']) == Tile.specials[name]
+
+    def is_forest(self):
+        return self.terrain_flag('Forest') & ~self.terrain_flag('Special')
+
+    def is_hills(self):
+        return self.terrain_flag('Hills') & ~self.terrain_flag('Prominent')
+
+    def is_mountains(self):
+        return self.terrain_flag('Hills') & self.terrain_flag('Prominent')
+
+    def has_river(self):
+        return self.terrain_flag('River')
+
+    def has_major_river(self):
+        return self.terrain_flag('River') & self.terrain_flag('Prominent')
+
+    def is_prominent(self):
+        return self.terrain_flag('Prominent')
+
+    def is_water(self):
+        return self.is_special('Ocean') | self.is_special('Sea Lane')
+
+    def has_unit(self):
+        return self.mask_flag('Unit')
+
+    def has_colony(self):
+        return self.mask_flag('Colony')
+
+    def suppress_prime(self):
+        return self.mask_flag('Suppress Prime')
+
+    def has_road(self):
+        return self.mask_flag('Road')
+
+    def is_pacific(self):
+        return self.mask_flag('Pacific')
+
+    def is_plowed(self):
+        return self.mask_flag('Plowed')
+
+    @staticmethod
+    def positions(selection):
+        """Converts a boolean (height, width) array to an (n, 2) array of (x, y) positions.
+
+        Example: map.positions(map.is_plowed() & map.has_road())
+        """
+        rows, columns = np.nonzero(selection)
+        return np.stack([columns, rows], axis=-1)
+
+    def glyphs(self, view):
+        """256 entry glyph table for a view, see render.palette().
+        """
+        return render.palette(view)[0]
+
+    def text(self, view, labels=True):
+        """Renders a view as ASCII art in one string, see render.text().
+        """
+        return render.text(self.array(view), self.glyphs(view), labels=labels)
+
+    def image(self, view, colours=None, scale=1, marks=None):
+        """Renders a view as an RGB image array, see render.image().
+
+        Args:
+            colours (numpy.ndarray): (256, 3) colour table, the view's render.palette() if None.
+            marks (numpy.ndarray): Boolean (height, width) array of tiles to
+                mark, e.g. PrimePattern.live(map).
+        """
+        colours = render.palette(view)[1] if colours is None else colours
+        return render.image(self.array(view), colours=colours, scale=scale, marks=marks)
+
     def display(self, view):
         """Display a particular view of the map in ASCII art.
 
+        Characters come from render.palette(), so a value is drawn the same
+        way in every save.
+
         Args:
             view (int): The view (0 to 3) to display.
         """
         if not view in self.__views:
             raise ValueError(f"View {view} is not a supported value in {self.__views}")
 
-        # Dynamic tables are built based on what is seen first on the map and 
-        # assigning it a character in chars.
-        chars = list(string.ascii_letters + '0123456789~!@#$%^&*()_`+=:;,<.>/?|[]{}')
-        
-        for subset, table in self.views:
-            for tile in subset:
-                if tile not in table:
-                    table[tile] = chars[len(table) % len(chars)] # wrap 
-
-        # subset contains the binary file data
-        # table contains the lookup from binary data to ASCII code
-        subset, table = self.views[view]
-
-        ##    # Converts identified terrain to -
-        ##    for key, val in col.Tile.items(): 
-        ##        if val in maps[i][1] and val != 26:
-        ##            maps[i][1][val] = '-'
-
-        if view == TERRAIN:
-            # Ocean, Ocean Minor River, and Ocean Major River to <space>
-            table[25] = ' '
-            table[89] = ' '
-            table[217] = ' '
-        else:
+        if view != TERRAIN:
             print(f"Warning: View type {view} is not fully implemented!")
 
-        ### Example of setting a static table for map 3
-        ##if 3 in display:
-        ##    i = display.index(3)
-        ##    table = {0: 'a', 7: 'b', 10: 'c', 11: 'd', 12: 'e', 15: 'f',
-        ##             14: 'g', 13: 'h', 16: 'i', 2: 'j', 4: 'k', 9: 'l',
-        ##             5: 'm', 3: 'n', 6: 'o', 8: 'p', 23: 'q', 24: 'r',
-        ##             27: 's', 30: 't', 31: 'u', 28: 'v', 25: 'w', 1: 'x',
-        ##             20: 'y', 22: 'z', 64: 'A', 192: 'B', 208: 'C', 128: 'D',
-        ##             80: 'E', 144: 'F', 159: 'G', 158: 'H', 221: 'I',
-        ##             220: 'J', 222: 'K', 223: 'L', 156: 'M', 26: 'N',
-        ##             89: 'O', 90: 'P', 91: 'Q', 92: 'R', 88: 'S', 72: 'T',
-        ##             73: 'U', 154: 'V', 153: 'W', 155: 'X', 157: 'Y',
-        ##             188: 'Z', 176: '0', 29: '1', 191: '2', 189: '3', 48: '4',
-        ##             59: '5', 56: '6', 21: '7', 58: '8', 60: '9', 57: '~',
-        ##             61: '!', 63: '@', 62: '#', 42: '$', 43: '%', 47: '^',
-        ##             32: '&'}
-        ##    maps[i] = ((maps[i][0], table)) 
-
-        # Render
         print()
-        print('0    0    1    1    2    2    3    3    4    4    5    5')
-        print('0    5    0    5    0    5    0    5    0    5    0    5')
-        for row, start in enumerate(range(0, self.width * self.height, self.width)):
-            line = (''.join([table[x] for x in subset[start:start + self.width]]))
-            if row % 5 == 0:
-                line += f' {row}'
-            print(line)
-        print('0    0    1    1    2    2    3    3    4    4    5    5')
-        print('0    5    0    5    0    5    0    5    0    5    0    5')
+        print(self.text(view), end='')
         print()
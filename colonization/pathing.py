@@ -0,0 +1,238 @@
+import heapq
+import weakref
+
+import numpy as np
+
+from .map import Tile
+
+class Pathfinder():
+    """Shortest paths and distance fields over the terrain of a Map.
+
+    The cost of entering every tile is computed once into a NumPy grid from the
+    terrain and mask views and the Pathfinder is cached on the Map, so repeated
+    queries for the same save only run the search. Costs are in movement
+    points. Moving between two tiles that both have a road, or both have a
+    river, costs costs['road'] or costs['river'] instead of the cost of the
+    tile entered. The map border is never entered.
+
+    Use Pathfinder.for_save() or Pathfinder.for_map() rather than building
+    one directly.
+
+    Args:
+        map (Map): The map to search.
+        domain (str): 'land' for land units, which cannot enter water, or 'sea'
+            for ships, which move on ocean and sea lanes and may enter ports.
+        pacific (bool): Whether ships may enter Pacific Ocean tiles.
+        ports: (x, y) positions of the colonies ships may enter, an (n, 2)
+            array of them. The mask map's Colony bit is not used because it
+            is also set for villages.
+    """
+    domains = ['land', 'sea']
+
+    # Movement points to enter a tile, the game's rules approximated per terrain
+    costs = {'open': 1.0, 'forest': 2.0, 'wetland': 2.0, 'arctic': 2.0,
+             'hills': 2.0, 'mountains': 3.0, 'water': 1.0,
+             'road': 1 / 3, 'river': 1 / 3}
+
+    # Base terrain values that count as wetland
+    wetlands = [Tile.terrain['Marsh'], Tile.terrain['Swamp']]
+
+    # Neighbour offsets in the order of Colony.fields: N, E, S, W, NW, NE, SE, SW
+    steps = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
+
+    def __init__(self, map, domain='land', pacific=True, ports=()):
+        if domain not in Pathfinder.domains:
+            raise ValueError(f"domain must be one of {Pathfinder.domains}")
+
+        # The map caches this Pathfinder, a weak reference avoids a cycle that
+        # would keep the save's buffer exported after SaveFile.close()
+        self.map = weakref.proxy(map)
+        self.domain = domain
+        self.pacific = pacific
+        self.width = map.width
+        self.height = map.height
+        self.ports = np.asarray(ports, dtype=np.int64).reshape(-1, 2)
+
+        self.grid = self.cost_grid()
+
+        if domain == 'land':
+            roads, rivers = map.has_road(), map.has_river()
+        else:
+            roads = rivers = np.zeros((self.height, self.width), dtype=bool)
+        self.moves = self.step_grids(roads, rivers)
+
+        # Flat copies for the search loop
+        self.enter = self.grid.ravel().tolist()
+        self.roads = roads.ravel().tolist()
+        self.rivers = rivers.ravel().tolist()
+
+    @classmethod
+    def for_map(cls, map, domain='land', pacific=True, ports=()):
+        """Returns the Pathfinder for map, building it on first use.
+        """
+        ports = np.asarray(ports, dtype=np.int64).reshape(-1, 2)
+        key = ('pathfinder', domain, pacific, ports.tobytes())
+        if key not in map.cache:
+            map.cache[key] = cls(map, domain=domain, pacific=pacific, ports=ports)
+        return map.cache[key]
+
+    @classmethod
+    def for_save(cls, save, domain='land', pacific=True):
+        """Returns the Pathfinder for the map of a SaveFile, with its colonies as ports.
+        """
+        ports = save.colony_table.positions if domain == 'sea' else ()
+        return cls.for_map(save.maps, domain=domain, pacific=pacific, ports=ports)
+
+    def cost_grid(self):
+        """Cost of entering each tile as a (height, width) float array, inf where impassable.
+        """
+        costs = Pathfinder.costs
+        water = self.map.is_water()
+
+        if self.domain == 'land':
+            grid = np.full((self.height, self.width), costs['open'])
+            grid[np.isin(self.map.base(), Pathfinder.wetlands)] = costs['wetland']
+            grid[self.map.is_forest()] = costs['forest']
+            grid[self.map.is_special('Arctic')] = costs['arctic']
+            grid[self.map.is_hills()] = costs['hills']
+            grid[self.map.is_mountains()] = costs['mountains']
+            grid[water] = np.inf
+        else:
+            grid = np.where(water, costs['water'], np.inf)
+            if not self.pacific:
+                grid[water & self.map.is_pacific()] = np.inf
+
+            ports = self.ports[(self.ports[:, 0] < self.width) & (self.ports[:, 1] < self.height)]
+            grid[ports[:, 1], ports[:, 0]] = costs['water']
+
+        grid[[0, -1], :] = np.inf
+        grid[:, [0, -1]] = np.inf
+        return grid
+
+    def step_grids(self, roads, rivers):
+        """Cost of every move in each direction of steps, for distance_field().
+
+        Returns:
+            list: (source, target, cost) per direction. source and target are
+            the slices of the grid a move leaves and enters, and cost is the
+            cost of each of those moves as an array of their shape.
+        """
+        moves = []
+        for dx, dy in Pathfinder.steps:
+            source = (slice(max(0, -dy), self.height - max(0, dy)), slice(max(0, -dx), self.width - max(0, dx)))
+            target = (slice(max(0, dy), self.height - max(0, -dy)), slice(max(0, dx), self.width - max(0, -dx)))
+            enter = self.grid[target]
+            cost = np.where(roads[source] & roads[target], np.minimum(Pathfinder.costs['road'], enter),
+                            np.where(rivers[source] & rivers[target], np.minimum(Pathfinder.costs['river'], enter), enter))
+            moves.append((source, target, cost))
+        return moves
+
+    def __neighbours(self, cell):
+        x, y = cell % self.width, cell // self.width
+        for dx, dy in Pathfinder.steps:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                yield ny * self.width + nx
+
+    def __step(self, cell, neighbour):
+        if self.roads[cell] and self.roads[neighbour]:
+            return min(Pathfinder.costs['road'], self.enter[neighbour])
+        if self.rivers[cell] and self.rivers[neighbour]:
+            return min(Pathfinder.costs['river'], self.enter[neighbour])
+        return self.enter[neighbour]
+
+    def __cell(self, position):
+        x, y = position
+        if x not in range(0, self.width) or y not in range(0, self.height):
+            raise ValueError(f"position {position} is off the map")
+        return y * self.width + x
+
+    def distance_field(self, sources, limit=None):
+        """Cost of reaching every tile from the nearest of sources.
+
+        Rather than a Dijkstra search tile by tile, the whole grid is relaxed
+        with array operations: each pass moves every tile's cost one step in
+        each of the eight directions, until a pass changes nothing. A pass
+        costs the same whatever the number of sources, and the costs are
+        those a Dijkstra search, or path(), finds.
+
+        Args:
+            sources: (x, y) positions, an (n, 2) array of them, or a boolean
+                (height, width) array such as Map.is_special('Sea Lane').
+            limit (float): Tiles that cost more than this to reach are left at inf.
+
+        Returns:
+            numpy.ndarray: (height, width) float array, inf where unreachable.
+        """
+        sources = np.asarray(sources)
+        if sources.dtype == bool:
+            cells = np.flatnonzero(sources)
+        else:
+            cells = [self.__cell(position) for position in sources.reshape(-1, 2).tolist()]
+
+        distance = np.full(self.width * self.height, np.inf)
+        distance[cells] = 0.0
+        distance = distance.reshape(self.height, self.width)
+
+        changed = True
+        while changed:
+            changed = False
+            for source, target, cost in self.moves:
+                total = distance[source] + cost
+                # A view, so the cells it updates are visible to the next direction
+                reached = distance[target]
+                better = total < reached
+                if limit is not None:
+                    better &= total <= limit
+                if better.any():
+                    reached[better] = total[better]
+                    changed = True
+
+        return distance
+
+    def path(self, start, goal):
+        """Cheapest path from start to goal with A*.
+
+        Args:
+            start, goal (tuple): (x, y) positions. The start tile may be
+                impassable itself, e.g. a ship in a colony on a land search.
+
+        Returns:
+            tuple: (cost, positions) with positions the (x, y) tiles from start
+            to goal, or (inf, []) when goal cannot be reached.
+        """
+        start, goal = self.__cell(start), self.__cell(goal)
+        goal_x, goal_y = goal % self.width, goal // self.width
+
+        # Any step costs at least the cheapest move, so this never overestimates
+        cheapest = min(Pathfinder.costs.values()) if self.domain == 'land' else Pathfinder.costs['water']
+        def estimate(cell):
+            return cheapest * max(abs(cell % self.width - goal_x), abs(cell // self.width - goal_y))
+
+        best = {start: 0.0}
+        previous = {}
+        queue = [(estimate(start), 0.0, start)]
+        while queue:
+            _, cost, cell = heapq.heappop(queue)
+            if cell == goal:
+                route = [cell]
+                while cell in previous:
+                    cell = previous[cell]
+                    route.append(cell)
+                return cost, [(cell % self.width, cell // self.width) for cell in reversed(route)]
+            if cost > best[cell]:
+                continue
+
+            for neighbour in self.__neighbours(cell):
+                total = cost + self.__step(cell, neighbour)
+                if total < best.get(neighbour, float('inf')):
+                    best[neighbour] = total
+                    previous[neighbour] = cell
+                    heapq.heappush(queue, (total + estimate(neighbour), total, neighbour))
+
+        return float('inf'), []
+
+    def distance(self, start, goal):
+        """Cost of the cheapest path from start to goal, inf if unreachable.
+        """
+        return self.path(start, goal)[0]
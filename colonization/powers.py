@@ -1,3 +1,7 @@
+import numbers
+
+from .schema import Field, Schema
+
 class Power():
     byte_length = 316
     gold_min = 0
@@ -6,6 +10,9 @@ class Power():
     tax_min = 0
     tax_max = 99
 
+    # Number of European powers stored in a save
+    count = 4
+
     # See Format.md for more details on this structure.
     
     # Features are tuples. Each tuple contains the offset and length from the base address of the power.
@@ -16,14 +23,18 @@ class Power():
         'Gold': (0x2A, 3)
     }
 
+    schema = Schema(byte_length, [Field('tax', *features['Taxes']), Field('gold', *features['Gold'])])
+    limits = {'tax': (tax_min, tax_max), 'gold': (gold_min, gold_max)}
+
     # Changing the order of this list or removing 'Unkown' will break this code
     # and result in unpredictable game behavior
     order = ['English', 'French', 'Spanish', 'Dutch', 'Unknown']
 
     def __init__(self, data, order=4):
         self._data = data
-        self._taxes = int.from_bytes(data[self.features['Taxes'][0]:self.features['Taxes'][0]+self.features['Taxes'][1]], byteorder='little')
-        self._gold = int.from_bytes(data[self.features['Gold'][0]:self.features['Gold'][0]+self.features['Gold'][1]], byteorder='little')
+        values = Power.schema.unpack(data)
+        self._taxes = values['tax']
+        self._gold = values['gold']
         self.name = Power.order[order]
 
     def __str__(self):
@@ -34,38 +45,25 @@ class Power():
         )
 
     def serialize(self):
-        # Serialize the object back into self.data and return it to the caller as a bytearra
-        #data[self.features['Gold'][0]]
-        modified_features = self.features
+        """Returns the power's bytes with the current tax rate and gold applied.
+        """
+        return bytearray(Power.schema.pack({'tax': self._taxes, 'gold': self._gold}, self._data))
 
-        gold = self._gold.to_bytes(self.features['Gold'][1], 'little')
-        taxes = self._taxes.to_bytes(self.features['Taxes'][1], 'little')
-        data = self.data
+    @staticmethod
+    def check(name, value):
+        """Raises ValueError if value is not a valid tax rate or gold amount.
 
-#        for x in self.features:
-#            for y in range(0, self.features[x][1]):
-#                index = self.features[x][0] + y
-#                
-#                print(f"")
-#                data[index] = x
-#                print(f"")
-#            pass
+        Args:
+            name (str): 'tax' or 'gold'.
+            value (int): The value to check, any integer type but bool.
+        """
+        if name not in Power.limits:
+            raise ValueError(f"Unknown power field: {name}, must be one of {list(Power.limits)}")
 
-        for i in range(0, self.features['Taxes'][1]):
-            index = self.features['Taxes'][0] + i
-            data[index] = taxes[i]
+        low, high = Power.limits[name]
+        if not isinstance(value, numbers.Integral) or isinstance(value, bool) or value < low or value > high:
+            raise ValueError(f"Invalid {name}: {value}, must be between {low} and {high}")
 
-        for i in range(0, self.features['Gold'][1]):
-            index = self.features['Gold'][0] + i
-
-            print(f"{index}: '{data[index]:#02x}' '{gold[i]:#02x}'")
-            data[index] = gold[i]
-            print(f"{index}: '{data[index]:#02x}' '{gold[i]:#02x}'")
-
-        assert(self._gold == int.from_bytes(data[self.features['Gold'][0]:self.features['Gold'][0]+self.features['Gold'][1]], byteorder='little'))
-
-        return data
-    
     @property
     def data(self):
         return bytearray(self._data)
@@ -76,10 +74,8 @@ class Power():
     
     @tax.setter
     def tax(self, value):
-        if value < Power.tax_min or value > Power.tax_max:
-            raise ValueError("Invalid tax rate: {value}, must be > {self.tax_max} and < {self.tax_min}")
-        else:
-            self._taxes = value
+        Power.check('tax', value)
+        self._taxes = int(value)
 
     @property
     def gold(self):
@@ -87,7 +83,5 @@ class Power():
     
     @gold.setter
     def gold(self, value):
-        if value < Power.gold_min or value > Power.gold_max:
-            raise ValueError(f"Invalid gold amount: {value}, must be > {self.gold_max} and < {self.gold_min}")
-        else:
-            self._gold = value
+        Power.check('gold', value)
+        self._gold = int(value)
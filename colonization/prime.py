@@ -0,0 +1,138 @@
+import functools
+
+import numpy as np
+
+from .map import Map
+
+@functools.lru_cache(maxsize=64)
+def pattern(width, height, period, residues, offset):
+    """Tiles of a width x height map that fall on the repeating prime pattern.
+
+    The pattern runs left to right across each row and wraps onto the next,
+    so a tile is on it when its row-major index plus offset lands on one of
+    residues modulo period. Cached, and read-only, since every save with the
+    same map size and pattern shares it.
+
+    Returns:
+        numpy.ndarray: (height, width) boolean array.
+    """
+    index = np.arange(width * height).reshape(height, width) + offset
+    grid = np.isin(index % period, residues)
+    grid.flags.writeable = False
+    return grid
+
+class PrimePattern():
+    """Predicts which tiles of a map hold a prime resource.
+
+    Format.md describes the model: primes follow one fixed pattern that runs
+    across the rows and wraps, forested tiles use the same pattern shifted
+    forest_shift columns to the right, and the mask map's Suppress Prime bit
+    removes individual primes (far off-shore fish, depleted silver). Only the
+    forest shift of 4 columns is given there. The period and residues can be
+    read off the pattern Format.md links to, or fit() finds them from a map's
+    suppressed ocean tiles. fit_offset() recovers the offset of a map for a
+    known period and residues.
+
+    Args:
+        period (int): Length of the repeating pattern in tiles.
+        residues (tuple): Positions within a period that hold a prime.
+        forest_shift (int): Columns the forested pattern is shifted right by.
+        offset (int): Start of the pattern, may differ between maps.
+    """
+    forest_shift = 4
+
+    # Share of the tiles a fitted pattern may hold primes on, primes are sparse
+    max_density = 0.25
+
+    def __init__(self, period, residues, forest_shift=None, offset=0):
+        self.period = period
+        self.residues = tuple(residues)
+        self.forest_shift = forest_shift if forest_shift is not None else PrimePattern.forest_shift
+        self.offset = offset
+
+    @classmethod
+    def fit(cls, map, max_period=64):
+        """Finds the period and residues of the pattern from a map's suppressed ocean tiles.
+
+        The game suppresses fish far from land at the start, and the bit is
+        only set where a prime would be, so every suppressed ocean tile lies
+        on the open pattern. For each period up to max_period the residues of
+        those tiles are collected, and the period whose residues cover the
+        smallest share of the map is taken, the shortest one when its
+        multiples cover the same share. A period needs at least two
+        suppressed tiles per residue, so a few tiles cannot fit a long period
+        by chance.
+
+        Returns:
+            PrimePattern: The pattern with offset 0, or None when no period
+            puts primes on at most max_density of the tiles.
+        """
+        index = np.flatnonzero(map.suppress_prime() & map.is_water())
+        if not len(index):
+            return None
+
+        best = None
+        for period in range(2, max_period + 1):
+            residues = np.unique(index % period)
+            if 2 * len(residues) > len(index):
+                continue
+            density = len(residues) / period
+            if best is None or density < best[0] - 1e-9:
+                best = (density, period, residues.tolist())
+
+        if best is None or best[0] > cls.max_density:
+            return None
+        return cls(best[1], best[2])
+
+    @classmethod
+    def for_map(cls, map):
+        """Returns the PrimePattern fitted to map, or None, fitting it on first use.
+        """
+        key = ('prime',)
+        if key not in map.cache:
+            map.cache[key] = cls.fit(map)
+        return map.cache[key]
+
+    def grids(self, width, height, offset=None):
+        """Returns the (open, forest) pattern grids for a map size.
+        """
+        offset = self.offset if offset is None else offset
+        return (pattern(width, height, self.period, self.residues, offset % self.period),
+                pattern(width, height, self.period, self.residues, (offset - self.forest_shift) % self.period))
+
+    def candidates(self, map, offset=None):
+        """Tiles whose terrain puts them on the pattern, before suppression.
+        """
+        open_grid, forest_grid = self.grids(map.width, map.height, offset)
+        primes = np.where(map.is_forest(), forest_grid, open_grid)
+
+        # Arctic tiles hold no resource and the border is never shown
+        primes &= ~map.is_special('Arctic')
+        primes[[0, -1], :] = False
+        primes[:, [0, -1]] = False
+        return primes
+
+    def live(self, map):
+        """(height, width) boolean array of tiles with a prime resource.
+        """
+        return self.candidates(map) & ~map.suppress_prime()
+
+    def positions(self, map):
+        """(n, 2) array of the (x, y) positions of every live prime resource.
+        """
+        return Map.positions(self.live(map))
+
+    def fit_offset(self, map):
+        """Finds the offset that best explains the map's suppressed ocean tiles.
+
+        The game suppresses fish far from land at the start, and the bit is
+        only set where a prime would be, so the offset whose pattern covers the
+        most suppressed ocean tiles is the likely one.
+
+        Returns:
+            int: The offset, also stored on this PrimePattern.
+        """
+        suppressed = map.suppress_prime() & map.is_water()
+        scores = [int((self.candidates(map, offset) & suppressed).sum()) for offset in range(self.period)]
+        self.offset = int(np.argmax(scores))
+        return self.offset
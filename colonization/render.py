@@ -0,0 +1,220 @@
+import struct
+import string
+import functools
+import zlib
+
+import numpy as np
+
+import colonization
+
+# Glyphs handed out to map values, wrapping when a view has more values
+chars = string.ascii_letters + '0123456789~!@#$%^&*()_`+=:;,<.>/?|[]{}'
+
+# Column ruler printed above and below a text frame
+ruler = ('0    0    1    1    2    2    3    3    4    4    5    5\n'
+         '0    5    0    5    0    5    0    5    0    5    0    5\n')
+
+# Glyph of each base terrain of Tile.terrain: open terrain in lower case,
+# forests in upper case and the special types as symbols
+terrain_glyphs = {'Tundra': 't', 'Desert': 'd', 'Plains': 'p', 'Prairie': 'r',
+                  'Grassland': 'g', 'Savannah': 's', 'Marsh': 'm', 'Swamp': 'w',
+                  'Boreal Forest': 'B', 'Scrub Forest': 'S', 'Mixed Forest': 'M',
+                  'Broadleaf Forest': 'L', 'Conifer Forest': 'C', 'Tropical Forest': 'T',
+                  'Wetland Forest': 'W', 'Rain Forest': 'R',
+                  'Arctic': '#', 'Ocean': ' ', 'Sea Lane': '~'}
+
+# Hills and mountains replace the glyph of the land under them
+hills_glyph = 'n'
+mountains_glyph = '^'
+
+terrain_colours = {'Tundra': (150, 160, 140), 'Desert': (215, 190, 120), 'Plains': (180, 190, 90),
+                   'Prairie': (200, 200, 110), 'Grassland': (120, 185, 80), 'Savannah': (165, 175, 70),
+                   'Marsh': (110, 140, 100), 'Swamp': (90, 115, 85),
+                   'Boreal Forest': (60, 100, 80), 'Scrub Forest': (140, 130, 70), 'Mixed Forest': (60, 120, 60),
+                   'Broadleaf Forest': (70, 130, 50), 'Conifer Forest': (40, 95, 55), 'Tropical Forest': (40, 125, 45),
+                   'Wetland Forest': (55, 90, 60), 'Rain Forest': (25, 105, 40),
+                   'Arctic': (235, 240, 245), 'Ocean': (35, 75, 160), 'Sea Lane': (25, 50, 125)}
+
+river_colour = (60, 120, 230)
+
+# Colour of the tiles marked by image(), such as prime resources
+mark_colour = (255, 215, 0)
+
+@functools.lru_cache(maxsize=1)
+def terrain_palette():
+    """Glyph and colour of every terrain byte, derived from Tile.terrain and Tile.terrain_bits.
+
+    The base name comes from the low five bits (Base, Forest and Special),
+    hills and mountains change the glyph and darken the colour, and minor and
+    major rivers tint the colour blue. A value means the same glyph and colour
+    in every save, so renders can be compared and cached. Bytes whose low
+    bits name no terrain are '?' and magenta. Built once and read-only.
+
+    Returns:
+        tuple: (glyphs, colours), 256 uint8 ASCII codes and a (256, 3) uint8 array.
+    """
+    bits = colonization.Tile.terrain_bits
+    names = {code: name for name, code in colonization.Tile.terrain.items()}
+    base = bits['Special'] | bits['Forest'] | bits['Base']
+
+    glyphs = np.full(256, ord('?'), dtype=np.uint8)
+    colours = np.tile(np.array([255, 0, 255], dtype=np.uint8), (256, 1))
+    for code in range(256):
+        name = names.get(code & base)
+        if name is None:
+            continue
+
+        glyph = terrain_glyphs[name]
+        colour = np.array(terrain_colours[name], dtype=float)
+        if code & bits['Hills']:
+            mountains = code & bits['Prominent']
+            if name != 'Arctic':
+                glyph = mountains_glyph if mountains else hills_glyph
+            colour *= 0.65 if mountains else 0.8
+        elif code & bits['River']:
+            tint = 0.6 if code & bits['Prominent'] else 0.35
+            colour = colour * (1 - tint) + np.array(river_colour) * tint
+
+        glyphs[code] = ord(glyph)
+        colours[code] = np.round(colour)
+
+    glyphs.flags.writeable = False
+    colours.flags.writeable = False
+    return glyphs, colours
+
+@functools.lru_cache(maxsize=1)
+def value_glyphs():
+    """Glyph table giving byte value n the character chars[n % len(chars)].
+    """
+    codes = np.frombuffer(chars.encode('ascii'), dtype=np.uint8)
+    glyphs = codes[np.arange(256) % len(codes)]
+    glyphs.flags.writeable = False
+    return glyphs
+
+def palette(view):
+    """Glyph and colour tables for a map view, the same for every save.
+
+    The terrain view uses terrain_palette(); the other views, which are not
+    fully decoded, give each byte value its own glyph and colour.
+
+    Returns:
+        tuple: (glyphs, colours), see terrain_palette().
+    """
+    if view == colonization.map.TERRAIN:
+        return terrain_palette()
+    return value_glyphs(), colour_table()
+
+@functools.lru_cache(maxsize=1)
+def colour_table():
+    """256 entry RGB table spreading byte values over evenly spaced hues.
+
+    Neighbouring values get well separated colours, so small bit differences
+    stand out. Computed once and read-only.
+
+    Returns:
+        numpy.ndarray: (256, 3) uint8 array.
+    """
+    # Golden ratio steps around the hue circle, brightness by the top bit
+    hue = (np.arange(256) * 0.618033988749895) % 1.0
+    value = np.where(np.arange(256) & 0x80, 0.65, 0.95)
+    saturation = 0.7
+
+    sector = np.floor(hue * 6).astype(int) % 6
+    fraction = hue * 6 - np.floor(hue * 6)
+    p = value * (1 - saturation)
+    q = value * (1 - saturation * fraction)
+    t = value * (1 - saturation * (1 - fraction))
+    channels = np.choose(sector[np.newaxis, :], [
+        [value, t, p], [q, value, p], [p, value, t],
+        [p, q, value], [t, p, value], [value, p, q]])
+
+    table = np.round(channels.T * 255).astype(np.uint8)
+    table.flags.writeable = False
+    return table
+
+def text(array, glyphs, labels=True):
+    """Renders a map view as one block of text.
+
+    Args:
+        array (numpy.ndarray): (height, width) uint8 view of a map.
+        glyphs (numpy.ndarray): 256 ASCII codes, see palette().
+        labels (bool): Add the column ruler and every fifth row number.
+
+    Returns:
+        str: The frame, one line per row.
+    """
+    frame = np.take(glyphs, array)
+    if not labels:
+        newlines = np.full((frame.shape[0], 1), ord('\n'), dtype=np.uint8)
+        return np.hstack([frame, newlines]).tobytes().decode('ascii')
+
+    lines = [row.tobytes().decode('ascii') for row in frame]
+    for row in range(0, len(lines), 5):
+        lines[row] += f' {row}'
+    return ruler + '\n'.join(lines) + '\n' + ruler
+
+def image(array, colours=None, scale=1, marks=None):
+    """Renders a map view as an RGB image.
+
+    Args:
+        array (numpy.ndarray): (height, width) uint8 view of a map.
+        colours (numpy.ndarray): (256, 3) uint8 colour of each value, colour_table() if None.
+        scale (int): Pixels per tile along each side.
+        marks (numpy.ndarray): (height, width) boolean array of tiles to draw
+            a mark_colour square in the middle of, the whole tile when scale
+            is below 3.
+
+    Returns:
+        numpy.ndarray: (height * scale, width * scale, 3) uint8 array.
+    """
+    pixels = np.take(colour_table() if colours is None else colours, array, axis=0)
+    if scale > 1:
+        pixels = pixels.repeat(scale, axis=0).repeat(scale, axis=1)
+
+    if marks is not None:
+        # A one pixel border of each marked tile keeps its terrain colour when there is room
+        inner = np.ones(scale, dtype=bool)
+        if scale >= 3:
+            inner[[0, -1]] = False
+        covered = np.asarray(marks).repeat(scale, axis=0).repeat(scale, axis=1)
+        covered &= np.tile(inner, array.shape[0])[:, np.newaxis] & np.tile(inner, array.shape[1])[np.newaxis, :]
+        pixels[covered] = mark_colour
+    return pixels
+
+def write_ppm(path, pixels):
+    """Writes an RGB image as a binary PPM (P6) file.
+    """
+    height, width, _ = pixels.shape
+    with open(path, 'wb') as f:
+        f.write(f'P6\n{width} {height}\n255\n'.encode('ascii'))
+        f.write(np.ascontiguousarray(pixels, dtype=np.uint8).tobytes())
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+def png_bytes(pixels):
+    """Encodes an RGB image as a PNG file.
+
+    Returns:
+        bytes: The file contents.
+    """
+    height, width, _ = pixels.shape
+
+    # Every scanline starts with filter type 0 (none)
+    scanlines = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    scanlines[:, 1:] = pixels.reshape(height, width * 3)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' +
+            _chunk(b'IHDR', header) +
+            _chunk(b'IDAT', zlib.compress(scanlines.tobytes(), 6)) +
+            _chunk(b'IEND', b''))
+
+def write_png(path, pixels):
+    """Writes an RGB image as a PNG file.
+    """
+    with open(path, 'wb') as f:
+        f.write(png_bytes(pixels))
+
+# Image writers by file extension
+writers = {'png': write_png, 'ppm': write_ppm}
@@ -0,0 +1,200 @@
+import struct
+
+from . import codec
+
+class Field():
+    """One value stored in a fixed length record.
+
+    Args:
+        name (str): Name of the value.
+        offset (int): Offset of its first byte in the record.
+        size (int): Number of bytes, read as a little endian unsigned integer.
+        shift (int): Bits to shift right before masking.
+        bits (int): Width in bits. Fields sharing bytes, like the two nibbles of
+            one byte, each give their own shift and bits.
+        count (int): Number of elements when the field is an array. Elements are
+            bits wide and packed from the low end when bits is given, otherwise
+            each takes size // count bytes.
+        length (str): Name of another field holding how many array elements are in use.
+        enum (dict): Names and the codes that encode them, see codec.lookup_table.
+        kind (str): 'int', 'str' for null terminated ASCII or 'bytes'.
+    """
+    def __init__(self, name, offset, size=1, shift=0, bits=None, count=1, length=None, enum=None, kind='int'):
+        self.name = name
+        self.offset = offset
+        self.size = size
+        self.shift = shift
+        self.bits = bits
+        self.count = count
+        self.length = length
+        self.enum = enum
+        self.kind = kind
+        self.names = codec.lookup_table(enum) if enum and kind == 'int' else None
+
+        element_bits = bits if bits is not None else 8 * size // count
+        self.mask = (1 << element_bits) - 1
+
+    def decode_element(self, code):
+        return codec.decode(self.names, code) if self.names else code
+
+    def encode_element(self, value):
+        code = self.enum[value] if self.names else value
+        if code < 0 or code > self.mask:
+            raise ValueError(f"{self.name} value {value} does not fit in {self.mask.bit_length()} bits")
+        return code
+
+class Schema():
+    """Compiles a list of Fields into a single struct.Struct for a record type.
+
+    Every byte range used by a field becomes one item of the struct and the
+    bytes no field covers are carried as opaque strings, so unpack() is one
+    struct call plus a shift and mask per field, and pack() reproduces any
+    byte it was not asked to change.
+
+    Args:
+        byte_length (int): Length of one record.
+        fields (list): The Fields of the record.
+    """
+    def __init__(self, byte_length, fields):
+        self.byte_length = byte_length
+        self.fields = fields
+        self.by_name = {field.name: field for field in fields}
+
+        # Each distinct (offset, size) is one word; fields may share a word
+        # but words may not partially overlap
+        words = sorted({(field.offset, field.size) for field in fields})
+        for (offset, size), (next_offset, _) in zip(words, words[1:]):
+            if offset + size > next_offset:
+                raise ValueError(f"field bytes at {offset:#x} overlap field bytes at {next_offset:#x}")
+        if words and words[-1][0] + words[-1][1] > byte_length:
+            raise ValueError(f"fields extend past the end of a {byte_length} byte record")
+
+        formats = ['<']
+        self.items = {}
+        cursor = 0
+        item = 0
+        for offset, size in words:
+            if offset > cursor:
+                formats.append(f'{offset - cursor}s')
+                item += 1
+
+            users = [field for field in fields if (field.offset, field.size) == (offset, size)]
+            if any(field.kind in ('str', 'bytes') for field in users):
+                formats.append(f'{size}s')
+                self.items[offset] = (item, 1, 'bytes')
+                item += 1
+            elif len(users) == 1 and users[0].count > 1 and users[0].bits is None and size // users[0].count in (1, 2, 4):
+                # Byte or word arrays unpack straight into one struct item per element
+                element = {1: 'B', 2: 'H', 4: 'I'}[size // users[0].count]
+                formats.append(f'{users[0].count}{element}')
+                self.items[offset] = (item, users[0].count, 'array')
+                item += users[0].count
+            elif size in (1, 2, 4):
+                formats.append({1: 'B', 2: 'H', 4: 'I'}[size])
+                self.items[offset] = (item, 1, 'int')
+                item += 1
+            else:
+                # Odd widths such as 3 byte integers are read as strings
+                formats.append(f'{size}s')
+                self.items[offset] = (item, 1, 'long')
+                item += 1
+            cursor = offset + size
+
+        if cursor < byte_length:
+            formats.append(f'{byte_length - cursor}s')
+
+        self.struct = struct.Struct(''.join(formats))
+
+    def __word(self, items, field):
+        item, count, kind = self.items[field.offset]
+        if kind == 'array':
+            return items[item:item + count]
+        if kind == 'long':
+            return int.from_bytes(items[item], 'little')
+        return items[item]
+
+    def __set_word(self, items, field, word):
+        item, count, kind = self.items[field.offset]
+        if kind == 'array':
+            items[item:item + count] = word
+        elif kind == 'long':
+            items[item] = word.to_bytes(field.size, 'little')
+        else:
+            items[item] = word
+
+    def __decode(self, field, word, values):
+        if field.kind == 'str':
+            return word.split(b'\0')[0].decode('ascii')
+        if field.kind == 'bytes':
+            return word
+
+        if field.count == 1:
+            return field.decode_element(word >> field.shift & field.mask)
+
+        count = field.count if field.length is None else min(values[field.length], field.count)
+        if field.bits is None:
+            return [field.decode_element(code) for code in word[:count]]
+        return [field.decode_element(word >> (field.shift + index * field.bits) & field.mask) for index in range(count)]
+
+    def __encode(self, field, word, value):
+        if field.kind == 'str':
+            encoded = value.encode('ascii')
+            if len(encoded) >= field.size:
+                raise ValueError(f"{field.name} must be shorter than {field.size} characters")
+            return encoded + bytes(field.size - len(encoded))
+        if field.kind == 'bytes':
+            if len(value) != field.size:
+                raise ValueError(f"{field.name} must be {field.size} bytes")
+            return bytes(value)
+
+        if field.count == 1:
+            return word & ~(field.mask << field.shift) | field.encode_element(value) << field.shift
+
+        # Arrays replace their leading elements and keep the rest
+        if len(value) > field.count:
+            raise ValueError(f"{field.name} holds at most {field.count} elements")
+        if field.bits is None:
+            return tuple(field.encode_element(element) for element in value) + tuple(word[len(value):])
+        for index, element in enumerate(value):
+            shift = field.shift + index * field.bits
+            word = word & ~(field.mask << shift) | field.encode_element(element) << shift
+        return word
+
+    def unpack(self, data):
+        """Decodes one record.
+
+        Returns:
+            dict: Field name -> value, in field order.
+        """
+        items = self.struct.unpack_from(data)
+        values = {}
+        for field in self.fields:
+            values[field.name] = self.__decode(field, self.__word(items, field), values)
+        return values
+
+    def pack(self, values, data=None):
+        """Encodes values into a record.
+
+        Args:
+            values (dict): Field name -> value for the fields to write. Fields
+                left out, and any field whose value already decodes to the
+                same thing, keep their bytes.
+            data (bytes-like): Record to start from, zeros if None.
+
+        Returns:
+            bytes: The encoded record.
+        """
+        # Zeros need not decode, e.g. under an enum without a code 0, so a
+        # new record is written field by field without comparing
+        current = self.unpack(data) if data is not None else {}
+        if data is None:
+            data = bytes(self.byte_length)
+        items = list(self.struct.unpack_from(data))
+
+        for field in self.fields:
+            if field.name not in values or (field.name in current and values[field.name] == current[field.name]):
+                continue
+            word = self.__word(items, field)
+            self.__set_word(items, field, self.__encode(field, word, values[field.name]))
+
+        return self.struct.pack(*items)
@@ -0,0 +1,167 @@
+import functools
+
+import numpy as np
+
+from .map import Map, Tile, TERRAIN
+from .pathing import Pathfinder
+
+class SiteScorer():
+    """Scores every land tile of a map as a colony site.
+
+    A site's score is the sum of the values of the tile and its eight
+    neighbours, the tiles a colony can work, plus bonuses for the centre tile.
+    Tile values come from a 256 entry table indexed by the terrain byte, with
+    bonuses for rivers and, when a PrimePattern is given, prime resources.
+    The 3x3 sum for every tile is nine shifted array additions rather than a
+    loop over tiles. Tiles where a colony cannot be placed, water, the border
+    and anything within min_distance tiles of a colony or village, score
+    -inf.
+
+    Given colonies, sites far from them are penalised: the penalty is
+    weights['distance'] * (1 - exp(-cost / falloff)) for the movement cost
+    of reaching the site by land from the nearest colony, one
+    Pathfinder.distance_field() for the whole map. A site next to a colony
+    loses almost nothing and one that cannot be reached by land loses the
+    whole weight.
+
+    Args:
+        prime (PrimePattern): Predicts prime resources, primes are not scored if None.
+        min_distance (int): Chebyshev distance a site must keep from existing colonies and villages.
+        weights (dict): Overrides for entries of SiteScorer.weights.
+        falloff (float): Movement cost over which the distance penalty grows.
+    """
+    # Value of a tile by the base terrain of open tiles (Tundra to Swamp)
+    open_values = [3, 2, 5, 4, 4, 4, 3, 3]
+
+    weights = {'forest': 3, 'hills': 4, 'mountains': 2, 'arctic': 0, 'water': 4,
+               'minor_river': 1, 'major_river': 2, 'prime': 4,
+               'coastal': 3, 'river_site': 2, 'distance': 6}
+
+    # Neighbour offsets in the order of Colony.fields: N, E, S, W, NW, NE, SE, SW
+    steps = [(0, -1), (1, 0), (0, 1), (-1, 0), (-1, -1), (1, -1), (1, 1), (-1, 1)]
+
+    site_dtype = np.dtype([('x', 'u1'), ('y', 'u1'), ('score', 'f4')])
+
+    def __init__(self, prime=None, min_distance=2, weights=None, falloff=8.0):
+        self.prime = prime
+        self.min_distance = min_distance
+        self.falloff = falloff
+        self.weights = dict(SiteScorer.weights, **(weights or {}))
+        self.values = self.value_table(tuple(sorted(self.weights.items())))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def value_table(weights):
+        """Value of every possible terrain byte, before prime and suppression bits.
+        """
+        weights = dict(weights)
+        bits = Tile.terrain_bits
+        table = np.zeros(256, dtype=np.float32)
+        for code in range(256):
+            special = code & (bits['Special'] | bits['Forest']) == bits['Special'] | bits['Forest']
+            if special:
+                kind = code & (bits['Special'] | bits['Forest'] | bits['Base'])
+                value = weights['arctic'] if kind == Tile.specials['Arctic'] else weights['water']
+            elif code & bits['Forest']:
+                value = weights['forest']
+            elif code & bits['Hills']:
+                value = weights['mountains'] if code & bits['Prominent'] else weights['hills']
+            else:
+                value = SiteScorer.open_values[code & bits['Base']]
+
+            if code & bits['River']:
+                value += weights['major_river'] if code & bits['Prominent'] else weights['minor_river']
+            table[code] = value
+
+        table.flags.writeable = False
+        return table
+
+    @staticmethod
+    def neighbourhood(values, steps=None):
+        """Sums values over each tile and the neighbours given by steps.
+
+        Args:
+            values (numpy.ndarray): (height, width) array.
+            steps (list): (dx, dy) offsets, SiteScorer.steps if None.
+
+        Returns:
+            numpy.ndarray: (height, width) array, tiles past the edge count as 0.
+        """
+        padded = np.pad(values, 1)
+        height, width = values.shape
+        total = values.copy()
+        for dx, dy in steps if steps is not None else SiteScorer.steps:
+            total += padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+        return total
+
+    def tile_values(self, map):
+        """(height, width) value of every tile, including prime resources when there is a PrimePattern.
+        """
+        values = self.values[map.array(TERRAIN)]
+        if self.prime is None:
+            return values
+        return values + self.weights['prime'] * self.prime.live(map)
+
+    def distance_penalty(self, map, colonies):
+        """(height, width) penalty for the land movement cost from the nearest of colonies.
+        """
+        cost = Pathfinder.for_map(map, domain='land').distance_field(colonies)
+        return self.weights['distance'] * -np.expm1(-cost / self.falloff)
+
+    def scores(self, map, occupied=(), colonies=None):
+        """Site score of every tile, -inf where a colony cannot be founded.
+
+        Args:
+            map (Map): The map to score.
+            occupied: (x, y) positions of existing colonies and villages.
+            colonies: (x, y) positions to penalise distance from, usually the
+                colonies among occupied. No distance penalty if None or empty.
+        """
+        water = map.is_water()
+        scores = self.neighbourhood(self.tile_values(map))
+
+        # Centre tile bonuses
+        coastal = self.neighbourhood(water.astype(np.float32)) > 0
+        scores += self.weights['coastal'] * coastal + self.weights['river_site'] * map.has_river()
+
+        if colonies is not None:
+            colonies = np.asarray(colonies, dtype=np.int64).reshape(-1, 2)
+            colonies = colonies[(colonies[:, 0] < map.width) & (colonies[:, 1] < map.height)]
+            if len(colonies):
+                scores -= self.distance_penalty(map, colonies)
+
+        valid = ~water & ~map.is_special('Arctic')
+        valid[[0, -1], :] = False
+        valid[:, [0, -1]] = False
+
+        # Growing the occupied tiles by one ring per pass marks every tile
+        # within min_distance of them
+        occupied = np.asarray(occupied, dtype=np.int64).reshape(-1, 2)
+        occupied = occupied[(occupied[:, 0] < map.width) & (occupied[:, 1] < map.height)]
+        near = np.zeros((map.height, map.width), dtype=np.float32)
+        near[occupied[:, 1], occupied[:, 0]] = 1
+        for _ in range(self.min_distance):
+            near = self.neighbourhood(near)
+        valid &= near == 0
+
+        return np.where(valid, scores, -np.inf)
+
+    def rank(self, save, count=20):
+        """Best colony sites of a SaveFile, penalising distance from its colonies.
+
+        Returns:
+            numpy.ndarray: Up to count rows of site_dtype, best first.
+        """
+        colonies = save.colony_table.positions
+        occupied = np.concatenate([colonies, save.village_table.positions])
+        scores = self.scores(save.maps, occupied, colonies=colonies)
+
+        positions = Map.positions(np.isfinite(scores))
+        values = scores[positions[:, 1], positions[:, 0]]
+        order = np.argsort(-values, kind='stable')[:count]
+
+        sites = np.zeros(len(order), dtype=SiteScorer.site_dtype)
+        sites['x'] = positions[order, 0]
+        sites['y'] = positions[order, 1]
+        sites['score'] = values[order]
+        return sites
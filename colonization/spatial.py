@@ -0,0 +1,129 @@
+import numpy as np
+
+class SpatialIndex():
+    """Finds the units, colonies and villages at or near a tile without scanning every record.
+
+    Records are bucketed by tile on a grid the size of the map. The buckets
+    are stored back to back in one array sorted by tile, with the offset of
+    each tile's bucket in another, so a tile is looked up in O(1) and a row
+    of tiles is one contiguous slice. Records at positions off the map, such
+    as the European ports at (233..246, 233..246), are kept in a separate
+    dict keyed on position.
+
+    Queries return lists of (kind, index) where kind is one of
+    SpatialIndex.kinds and index is the record's position in that section of
+    the save.
+
+    Args:
+        width, height (int): Map size, including the border.
+        records (dict): kind -> sequence of (x, y) positions.
+    """
+    kinds = ['units', 'colonies', 'villages']
+
+    # Positions used for ships and units in or travelling to Europe
+    europe = range(233, 247)
+
+    def __init__(self, width, height, records):
+        self.width = width
+        self.height = height
+
+        kinds, indices, xs, ys = [], [], [], []
+        for kind, positions in records.items():
+            positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+            kinds.append(np.full(len(positions), self.kinds.index(kind), dtype=np.uint8))
+            indices.append(np.arange(len(positions), dtype=np.uint32))
+            xs.append(positions[:, 0])
+            ys.append(positions[:, 1])
+
+        kinds = np.concatenate(kinds) if kinds else np.zeros(0, dtype=np.uint8)
+        indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.uint32)
+        xs = np.concatenate(xs) if xs else np.zeros(0, dtype=np.int64)
+        ys = np.concatenate(ys) if ys else np.zeros(0, dtype=np.int64)
+
+        on_map = (xs < width) & (ys < height)
+
+        self.locations = {(self.kinds[kind], index): (x, y) for kind, index, x, y in
+                          zip(kinds.tolist(), indices.tolist(), xs.tolist(), ys.tolist())}
+
+        # Off map records, e.g. Europe
+        self.off_map = {}
+        for kind, index, x, y in zip(kinds[~on_map].tolist(), indices[~on_map].tolist(), xs[~on_map].tolist(), ys[~on_map].tolist()):
+            self.off_map.setdefault((x, y), []).append((self.kinds[kind], index))
+
+        # On map records sorted by tile, with starts[tile]:starts[tile + 1]
+        # the slice holding the records on that tile
+        cells = ys[on_map] * width + xs[on_map]
+        order = np.argsort(cells, kind='stable')
+        self.entries = list(zip([self.kinds[kind] for kind in kinds[on_map][order].tolist()],
+                                indices[on_map][order].tolist()))
+        starts = np.zeros(width * height + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=width * height), out=starts[1:])
+        self.starts = starts.tolist()
+
+    @classmethod
+    def from_save(cls, save):
+        """Indexes the units, colonies and villages of a SaveFile.
+        """
+        return cls(save.header.map_width, save.header.map_height, {
+            'units': save.unit_table.positions,
+            'colonies': save.colony_table.positions,
+            'villages': save.village_table.positions,
+        })
+
+    @staticmethod
+    def __select(entries, kind):
+        if kind is None:
+            return entries
+        return [entry for entry in entries if entry[0] == kind]
+
+    def at(self, x, y, kind=None):
+        """Returns the records at position (x, y), on or off the map.
+        """
+        if x in range(0, self.width) and y in range(0, self.height):
+            cell = y * self.width + x
+            return self.__select(self.entries[self.starts[cell]:self.starts[cell + 1]], kind)
+        return self.__select(self.off_map.get((x, y), []), kind)
+
+    def rect(self, left, top, right, bottom, kind=None):
+        """Returns the records on the map inside the rectangle, edges included.
+        """
+        left, right = max(left, 0), min(right, self.width - 1)
+        top, bottom = max(top, 0), min(bottom, self.height - 1)
+        if left > right or top > bottom:
+            return []
+
+        found = []
+        for y in range(top, bottom + 1):
+            found += self.entries[self.starts[y * self.width + left]:self.starts[y * self.width + right + 1]]
+        return self.__select(found, kind)
+
+    def radius(self, x, y, distance, kind=None, metric='chebyshev'):
+        """Returns the records on the map within distance tiles of (x, y).
+
+        Args:
+            metric (str): 'chebyshev' counts diagonal steps as one tile, as
+                units move; 'euclidean' uses the straight line distance.
+        """
+        if metric not in ('chebyshev', 'euclidean'):
+            raise ValueError("metric must be 'chebyshev' or 'euclidean'")
+
+        found = self.rect(x - distance, y - distance, x + distance, y + distance, kind)
+        if metric == 'chebyshev':
+            return found
+
+        positions = self.positions(found)
+        return [entry for entry, (px, py) in zip(found, positions) if (px - x) ** 2 + (py - y) ** 2 <= distance ** 2]
+
+    def in_europe(self, kind=None):
+        """Returns the records at the off map Europe positions.
+        """
+        found = []
+        for (x, y), entries in sorted(self.off_map.items()):
+            if x in self.europe or y in self.europe:
+                found += entries
+        return self.__select(found, kind)
+
+    def positions(self, entries):
+        """Returns the (x, y) of each (kind, index) in entries.
+        """
+        return [self.locations[entry] for entry in entries]
@@ -0,0 +1,186 @@
+import os
+import glob
+import fnmatch
+import hashlib
+
+import numpy as np
+
+import colonization
+
+class SaveStore():
+    """Columnar store of decoded saves.
+
+    Each ingest writes a compressed NPZ shard holding one structured array per
+    table. Every table row carries a 'save' column that refers to a row of the
+    'saves' table. That table holds the SHA-1 of the file, which is how saves
+    are identified: a file whose hash is already in the store is skipped.
+    Queries load only the tables they ask for and never touch the .SAV files.
+
+    Args:
+        root (str): Directory holding the shards, created if missing.
+    """
+    tables = ['saves', 'powers', 'colonies', 'units', 'villages']
+
+    saves_dtype = np.dtype([
+        ('save', 'u4'), ('hash', 'S20'), ('size', 'u4'),
+        ('colony_count', 'u2'), ('unit_count', 'u2'), ('village_count', 'u2'),
+        ('map_width', 'u2'), ('map_height', 'u2')
+    ])
+
+    powers_dtype = np.dtype([('power', 'u1'), ('tax', 'u1'), ('gold', 'u4')])
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def shards(self):
+        return sorted(glob.glob(os.path.join(self.root, 'shard-*.npz')))
+
+    def table(self, name):
+        """Returns the named table across every shard as one structured array.
+        """
+        if name not in self.tables:
+            raise ValueError(f"table must be one of {self.tables}")
+
+        parts = []
+        for shard in self.shards():
+            with np.load(shard) as data:
+                parts.append(data[name])
+
+        if not parts:
+            return np.zeros(0, dtype=self.dtype(name))
+        return np.concatenate(parts)
+
+    def paths(self):
+        """Returns the path each save was ingested from, indexed by save.
+        """
+        parts = []
+        for shard in self.shards():
+            with np.load(shard) as data:
+                parts.append(data['paths'])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype='U1')
+
+    def hashes(self):
+        """Returns the set of file hashes already in the store.
+        """
+        return set(self.table('saves')['hash'].tolist())
+
+    def dtype(self, name):
+        columns = {
+            'saves': SaveStore.saves_dtype,
+            'powers': SaveStore.powers_dtype,
+            'colonies': colonization.ColonyTable.dtype,
+            'units': colonization.UnitTable.dtype,
+            'villages': colonization.VillageTable.dtype,
+        }[name]
+
+        if name == 'saves':
+            return columns
+        return np.dtype([('save', 'u4')] + columns.descr)
+
+    @staticmethod
+    def find(root, pattern='*.SAV'):
+        """Walks root and yields the paths of files matching pattern, ignoring case.
+        """
+        for directory, _, files in os.walk(root):
+            for name in sorted(files):
+                if fnmatch.fnmatch(name.upper(), pattern.upper()):
+                    yield os.path.join(directory, name)
+
+    @staticmethod
+    def decode(path):
+        """Decodes one save into per-table structured arrays without save ids.
+
+        Returns:
+            dict: 'saves' holds a single row, the other tables one row per record.
+        """
+        with colonization.SaveFile(path, lazy=True) as save:
+            header = save.header
+
+            saves = np.zeros(1, dtype=SaveStore.saves_dtype)
+            saves['hash'] = hashlib.sha1(save.buffer).digest()
+            saves['size'] = len(save.buffer)
+            saves['colony_count'] = header.colony_count
+            saves['unit_count'] = header.unit_count
+            saves['village_count'] = header.village_count
+            saves['map_width'] = header.map_width
+            saves['map_height'] = header.map_height
+
+            powers = np.zeros(len(save.powers), dtype=SaveStore.powers_dtype)
+            powers['power'] = np.arange(len(save.powers))
+            powers['tax'] = [power.tax for power in save.powers]
+            powers['gold'] = [power.gold for power in save.powers]
+
+            # Copy the tables out of the file buffer before it is closed
+            return {
+                'saves': saves,
+                'powers': powers,
+                'colonies': save.colony_table.records.copy(),
+                'units': save.unit_table.records.copy(),
+                'villages': save.village_table.records.copy(),
+            }
+
+    def ingest(self, paths, shard_size=1000, workers=1):
+        """Decodes every new save in paths and appends them to the store.
+
+        Args:
+            paths (iterable): Paths of saves to ingest.
+            shard_size (int): Number of saves per shard written.
+            workers (int): Number of processes decoding saves, see
+                colonization.batch.map_saves.
+
+        Returns:
+            int: Number of saves added.
+        """
+        known = self.hashes()
+        next_save = len(self.table('saves'))
+        added = 0
+        pending = []
+
+        for path, tables, error in colonization.batch.decode_tables(paths, workers=workers):
+            if error is not None:
+                print(f"Skipping {path}: {error}")
+                continue
+
+            digest = tables['saves']['hash'][0]
+            if digest in known:
+                continue
+            known.add(digest)
+
+            pending.append((path, tables))
+            if len(pending) == shard_size:
+                self.__write_shard(pending, next_save)
+                next_save += len(pending)
+                added += len(pending)
+                pending = []
+
+        if pending:
+            self.__write_shard(pending, next_save)
+            added += len(pending)
+
+        return added
+
+    def __write_shard(self, pending, first_save):
+        columns = {'paths': np.array([path for path, _ in pending])}
+
+        for name in self.tables:
+            parts = []
+            for save, (_, tables) in enumerate(pending, first_save):
+                rows = tables[name]
+                if name == 'saves':
+                    rows['save'] = save
+                    parts.append(rows)
+                    continue
+
+                stamped = np.zeros(len(rows), dtype=self.dtype(name))
+                stamped['save'] = save
+                for field in rows.dtype.names:
+                    stamped[field] = rows[field]
+                parts.append(stamped)
+            columns[name] = np.concatenate(parts) if parts else np.zeros(0, dtype=self.dtype(name))
+
+        shard = os.path.join(self.root, f'shard-{len(self.shards()):05d}.npz')
+        temporary = shard + '.tmp'
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, **columns)
+        os.replace(temporary, shard)
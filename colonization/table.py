@@ -0,0 +1,62 @@
+import numpy as np
+
+def record_layout(byte_length, fields):
+    """Builds a NumPy dtype that views fixed length records in place.
+
+    Args:
+        byte_length (int): Length of one record in bytes.
+        fields (list): Tuples of (name, offset, format) for the bytes to expose.
+            Bytes not covered by a field are skipped.
+    """
+    names, offsets, formats = zip(*fields)
+    return np.dtype({'names': list(names), 'offsets': list(offsets),
+                     'formats': list(formats), 'itemsize': byte_length})
+
+class RecordTable():
+    """Decodes a run of fixed length records into a NumPy structured array in one pass.
+
+    Subclasses set record_type (the class used for object views of a record),
+    layout (a dtype from record_layout) and implement decode(), which turns the
+    raw records into the columns of self.records.
+
+    Args:
+        data (bytes-like): Buffer holding the records, usually a whole save.
+        start (int): Address of the first record in data.
+        count (int): Number of records.
+    """
+    record_type = None
+    layout = None
+
+    def __init__(self, data, start=0, count=0):
+        self.data = memoryview(data)
+        self.start = start
+        self.count = count
+
+        # A view onto data, nothing is copied until decode()
+        self.raw = np.frombuffer(self.data, dtype=self.layout, count=count, offset=start)
+        self.records = self.decode(self.raw)
+
+    def decode(self, raw):
+        raise NotImplementedError
+
+    def view(self, index):
+        """Returns a zero-copy view of the bytes of one record.
+        """
+        if index < 0:
+            index += self.count
+        if index not in range(0, self.count):
+            raise IndexError(f"record index {index} out of range for {self.count} records")
+
+        start = self.start + index * self.record_type.byte_length
+        return self.data[start:start + self.record_type.byte_length]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        # Object style views are only built when asked for
+        return self.record_type(self.view(index))
+
+    def __iter__(self):
+        for index in range(0, self.count):
+            yield self[index]
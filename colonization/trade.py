@@ -1,3 +1,6 @@
+from . import codec
+from .schema import Field, Schema
+
 class Destination:
     def __init__(self):
         self.location = 0
@@ -5,8 +8,23 @@ class Destination:
         self.unloads = []
 
 
+def stop_fields(stops, supplies):
+    """Schema fields for each stop of a trade route.
+    """
+    fields = []
+    for stop in range(stops):
+        fields += [
+            Field(f'location_{stop}', 34 + 10 * stop),
+            Field(f'load_count_{stop}', 36 + 10 * stop, shift=4, bits=4),
+            Field(f'unload_count_{stop}', 36 + 10 * stop, bits=4),
+            Field(f'loads_{stop}', 37 + 10 * stop, size=3, count=6, bits=4, length=f'load_count_{stop}', enum=supplies),
+            Field(f'unloads_{stop}', 40 + 10 * stop, size=3, count=6, bits=4, length=f'unload_count_{stop}', enum=supplies),
+        ]
+    return fields
+
 class TradeRoute:
     byte_length = 74
+    count = 12
     unknowns = [(35, 35), (43, 43), (45, 45), (53,53),
                 (55, 55), (63, 63), (65, 65), (73, 73)]
     # The x5 bytes may be related to sea routes involving Europe
@@ -17,43 +35,52 @@ class TradeRoute:
                 'Rum': 0x9, 'Cigars': 0xA, 'Cloth': 0xB,
                 'Coats': 0xC, 'Trade Goods': 0xD, 'Tools': 0xE,
                 'Muskets': 0xF}
+    supply_names = codec.lookup_table(supplies)
+
+    # Up to 4 stops of 10 bytes each from byte 34. Byte 36 of a stop holds the
+    # number of loads in its high nibble and unloads in its low nibble, and
+    # the cargoes follow as 6 nibbles each.
+    stops = 4
+    schema = Schema(byte_length, [
+        Field('name', 0, size=0x20, kind='str'), Field('sea', 32), Field('stop_count', 33)
+    ] + stop_fields(stops, supplies))
 
-    
     def __init__(self):
         self.unknown = b''
         self.name = ''
         self.destinations = []
         self.sea = True
+        self.data = None
 
     def pack(self):
-        print('packing')
+        """Encodes the trade route back into its 74 bytes.
+        """
+        values = {'name': self.name, 'sea': int(self.sea), 'stop_count': len(self.destinations)}
+        for stop, dest in enumerate(self.destinations):
+            values[f'location_{stop}'] = dest.location
+            values[f'load_count_{stop}'] = len(dest.loads)
+            values[f'unload_count_{stop}'] = len(dest.unloads)
+            values[f'loads_{stop}'] = dest.loads
+            values[f'unloads_{stop}'] = dest.unloads
+        return TradeRoute.schema.pack(values, self.data)
 
     def unpack(self, data):
         if len(data) != TradeRoute.byte_length:
             raise ValueError
 
-        self.name = data[0:0x20].decode('ascii').split(chr(0))[0]
-        self.sea = bool(data[32])
-
-        lookup = {val: key for key, val in TradeRoute.supplies.items()}
+        self.data = data
+        values = TradeRoute.schema.unpack(data)
+        self.name = values['name']
+        self.sea = bool(values['sea'])
 
         self.destinations = []
-        for offset in range(0, 10 * data[33], 10):
+        for stop in range(values['stop_count']):
             dest = Destination()
-            dest.location = data[34 + offset]
-
-            cargoes = int.from_bytes(data[37+offset:40+offset], 'little')
-            for item in range(data[36+offset] >> 4 & 0xF):
-                stock = lookup[(cargoes >> (item * 4)) & 0xF]
-                dest.loads.append(stock)
-            
-            cargoes = int.from_bytes(data[40+offset:43+offset], 'little')
-            for item in range(data[36+offset] & 0xF):
-                stock = lookup[(cargoes >> (item * 4)) & 0xF]
-                dest.unloads.append(stock)
-
+            dest.location = values[f'location_{stop}']
+            dest.loads = values[f'loads_{stop}']
+            dest.unloads = values[f'unloads_{stop}']
             self.destinations.append(dest)
-        
+
         self.unknown = b''.join([data[start:end + 1] for start, end in TradeRoute.unknowns])
 
     def __str__(self):
@@ -1,3 +1,9 @@
+import numpy as np
+
+from . import codec
+from .schema import Field, Schema
+from .table import RecordTable, record_layout
+
 class Unit():
     byte_length = 28
 
@@ -25,7 +31,29 @@ class Unit():
              'Mounted Braves': 0x15, 'Scout': 0x05, 'Mounted Warriors': 0x16,
              'Man-O-War': 0x12}
 
+    # Reverse lookups from byte value to name, built once at import
+    order_names = codec.lookup_table(orders)
+    power_names = codec.lookup_table(powers)
+    supply_names = codec.lookup_table(supplies)
+    form_names = codec.lookup_table(forms)
+
     unknowns = [(3, 7), (11, 11), (22, 22), (24, 27)]
+
+    # Cargo slots of a unit, as many as a Galleon has holds. Types are 6
+    # nibbles in bytes 13-15, quantities one byte each in bytes 16-21.
+    # Pioneers carry no cargo and keep their tools in the last slot, byte 21,
+    # so every quantity is decoded and only cargo_count of them are cargo.
+    holds = 6
+    tools_slot = 5
+
+    schema = Schema(byte_length, [
+        Field('x', 0), Field('y', 1), Field('form', 2, enum=forms), Field('power', 3, bits=4, enum=powers),
+        Field('order', 8, enum=orders), Field('destination_x', 9), Field('destination_y', 10),
+        Field('cargo_count', 12),
+        Field('cargo_types', 13, size=3, count=holds, bits=4, length='cargo_count', enum=supplies),
+        Field('cargo_quantities', 16, size=holds, count=holds),
+        Field('specialty', 23)
+    ])
     
     # When byte 8 is 0x03 it's going to position in byte 9, byte 10
     # If the unit is a boat and the destination is a sea lane, it will sail to Europe
@@ -44,7 +72,7 @@ class Unit():
     # Position 243, 243 is enroute to Netherlands
     # Position 239, 239 is in the Netherlands
     # Position 235, 235 is leaving Netherlands
-    # Cargo quantities in bytes 16, 17, 18 and 19, 1 byte per location
+    # Cargo quantities in bytes 16 to 21, 1 byte per location
     # When sailing to Europe, bytes 9 and 10 are set as the leave/return point
     # Byte 12 is cargo quantity
     # Byte 13 and 14 hold cargo type
@@ -52,12 +80,15 @@ class Unit():
     # Cargo space 3 is 4 LSB of byte 14, space 4 is 4 MSB of byte 14
     # Byte 2 looks like unit type (colonist, pioneer, boat, gold, soldier, indian, etc)
     
+    # No per-instance dict: a save can hold hundreds of units
+    __slots__ = ('position', 'power', 'specialty', 'occupation', 'order', 'destination',
+                 'form', 'tools', 'cargo', 'data')
+
     def __init__(self, data):
         self.position = (0, 0)
         self.power = 0
         self.specialty = ''
         self.order = 0
-        self.unknown = b''
         self.destination = (0, 0)
         self.form = 0
         self.tools = 0
@@ -65,41 +96,53 @@ class Unit():
 
         if len(data) != Unit.byte_length:
             raise ValueError
-        
-        self.position = (data[0], data[1])
 
-        lookup = {val: key for key, val in Unit.forms.items()}
-        self.form = lookup[data[2]]
+        values = Unit.schema.unpack(data)
+        self.position = (values['x'], values['y'])
 
-        lookup = {val: key for key, val in Unit.powers.items()}
-        self.power = lookup[data[3] & 0xF]  #Only 4 LSB is power, 4 MSB unknown
-        
-        lookup = {val: key for key, val in Unit.orders.items()}
-        self.order = lookup[data[8]]
+        self.form = values['form']
+        self.power = values['power']  #Only 4 LSB is power, 4 MSB unknown
+        self.order = values['order']
 
         # TODO: Verify the colonist occupations are accurate and that we're not mixing up occupations and specialities
-        self.specialty = data[23]
-        lookup = {val: key for key, val in {**Colonist.specialties, **Colonist.occupations}.items()}
+        self.specialty = values['specialty']
 
         try:
-            self.occupation = lookup[data[23]]
+            self.occupation = codec.decode(Colonist.specialty_names, self.specialty)
         except KeyError as ke:
             print(f"{ke}")
             self.occupation = 'UNKNOWN'
 
-        self.destination = (data[9], data[10])
-        
-        lookup = {val: key for key, val in Unit.supplies.items()}
-        self.cargo = []
-        cargoes = int.from_bytes(data[13:16], 'little')
+        self.destination = (values['destination_x'], values['destination_y'])
 
-        for offset in range(data[12]):
-            stock = (lookup[(cargoes >> (offset * 4)) & 0xF], data[16+offset])
-            self.cargo.append(stock)
-        self.unknown = b''.join([data[start:end + 1] for start, end in Unit.unknowns])
+        # cargo_types holds cargo_count entries, zip stops there
+        holds = values['cargo_quantities']
+        self.cargo = list(zip(values['cargo_types'], holds))
 
         if self.form == 'Pioneer':
-            self.tools = data[21]
+            self.tools = holds[Unit.tools_slot]
+
+    @property
+    def unknown(self):
+        # Read from data on demand rather than kept as a second copy
+        return b''.join([self.data[start:end + 1] for start, end in Unit.unknowns])
+
+    def pack(self):
+        """Encodes the unit back into its 28 bytes.
+        """
+        values = {
+            'x': self.position[0], 'y': self.position[1], 'form': self.form, 'power': self.power,
+            'order': self.order, 'destination_x': self.destination[0], 'destination_y': self.destination[1],
+            'cargo_count': len(self.cargo), 'cargo_types': [name for name, _ in self.cargo],
+            'cargo_quantities': [quantity for _, quantity in self.cargo], 'specialty': self.specialty
+        }
+        if self.form == 'Pioneer':
+            # Tools are the last hold, the holds in between keep their bytes
+            holds = Unit.schema.unpack(self.data)['cargo_quantities']
+            holds[:len(self.cargo)] = values['cargo_quantities']
+            holds[Unit.tools_slot] = self.tools
+            values['cargo_quantities'] = holds
+        return Unit.schema.pack(values, self.data)
 
     def __str__(self):
         out = f'Type: {self.form}\n'
@@ -136,8 +179,62 @@ class Colonist():
     # 0x28: Braves
     # 0x20: Treasure
     specialties.update(occupations)
+
+    # Covers occupations too, since specialties includes them
+    specialty_names = codec.lookup_table(specialties)
+
+    __slots__ = ('occupation', 'specialty', 'time')
     
     def __init__(self):
         self.occupation = ''
         self.specialty = ''
         self.time = 0
+
+class UnitTable(RecordTable):
+    """All units of a save decoded at once into a NumPy structured array.
+
+    Columns hold the raw codes; compare them against the Unit enum dicts, e.g.
+    table.records['form'] == Unit.forms['Pioneer']. Cargo slots past the
+    unit's cargo count hold type 0xFF and quantity 0, and a pioneer's tools,
+    kept in its last cargo slot, are only in the tools column. Indexing the
+    table returns a Unit for that record.
+    """
+    record_type = Unit
+
+    layout = record_layout(Unit.byte_length, [
+        ('x', 0, 'u1'), ('y', 1, 'u1'), ('form', 2, 'u1'), ('power', 3, 'u1'),
+        ('order', 8, 'u1'), ('destination_x', 9, 'u1'), ('destination_y', 10, 'u1'),
+        ('cargo_count', 12, 'u1'), ('cargo_types', 13, ('u1', 3)),
+        ('cargo_quantities', 16, ('u1', Unit.holds)), ('tools', 16 + Unit.tools_slot, 'u1'),
+        ('specialty', 23, 'u1')
+    ])
+
+    dtype = np.dtype([
+        ('x', 'u1'), ('y', 'u1'), ('form', 'u1'), ('power', 'u1'), ('order', 'u1'),
+        ('destination_x', 'u1'), ('destination_y', 'u1'), ('cargo_count', 'u1'),
+        ('cargo_types', 'u1', Unit.holds), ('cargo_quantities', 'u1', Unit.holds),
+        ('tools', 'u1'), ('specialty', 'u1')
+    ])
+
+    def decode(self, raw):
+        records = np.zeros(len(raw), dtype=UnitTable.dtype)
+        for name in ['x', 'y', 'form', 'order', 'destination_x', 'destination_y', 'cargo_count', 'specialty']:
+            records[name] = raw[name]
+
+        records['power'] = raw['power'] & 0xF  # Only 4 LSB is power, 4 MSB unknown
+
+        # Cargo types are packed two nibbles per byte, slot 1 in the low nibble of byte 13
+        packed = raw['cargo_types']
+        types = np.stack([packed & 0xF, packed >> 4], axis=-1).reshape(len(raw), Unit.holds)
+        loaded = np.arange(Unit.holds) < raw['cargo_count'][:, np.newaxis]
+        records['cargo_types'] = np.where(loaded, types, 0xFF)
+        records['cargo_quantities'] = np.where(loaded, raw['cargo_quantities'], 0)
+
+        records['tools'] = np.where(raw['form'] == Unit.forms['Pioneer'], raw['tools'], 0)
+        return records
+
+    @property
+    def positions(self):
+        """(count, 2) array of unit (x, y) positions.
+        """
+        return np.stack([self.records['x'], self.records['y']], axis=-1)
@@ -1,5 +1,6 @@
 import os
 import sys
+import glob
 import argparse
 
 import colonization as col
@@ -12,12 +13,25 @@ def check_args(parser):
     group.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
  
     parser.add_argument("-s", "--slot", type=int, default=0, help="Save game slot to load.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Dump every save in --directory using this many worker processes.")
 
     args = parser.parse_args()
 
     if args.directory is None and args.file is None:
         raise ValueError("You must specify a file using --file or --directory and --slot")
 
+    if args.jobs is not None:
+        if args.directory is None:
+            raise ValueError("--jobs needs a --directory of save games")
+        if args.jobs < 1:
+            raise ValueError(f"Jobs must be positive, got {args.jobs}")
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        args.files = sorted(glob.glob(os.path.join(args.directory, "COLONY??.SAV")))
+        print(args)
+        return args
+
     if args.directory is not None:
         if not os.path.isdir(args.directory):
             raise FileNotFoundError(args.directory)
@@ -34,16 +48,26 @@ def check_args(parser):
     print(args)
     return args
 
-def dump_colonies(args):
-    save = col.SaveFile(args.file)
+def render_colonies(path):
+    save = col.SaveFile(path)
     colony_data = [f"{x}\n" for x in save.colonies]
 
-    print(
+    return (
         f"Colony start address: {save.header.colonies_start_address}\n" + 
         f"Colony count: {save.header.colony_count}\n\n" +
         '\n'.join(colony_data)
     )
 
+def dump_colonies(args):
+    if args.jobs is None:
+        print(render_colonies(args.file))
+        return
+
+    # Workers send back only the rendered text
+    for path, text, error in col.batch.map_saves(render_colonies, args.files, workers=args.jobs):
+        print(f"{path}\n")
+        print(text if error is None else f"Failed to read {path}: {error}")
+
 def main():
     parser = argparse.ArgumentParser()
 
@@ -1,5 +1,6 @@
 import os
 import sys
+import glob
 import argparse
 
 import colonization as col
@@ -12,12 +13,25 @@ def check_args(parser):
     group.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
  
     parser.add_argument("-s", "--slot", type=int, default=0, help="Save game slot to load.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Dump every save in --directory using this many worker processes.")
 
     args = parser.parse_args()
 
     if args.directory is None and args.file is None:
         raise ValueError("You must specify a file using --file or --directory and --slot")
 
+    if args.jobs is not None:
+        if args.directory is None:
+            raise ValueError("--jobs needs a --directory of save games")
+        if args.jobs < 1:
+            raise ValueError(f"Jobs must be positive, got {args.jobs}")
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        args.files = sorted(glob.glob(os.path.join(args.directory, "COLONY??.SAV")))
+        print(args)
+        return args
+
     if args.directory is not None:
         if not os.path.isdir(args.directory):
             raise FileNotFoundError(args.directory)
@@ -34,17 +48,27 @@ def check_args(parser):
     print(args)
     return args
 
-def dump_powers(args):
-    save = col.SaveFile(args.file)
+def render_powers(path):
+    save = col.SaveFile(path)
     power_data = [f"{x}\n" for x in save.powers]
 
-    print(
+    return (
         #f"Unit start address: {save.header.units_start_address}\n" + 
         #f"Unit count: {save.header.unit_count}\n\n" +
         f"Powers start address: {save.header.powers_start_address}\n\n" +
         '\n'.join(power_data)
     )
 
+def dump_powers(args):
+    if args.jobs is None:
+        print(render_powers(args.file))
+        return
+
+    # Workers send back only the rendered text
+    for path, text, error in col.batch.map_saves(render_powers, args.files, workers=args.jobs):
+        print(f"{path}\n")
+        print(text if error is None else f"Failed to read {path}: {error}")
+
 def main():
     parser = argparse.ArgumentParser()
 
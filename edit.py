@@ -12,8 +12,9 @@ def check_args(parser):
     group.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
     parser.add_argument("-s", "--slot", type=int, default=0, help="Save game slot to load.")
 
-    group1 = parser.add_argument_group(title='Output')
-    group1.add_argument("-o", "--output", default=None, required=True, help="File name to write to.")
+    group1 = parser.add_argument_group(title='Output').add_mutually_exclusive_group(required=True)
+    group1.add_argument("-o", "--output", default=None, help="File name to write to.")
+    group1.add_argument("-i", "--in-place", action='store_true', help="Patch only the changed bytes of the loaded file.")
 
     group2 = parser.add_argument_group(title='Values')
     group2.add_argument("-p", "--power", required=True, type=int, choices=range(0,4), metavar="[0-3]", help="The index of the power in [English, French, Spanish, Dutch] to modify")
@@ -38,6 +39,11 @@ def check_args(parser):
         if not os.path.isfile(args.file):
             raise FileNotFoundError(args.file)
 
+    if args.gold is not None:
+        col.Power.check('gold', args.gold)
+    if args.taxes is not None:
+        col.Power.check('tax', args.taxes)
+
     print(args)
     return args
 
@@ -72,20 +78,25 @@ def load_save(args):
     return save
 
 def modify_save(args, save):
-    power = save.powers[args.power]
-    old_data = power.data
-    power.gold = 123456
-    power.tax
-    new_data = power.serialize()
+    edits = {}
+    if args.gold is not None:
+        edits['gold'] = args.gold
+    if args.taxes is not None:
+        edits['tax'] = args.taxes
+
+    sfw = col.SaveFileWriter(save.data, path=args.file)
+    ranges = sfw.write_powers({args.power: edits})
 
-    print(old_data)
-    print(new_data)
+    start = save.header.powers_start_address + args.power * col.Power.byte_length
+    byte_compare(save.powers[args.power].data, sfw.data[start:start + col.Power.byte_length])
 
-    byte_compare(old_data, new_data)
+    for begin, end in ranges:
+        print(f"Changed 0x{begin:04X}-0x{end:04X}")
 
-    sfw = col.SaveFileWriter(save.data)
-    sfw.write_power(data=new_data, index=args.power)
-    sfw.save(args.output)
+    if args.in_place:
+        print(f"Patched {sfw.patch()} bytes of {args.file}")
+    else:
+        sfw.save(args.output)
 
 def byte_compare(left, right):
     assert(len(left) == len(right))
@@ -7,6 +7,7 @@ def check_args(parser):
     parser.add_argument("right", type=int, help="Right slot")
     parser.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
     parser.add_argument("-v", "--verbose", action='store_true', help="Verbose mode.")
+    parser.add_argument("-s", "--structural", action='store_true', help="Compare colonies, units and villages record by record.")
 
     args = parser.parse_args()
 
@@ -37,106 +38,56 @@ def old_compare(args):
             # Read the whole file at once
             data2 = binary_file.read()
 
-    fields = []
-    for data in [data1, data2]:
-        num_col = data[0x2E]
-        num_unit = data[0x2C]
-        num_vill = data[0x2A]
-        map_width = int.from_bytes(data[0x0C:0x0E], 'little')
-        map_height = int.from_bytes(data[0x0E:0x10], 'little')
-        
-        # field_name, start, length
-        field = [
-            ('Header       ', 0, col.Header.byte_length),
-            ('Colonies     ', 0x186, col.Colony.byte_length),
-            ('Units        ', 0x186 + col.Colony.byte_length * num_col, col.Unit.byte_length),
-            ('Powers       ', 0x186 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit, col.Power.byte_length),
-            ('Villages     ', 0x676 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit, col.Village.byte_length),
-            
-            ('Unknown B    ', 0x676 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill, col.Map.byte_length),
-            
-            ('Terrain Map  ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 0 * map_width * map_height, col.Map.byte_length),
-            ('Unknown Map C', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 1 * map_width * map_height, col.Map.byte_length),
-            ('Visible Map  ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 2 * map_width * map_height, col.Map.byte_length),
-            ('Unknown Map D', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 3 * map_width * map_height, col.Map.byte_length),
-            ('Unknown E    ', 0xBBD + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.Map.byte_length),
-            ('Unknown F    ', 0xDB5 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.Map.byte_length),
-            
-            ('Trade Routes ', 0xE23 + col.Colony.byte_length * num_col + col.Unit.byte_length * num_unit + col.Village.byte_length * num_vill + 4 * map_width * map_height, col.TradeRoute.byte_length)
-        ]
-        fields.append(field)
-
-    print(f"Map Dimensions: {map_width}x{map_height}")
+    layouts = [col.Layout.from_data(data) for data in [data1, data2]]
+
+    # The dimensions and counts shown are those of the right file
+    print(f"Map Dimensions: {layouts[1].map_width}x{layouts[1].map_height}")
 
     print('Object Counts')
-    print(f"  Colonies:\t{num_col}\t({hex(col.Colony.byte_length)})")
-    print(f"  Units:\t{num_unit}\t({hex(col.Unit.byte_length)})")
-    print(f"  Villages:\t{num_vill}\t({hex(col.Village.byte_length)})")
+    print(f"  Colonies:\t{layouts[1].colony_count}\t({hex(col.Colony.byte_length)})")
+    print(f"  Units:\t{layouts[1].unit_count}\t({hex(col.Unit.byte_length)})")
+    print(f"  Villages:\t{layouts[1].village_count}\t({hex(col.Village.byte_length)})")
 
     print('Start Address')
-    for name, address, _ in fields[0]:
+    for name, address, _ in layouts[0].sections:
         print(f'  {name:13} 0x{address:04X}')
     print()
 
-    # Variable size fields
-    sizes = [(0x2E, 1, 'colony', 'colonies'),
-            (0x2C, 2, 'unit', 'units'),
-            (0x2A, 4, 'village', 'villages')]
+    # Sections with different record counts are blanked out and the right
+    # file is realigned to the left one
+    left, right, layout, dropped = col.diff.align(data1, data2)
 
+    for single, plural, left_count, right_count in dropped:
+        print(f'***** ERROR: Different {single} count *****')
+        print(f'File 1 has {left_count} {plural} and ', end = '')
+        print(f'file 2 has {right_count}')
+        print(f'Dropping {plural} from comparison')
+        print()
 
-    for address, field, single, plural in sizes:
-        
-        if data1[address] != data2[address]:
-            print(f'***** ERROR: Different {single} count *****')
-            print(f'File 1 has {data1[address]} {plural} and ', end = '')
-            print(f'file 2 has {data2[address]}')
-            print(f'Dropping {plural} from comparison')
-            print()
-            
-            cutsize = fields[0][field + 1][1] - fields[0][field][1]
-            removed = fields[1][field + 1][1] - fields[0][field + 1][1]
-
-            # Realign data in data2, blank out section in both
-            data1 = (data1[:fields[0][field][1]] + b'\x00' * cutsize +
-                    data1[fields[0][field + 1][1]:])
-            data2 = (data2[:fields[1][field][1]] + b'\x00' * cutsize +
-                    data2[fields[1][field + 1][1]:])
-
-            # Realign addresses for data2
-            fields[1] = (fields[1][:field + 1] +
-                        [(label, address - removed, group)
-                        for label, address, group in fields[1][field + 1:]])
-
-
-    if any(data1[loc] != data2[loc] for loc in [0x0C, 0x0D, 0x0E, 0x0F]):
-        print('*** Warning: Different map size ***')
-        raise ValueError
-
-    if len(data1) != len(data2):
-        print('*** Warning: File sizes different ***')
-        raise ValueError
-
-
-    for address, vals in enumerate(zip(data1, data2)):
-        if vals[0] != vals[1]:
-            label = ''
-            for field_name, start, length in fields[0]:
-                if address >= start:
-                    label = field_name
-                    offset = address - start
-                    group = length
-
-            print(f'Change at 0x{address:04X}: 0x{vals[0]:02X} -> '\
-                f'0x{vals[1]:02X}  {label} (0x{offset:04X}', end = '')
-            if group > 1:
-                print(f', Group {offset // group} Byte {offset % group}', end = '')
-
-            elif 'Map' in label:
-                print(f' Position ({offset % map_width}),({offset // map_width})', end = '')
-            print(')')
+    try:
+        changes = col.diff.diff_bytes(left, right, layout)
+    except ValueError as e:
+        print(f'*** Warning: {e} ***')
+        raise
+
+    for line in col.diff.render(changes, layout):
+        print(line)
+
+    # Show what changed in the sections that could not be compared byte for byte
+    if dropped:
+        print()
+        structural_compare(args, [plural for _, plural, _, _ in dropped])
+
+def structural_compare(args, sections=None):
+    with col.SaveFile(args.left, lazy=True) as left, col.SaveFile(args.right, lazy=True) as right:
+        for change in col.diff.diff_records(left, right, sections):
+            print(change)
 
 def compare(args):
-    old_compare(args)
+    if args.structural:
+        structural_compare(args)
+    else:
+        old_compare(args)
 
 def main():
     parser = argparse.ArgumentParser()
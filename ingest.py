@@ -0,0 +1,52 @@
+import os
+import sys
+import argparse
+
+import colonization as col
+
+def check_args(parser):
+    parser.add_argument("-v", "--verbose", action='store_true', help="Verbose mode.")
+    parser.add_argument("source", help="Directory tree to look for save games in.")
+    parser.add_argument("store", help="Directory of the columnar store to append to.")
+    parser.add_argument("-p", "--pattern", default="*.SAV", help="File name pattern of saves, ignoring case.")
+    parser.add_argument("--shard-size", type=int, default=1000, help="Number of saves per shard file.")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of worker processes decoding saves.")
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.source):
+        raise FileNotFoundError(args.source)
+
+    if args.shard_size < 1:
+        raise ValueError(f"Shard size must be positive, got {args.shard_size}")
+
+    if args.jobs < 1:
+        raise ValueError(f"Jobs must be positive, got {args.jobs}")
+
+    print(args)
+    return args
+
+def ingest(args):
+    store = col.SaveStore(args.store)
+    paths = list(col.SaveStore.find(args.source, args.pattern))
+
+    added = store.ingest(paths, shard_size=args.shard_size, workers=args.jobs)
+
+    print(f"Found {len(paths)} saves, added {added} new saves to {args.store}")
+    if args.verbose:
+        for name in col.SaveStore.tables:
+            print(f"  {name}: {len(store.table(name))} rows")
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    try:
+        args = check_args(parser)
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+    ingest(args)
+
+if __name__ == "__main__":
+    main()
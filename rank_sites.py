@@ -0,0 +1,97 @@
+import os
+import sys
+import glob
+import functools
+import argparse
+
+import colonization as col
+
+def check_args(parser):
+    parser.add_argument("-v", "--verbose", action='store_true', help="Verbose mode.")
+
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-f", "--file", default=None, help="File to load.")
+    group.add_argument("-d", "--directory", default=None, help="Directory to look for save games in.")
+ 
+    parser.add_argument("-s", "--slot", type=int, default=0, help="Save game slot to load.")
+    parser.add_argument("-c", "--count", type=int, default=10, help="Number of sites to list.")
+    parser.add_argument("-m", "--min-distance", type=int, default=2, help="Tiles a site must keep from existing colonies and villages.")
+    parser.add_argument("--no-primes", dest='primes', action='store_false', help="Do not score the prime resources fitted to the save.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Rank sites in every save in --directory using this many worker processes.")
+
+    args = parser.parse_args()
+
+    if args.directory is None and args.file is None:
+        raise ValueError("You must specify a file using --file or --directory and --slot")
+
+    if args.count < 1:
+        raise ValueError(f"Count must be positive, got {args.count}")
+    if args.min_distance < 0:
+        raise ValueError(f"Minimum distance cannot be negative, got {args.min_distance}")
+
+    if args.jobs is not None:
+        if args.directory is None:
+            raise ValueError("--jobs needs a --directory of save games")
+        if args.jobs < 1:
+            raise ValueError(f"Jobs must be positive, got {args.jobs}")
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        args.files = sorted(glob.glob(os.path.join(args.directory, "COLONY??.SAV")))
+        print(args)
+        return args
+
+    if args.directory is not None:
+        if not os.path.isdir(args.directory):
+            raise FileNotFoundError(args.directory)
+
+        if args.slot not in range(0, 11):
+            raise ValueError(f"Slot cannot be {args.slot}, must be in {range(0,11)}")
+
+        args.file = os.path.join(args.directory, f"COLONY{args.slot:02d}.SAV")
+    
+    if args.file is not None:
+        if not os.path.isfile(args.file):
+            raise FileNotFoundError(args.file)
+
+    print(args)
+    return args
+
+def render_sites(path, count=10, min_distance=2, primes=True):
+    save = col.SaveFile(path)
+    # Primes are scored when a pattern fits the save's suppressed ocean tiles
+    prime = col.PrimePattern.for_map(save.maps) if primes else None
+    sites = col.SiteScorer(prime=prime, min_distance=min_distance).rank(save, count)
+    site_data = [f"{rank:>4} ({x:>3}, {y:>3}) {score:6.1f}" for rank, (x, y, score) in enumerate(sites.tolist(), start=1)]
+
+    scored = f"prime resources with period {prime.period}" if prime is not None else "no prime resources"
+    return (
+        f"Best {len(sites)} colony sites at least {min_distance + 1} tiles from colonies and villages, {scored}\n\n" +
+        f"{'Rank':>4} {'Position':<10} {'Score':>6}\n" +
+        '\n'.join(site_data)
+    )
+
+def rank_sites(args):
+    render = functools.partial(render_sites, count=args.count, min_distance=args.min_distance, primes=args.primes)
+    if args.jobs is None:
+        print(render(args.file))
+        return
+
+    # Workers send back only the rendered text
+    for path, text, error in col.batch.map_saves(render, args.files, workers=args.jobs):
+        print(f"{path}\n")
+        print(text if error is None else f"Failed to read {path}: {error}")
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    try:
+        args = check_args(parser)
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+    
+    rank_sites(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import colonization
+
+def make_save(colony_count=2, unit_count=3, village_count=2, map_width=20, map_height=12):
+    """Builds the contents of a minimal save that SaveFile decodes.
+
+    Every record is zero apart from the bytes the decoders check: the marker,
+    the counts and map size in the header, the 0xFF padding and empty field
+    slots of each colony and a tribe and no trades for each village.
+
+    Returns:
+        bytearray: Contents of a COLONY 'sav' file.
+    """
+    layout = colonization.Layout(colony_count, unit_count, village_count, map_width, map_height)
+    data = bytearray(layout.end_address)
+    data[0:9] = b'COLONIZE\0'
+    data[0x0C:0x0E] = map_width.to_bytes(2, 'little')
+    data[0x0E:0x10] = map_height.to_bytes(2, 'little')
+    data[0x2A] = village_count
+    data[0x2C] = unit_count
+    data[0x2E] = colony_count
+
+    for index in range(colony_count):
+        start = layout.colonies_start_address + index * colonization.Colony.byte_length
+        data[start:start + 2] = bytes([1 + index, 1])
+        data[start + 0x70:start + 0x78] = b'\xff' * 8
+        data[start + 120:start + 132] = b'\xff' * 12
+
+    for index in range(village_count):
+        start = layout.villages_start_address + index * colonization.Village.byte_length
+        data[start:start + 3] = bytes([1 + index, 2, 4])
+        data[start + 8:start + 10] = b'\xff\xff'
+
+    return data
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import colonization
+
+from tests.synthetic import make_save
+
+class SaveArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        first = make_save()
+        moved = bytearray(first)
+        moved[colonization.Layout.from_data(first).units_start_address] = 7
+
+        # The second save is a copy of the first, the third moves a unit
+        self.contents = [bytes(first), bytes(first), bytes(moved)]
+        self.files = []
+        for index, data in enumerate(self.contents):
+            self.files.append(self.path(f'COLONY0{index}.SAV'))
+            with open(self.files[-1], 'wb') as f:
+                f.write(data)
+        self.archive_path = self.path('saves.arc')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def assertContents(self):
+        with colonization.SaveArchive(self.archive_path) as archive:
+            self.assertEqual(len(archive), len(self.contents))
+            for index, data in enumerate(self.contents):
+                self.assertEqual(bytes(archive.data_of(index)), data)
+            self.assertEqual(bytes(archive.data_of(-1)), self.contents[-1])
+
+    def test_no_dedup(self):
+        stats = colonization.SaveArchive.write(self.archive_path, self.files, dedup=None)
+        self.assertEqual((stats['saves'], stats['chunks']), (3, 3))
+        self.assertEqual(stats['input'], sum(len(data) for data in self.contents))
+        self.assertGreater(stats['bytes'], stats['input'])
+        self.assertEqual(os.path.getsize(self.archive_path), stats['bytes'])
+        self.assertContents()
+
+    def test_save_dedup(self):
+        stats = colonization.SaveArchive.write(self.archive_path, self.files)
+        self.assertEqual(stats['chunks'], 2)
+        self.assertLess(stats['bytes'], stats['input'])
+        self.assertContents()
+
+        # A save stored as one chunk is a view of the map
+        with colonization.SaveArchive(self.archive_path) as archive:
+            view = archive.data_of(1)
+            self.assertIsInstance(view, memoryview)
+            view.release()
+
+    def test_section_dedup(self):
+        stats = colonization.SaveArchive.write(self.archive_path, self.files, dedup='section')
+        spans = colonization.SaveHistory.spans(self.contents[0])
+        sections = {self.contents[0][start:end] for start, end in spans}
+
+        # Only the moved unit's section is stored again
+        self.assertEqual(stats['chunks'], len(sections) + 1)
+        self.assertLess(stats['bytes'], len(self.contents[0]) + 1000)
+        self.assertContents()
+
+    def test_names(self):
+        names = ['first', 'copy', 'moved']
+        colonization.SaveArchive.write(self.archive_path, self.files, names=names)
+        with colonization.SaveArchive(self.archive_path) as archive:
+            self.assertEqual(archive.names, names)
+            self.assertEqual(archive.index('moved'), 2)
+            with self.assertRaises(KeyError):
+                archive.index('missing')
+
+            save = archive.open(2)
+            self.assertEqual(save.file_path, 'moved')
+            self.assertEqual(save.units[0].position, (7, 0))
+            save.close()
+
+            self.assertEqual([save.header.unit_count for save in archive], [3, 3, 3])
+
+    def test_index_out_of_range(self):
+        colonization.SaveArchive.write(self.archive_path, self.files)
+        with colonization.SaveArchive(self.archive_path) as archive:
+            for index in [3, -4]:
+                with self.assertRaises(IndexError):
+                    archive.data_of(index)
+
+    def test_empty(self):
+        stats = colonization.SaveArchive.write(self.archive_path, [])
+        self.assertEqual((stats['saves'], stats['chunks']), (0, 0))
+        with colonization.SaveArchive(self.archive_path) as archive:
+            self.assertEqual((len(archive), archive.names), (0, []))
+
+    def test_invalid_arguments(self):
+        for kwargs in [{'dedup': 'tile'}, {'names': ['one']}, {'names': ['a', 'b\nc', 'd']}]:
+            with self.assertRaises(ValueError):
+                colonization.SaveArchive.write(self.archive_path, self.files, **kwargs)
+        self.assertFalse(os.path.exists(self.archive_path))
+
+    def test_failed_write_keeps_the_archive(self):
+        colonization.SaveArchive.write(self.archive_path, self.files)
+        with open(self.archive_path, 'rb') as f:
+            before = f.read()
+
+        with self.assertRaises(FileNotFoundError):
+            colonization.SaveArchive.write(self.archive_path, self.files + [self.path('missing.SAV')])
+        with open(self.archive_path, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        self.assertFalse(os.path.exists(self.archive_path + '.tmp'))
+
+    def test_not_an_archive(self):
+        with self.assertRaises(ValueError):
+            colonization.SaveArchive(self.files[0])
+        with self.assertRaises(FileNotFoundError):
+            colonization.SaveArchive(self.path('missing.arc'))
+
+    def test_close_with_open_saves(self):
+        colonization.SaveArchive.write(self.archive_path, self.files)
+        archive = colonization.SaveArchive(self.archive_path)
+        save = archive.open(0)
+        with self.assertWarns(ResourceWarning):
+            archive.close()
+        # The save keeps the map alive
+        self.assertEqual(save.header.colony_count, 2)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            archive.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+def colony_count(path):
+    with colonization.SaveFile(path, lazy=True) as save:
+        return save.header.colony_count
+
+class MapSavesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.paths = []
+        for index in range(5):
+            path = os.path.join(self.directory.name, f'COLONY{index:02d}.SAV')
+            with open(path, 'wb') as f:
+                f.write(make_save(colony_count=index) if index != 3 else b'NOTASAVE')
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def check(self, workers):
+        results = list(colonization.batch.map_saves(colony_count, self.paths, workers=workers))
+        self.assertEqual([path for path, _, _ in results], self.paths)
+        self.assertEqual([result for _, result, _ in results], [0, 1, 2, None, 4])
+
+        errors = [error for _, _, error in results]
+        self.assertEqual(errors.count(None), 4)
+        self.assertIsInstance(errors[3], str)
+
+    def test_in_process(self):
+        self.check(workers=1)
+
+    def test_worker_processes(self):
+        self.check(workers=2)
+
+    def test_decode_tables(self):
+        (path, tables, error), = colonization.batch.decode_tables(self.paths[2:3], workers=1)
+        self.assertIsNone(error)
+        self.assertEqual(len(tables['colonies']), 2)
+
+    def test_chunk_size(self):
+        self.assertEqual(colonization.batch.chunk_size(100, 4), 6)
+        self.assertEqual(colonization.batch.chunk_size(3, 8), 1)
+
+if __name__ == '__main__':
+    unittest.main()
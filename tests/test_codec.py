@@ -0,0 +1,34 @@
+import unittest
+
+import colonization
+from colonization import codec
+
+class LookupTableTest(unittest.TestCase):
+    def test_inverts_mapping(self):
+        table = codec.lookup_table({'a': 0x1, 'b': 0xFF})
+        self.assertEqual(len(table), 256)
+        self.assertEqual((table[0x1], table[0xFF], table[0x2]), ('a', 'b', None))
+        self.assertEqual(codec.decode(table, 0xFF), 'b')
+        with self.assertRaises(KeyError):
+            codec.decode(table, 0x2)
+
+    def test_tables_match_enum_dicts(self):
+        tables = [
+            (colonization.Unit.forms, colonization.Unit.form_names),
+            (colonization.Unit.powers, colonization.Unit.power_names),
+            (colonization.Unit.orders, colonization.Unit.order_names),
+            (colonization.Unit.supplies, colonization.Unit.supply_names),
+            (colonization.Colonist.specialties, colonization.Colonist.specialty_names),
+            (colonization.Colony.powers, colonization.Colony.power_names),
+            (colonization.Colony.constructables, colonization.Colony.constructable_names),
+            (colonization.Village.powers, colonization.Village.power_names),
+            (colonization.Village.supplies, colonization.Village.supply_names),
+            (colonization.TradeRoute.supplies, colonization.TradeRoute.supply_names),
+        ]
+        for mapping, table in tables:
+            for name, code in mapping.items():
+                self.assertEqual(table[code], name)
+            self.assertEqual(sum(name is not None for name in table), len(set(mapping.values())))
+
+if __name__ == '__main__':
+    unittest.main()
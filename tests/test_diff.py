@@ -0,0 +1,112 @@
+import unittest
+
+import colonization
+from colonization import diff
+
+from tests.synthetic import make_save
+
+class DiffBytesTest(unittest.TestCase):
+    def setUp(self):
+        self.left = make_save()
+        self.layout = colonization.Layout.from_data(self.left)
+
+    def test_labels_changes(self):
+        right = bytearray(self.left)
+        unit = self.layout.units_start_address + colonization.Unit.byte_length + 5
+        tile = self.layout.map_start_addresses[colonization.map.MASK] + 3 * self.layout.map_width + 7
+        right[unit] = 0x11
+        right[tile] = 0x08
+
+        changes = diff.diff_bytes(bytes(self.left), bytes(right), self.layout)
+        self.assertEqual(changes['address'].tolist(), [unit, tile])
+        self.assertEqual(changes['new'].tolist(), [0x11, 0x08])
+
+        names = [self.layout.sections[section][0] for section in changes['section'].tolist()]
+        self.assertEqual(names, ['Units', 'Unknown Map C'])
+        self.assertEqual((changes['record'][0], changes['byte'][0], changes['x'][0]), (1, 5, -1))
+        self.assertEqual((changes['x'][1], changes['y'][1]), (7, 3))
+
+        lines = diff.render(changes, self.layout)
+        self.assertEqual(lines[0], f'Change at 0x{unit:04X}: 0x00 -> 0x11  Units         (0x{28 + 5:04X}, Group 1 Byte 5)')
+        self.assertTrue(lines[1].endswith('Position (7),(3))'))
+
+    def test_identical(self):
+        self.assertEqual(len(diff.diff_bytes(self.left, self.left, self.layout)), 0)
+
+    def test_rejects_other_map_sizes(self):
+        with self.assertRaises(ValueError):
+            diff.diff_bytes(self.left, make_save(map_width=22), self.layout)
+
+    def test_history(self):
+        saves = [bytes(make_save()) for _ in range(3)]
+        saves[2] = saves[2][:0x200] + b'\x01' + saves[2][0x201:]
+        history = list(diff.diff_history(saves))
+        self.assertEqual([index for index, _, _, _ in history], [1, 2])
+        self.assertEqual([len(changes) for _, changes, _, _ in history], [0, 1])
+
+class AlignTest(unittest.TestCase):
+    def setUp(self):
+        self.left = make_save(colony_count=2)
+        self.right = make_save(colony_count=3)
+        self.right_layout = colonization.Layout.from_data(self.right)
+        self.right[self.right_layout.units_start_address + 4] = 0x07
+
+    def test_blanks_sections_with_other_counts(self):
+        left, right, layout, dropped = diff.align(bytes(self.left), bytes(self.right))
+        self.assertEqual(dropped, [('colony', 'colonies', 2, 3)])
+        self.assertEqual(layout, colonization.Layout.from_data(self.left))
+        self.assertEqual(len(left), len(right))
+
+        changes = diff.diff_bytes(left, right, layout)
+        # The colony count in the header and the unit byte, nothing in the blanked colonies
+        self.assertEqual(changes['address'].tolist(), [0x2E, layout.units_start_address + 4])
+
+    def test_diff_aligns(self):
+        changes, layout, dropped = diff.diff(bytes(self.left), bytes(self.right))
+        self.assertEqual(len(changes), 2)
+        self.assertEqual(len(dropped), 1)
+
+class DiffRecordsTest(unittest.TestCase):
+    def setUp(self):
+        left = make_save(colony_count=2)
+        right = make_save(colony_count=3)
+        layout = colonization.Layout.from_data(right)
+
+        # Move the second of three units stacked at (0, 0) and raise the Dutch
+        # alarm of the first village. Stacked units pair in order, so the
+        # left save's last unit is the one unmatched
+        unit = layout.units_start_address + colonization.Unit.byte_length
+        right[unit:unit + 2] = bytes([9, 9])
+        right[layout.villages_start_address + 16] = 40
+
+        self.left = colonization.SaveFile.from_data(bytes(left), lazy=True)
+        self.right = colonization.SaveFile.from_data(bytes(right), lazy=True)
+
+    def tearDown(self):
+        self.left.close()
+        self.right.close()
+
+    def test_records(self):
+        changes = diff.diff_records(self.left, self.right)
+        summary = [(change.section, change.kind, change.left, change.right) for change in changes]
+        self.assertEqual(summary, [('colonies', 'inserted', None, 2),
+                                   ('units', 'deleted', 2, None),
+                                   ('units', 'inserted', None, 1),
+                                   ('villages', 'modified', 0, 0)])
+        self.assertEqual(changes[-1].fields, {'dutch_alarm': (0, 40)})
+        self.assertIn('dutch_alarm: 0 -> 40', str(changes[-1]))
+
+    def test_sections(self):
+        changes = diff.diff_records(self.left, self.right, ['villages'])
+        self.assertEqual([change.section for change in changes], ['villages'])
+
+    def test_stacked_units_pair_in_order(self):
+        key = lambda row: row['x']
+        left = [{'x': 1, 'hp': 1}, {'x': 1, 'hp': 2}]
+        right = [{'x': 1, 'hp': 1}, {'x': 1, 'hp': 3}]
+        changes = diff.match_records('units', left, right, key)
+        self.assertEqual([(change.kind, change.left, change.right, change.fields) for change in changes],
+                         [('modified', 1, 1, {'hp': (2, 3)})])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import colonization
+
+from tests.synthetic import make_save
+
+class HeaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'COLONY00.SAV')
+        with open(self.path, 'wb') as f:
+            f.write(make_save(colony_count=3, unit_count=5, village_count=4, map_width=24, map_height=16))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_counts_and_map_size(self):
+        header = colonization.Header.from_file(self.path)
+        self.assertEqual((header.colony_count, header.unit_count, header.village_count), (3, 5, 4))
+        self.assertEqual((header.map_width, header.map_height), (24, 16))
+        self.assertEqual(header.units_start_address, header.colonies_start_address + 3 * colonization.Colony.byte_length)
+
+    def test_savefile_reads_file_once(self):
+        with mock.patch('builtins.open', wraps=open) as opened:
+            with colonization.SaveFile(self.path, lazy=True) as save:
+                self.assertEqual(opened.call_count, 1)
+                self.assertIs(save.header.data, save.buffer)
+                self.assertEqual(save.header.layout, colonization.Header.from_file(self.path).layout)
+
+    def test_unrecognized_file(self):
+        data = make_save()
+        data[0:8] = b'NOTASAVE'
+        with self.assertRaises(Exception):
+            colonization.Header(bytes(data))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+def turns():
+    """Four saves: byte edits, a new colony, then edits after it.
+    """
+    first = make_save()
+    second = bytearray(first)
+    layout = colonization.Layout.from_data(second)
+    second[layout.units_start_address + 2] = 0x05
+    second[layout.map_start_addresses[colonization.map.TERRAIN] + 30:layout.map_start_addresses[colonization.map.TERRAIN] + 34] = b'\x19' * 4
+
+    third = make_save(colony_count=3)
+    third[colonization.Layout.from_data(third).units_start_address + 2] = 0x05
+
+    fourth = bytearray(third)
+    fourth[-1] = 0x01
+    return [bytes(data) for data in [first, second, third, fourth]]
+
+class SaveHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.turns = turns()
+
+    def history(self, cache_size=8):
+        history = colonization.SaveHistory(cache_size=cache_size)
+        for data in self.turns:
+            history.append(data)
+        return history
+
+    def test_replays_every_turn(self):
+        # A one entry cache makes every lookup but the last replay deltas
+        history = self.history(cache_size=1)
+        self.assertEqual(len(history), 4)
+        for turn in [3, 0, 2, 1, 1, -1]:
+            self.assertEqual(history[turn], self.turns[turn])
+        with self.assertRaises(IndexError):
+            history[4]
+
+    def test_deltas(self):
+        history = self.history()
+        runs, payload = history.deltas[0]
+        self.assertFalse(runs['whole'].any())
+        self.assertEqual(len(payload), 5)
+
+        # The colonies section grew, so it and only it is stored whole
+        runs, _ = history.deltas[1]
+        whole = runs[runs['whole']]
+        self.assertEqual(whole['section'].tolist(), [1])
+        self.assertLess(history.stored_size(), sum(len(data) for data in self.turns))
+
+    def test_delta_round_trip(self):
+        for old, new in zip(self.turns, self.turns[1:]):
+            self.assertEqual(colonization.SaveHistory.patch(old, *colonization.SaveHistory.delta(old, new)), new)
+
+    def test_write_and_read(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'history.npz')
+            self.history(cache_size=1).write(path)
+            history = colonization.SaveHistory.read(path, cache_size=1)
+
+        self.assertEqual([history[turn] for turn in range(len(history))], self.turns)
+        history.append(self.turns[0])
+        self.assertEqual(history[4], self.turns[0])
+
+if __name__ == '__main__':
+    unittest.main()
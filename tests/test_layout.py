@@ -0,0 +1,20 @@
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+class LayoutTest(unittest.TestCase):
+    def test_cached_layout_is_immutable(self):
+        data = make_save()
+        layout = colonization.Layout.from_data(data)
+        self.assertIs(colonization.Layout.from_data(data), layout)
+        self.assertIsInstance(layout.sections, tuple)
+        self.assertIsInstance(layout.map_start_addresses, tuple)
+
+        with colonization.SaveFile.from_data(bytes(data), lazy=True) as save:
+            with self.assertRaises(AttributeError):
+                save.maps.addresses.append(0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+def route_data(name, stops, sea=False):
+    """A packed trade route visiting stops, a list of (colony, loads, unloads).
+    """
+    route = colonization.TradeRoute()
+    route.name = name
+    route.sea = sea
+    for location, loads, unloads in stops:
+        stop = colonization.trade.Destination()
+        stop.location = location
+        stop.loads = loads
+        stop.unloads = unloads
+        route.destinations.append(stop)
+    return route.pack()
+
+class RouteEvaluatorTest(unittest.TestCase):
+    def setUp(self):
+        data = make_save(colony_count=3)
+        layout = colonization.Layout.from_data(data)
+
+        # Colonies at (1, 1), (2, 1) and (8, 6), a hill in between
+        third = layout.colonies_start_address + 2 * colonization.Colony.byte_length
+        data[third:third + 2] = bytes([8, 6])
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        data[terrain + 3 * layout.map_width + 4] = colonization.Tile.terrain['Plains Hills']
+
+        storage = layout.colonies_start_address + 0x9A
+        supplies = colonization.TradeRoute.supplies
+        for supply, amount in [('Furs', 150), ('Sugar', 30)]:
+            data[storage + 2 * supplies[supply]:storage + 2 * supplies[supply] + 2] = amount.to_bytes(2, 'little')
+
+        routes = [
+            route_data('Furs', [(0, ['Furs', 'Sugar'], []), (2, [], ['Furs'])]),
+            route_data('Round', [(0, ['Furs'], []), (1, [], []), (2, [], ['Furs'])]),
+            route_data('Short', [(0, ['Furs'], [])]),
+            route_data('Nowhere', [(0, ['Furs'], []), (5, [], ['Furs'])]),
+            route_data('Landlocked', [(0, ['Furs'], []), (2, [], ['Furs'])], sea=True),
+        ]
+        start = layout.trade_routes_start_address
+        for route in routes:
+            data[start:start + colonization.TradeRoute.byte_length] = route
+            start += colonization.TradeRoute.byte_length
+
+        self.save = colonization.SaveFile.from_data(bytes(data))
+        self.routes = self.save.logistics.routes
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_cost_is_the_sum_of_the_legs(self):
+        finder = colonization.Pathfinder.for_save(self.save)
+        colonies = [(1, 1), (2, 1), (8, 6)]
+        for row, stops in [(0, [0, 2]), (1, [0, 1, 2])]:
+            legs = [finder.distance(colonies[start], colonies[end]) for start, end in zip(stops, stops[1:] + stops[:1])]
+            self.assertAlmostEqual(float(self.routes['cost'][row]), sum(legs), places=4)
+        self.assertEqual(self.routes['turns'][0], int(np.ceil(self.routes['cost'][0])))
+
+    def test_legs_are_shared(self):
+        legs = self.save.logistics.legs
+        self.assertIn(('land', 0, 2), legs)
+        self.assertIn(('land', 2, 0), legs)
+        self.assertEqual(len([key for key in legs if key[0] == 'land']), 4)
+
+    def test_delivered(self):
+        furs = colonization.TradeRoute.supplies['Furs']
+        first = self.routes[0]
+        # One hold of furs a round, the sugar is loaded but never unloaded
+        self.assertEqual(first['delivered'][furs], 100)
+        self.assertEqual(first['cargo'], 100)
+        self.assertAlmostEqual(float(first['throughput']), 100 / first['turns'], places=4)
+        self.assertTrue(first['valid'])
+        self.assertEqual((first['name'], first['stops'], first['sea']), ('Furs', 2, False))
+
+    def test_invalid_routes(self):
+        self.assertEqual(self.routes['name'][2:5].tolist(), ['Short', 'Nowhere', 'Landlocked'])
+        self.assertFalse(self.routes['valid'][2:].any())
+        self.assertEqual(self.routes['cargo'][2:].tolist(), [0] * 10)
+        # No water reaches the colonies
+        self.assertTrue(np.isinf(self.routes['cost'][4]))
+
+    def test_cached(self):
+        self.assertIs(self.save.logistics, self.save.logistics)
+        self.assertIs(self.save.logistics.routes, self.routes)
+        self.assertFalse(self.routes.flags.writeable)
+        self.assertEqual(self.routes['route'].tolist(), list(range(colonization.TradeRoute.count)))
+
+    def test_carrier(self):
+        # Holds and moves override the defaults per domain
+        evaluator = colonization.RouteEvaluator(self.save, holds={'land': 1}, moves={'land': 2})
+        self.assertEqual(evaluator.holds, {'land': 1, 'sea': 2})
+        row = evaluator.routes[0]
+        self.assertEqual(row['cargo'], 100)
+        self.assertEqual(row['turns'], int(np.ceil(row['cost'] / 2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+class MapViewTest(unittest.TestCase):
+    def setUp(self):
+        data = make_save(colony_count=0, unit_count=0, village_count=0, map_width=20, map_height=12)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        mask = layout.map_start_addresses[colonization.map.MASK]
+
+        tiles = {(2, 3): 'Mixed Forest Minor River', (4, 5): 'Plains Hills', (6, 7): 'Plains Mountains',
+                 (8, 1): 'Ocean', (9, 1): 'Sea Lane', (10, 1): 'Arctic', (11, 2): 'Grassland Major River'}
+        for (x, y), name in tiles.items():
+            data[terrain + y * layout.map_width + x] = colonization.Tile.terrain[name]
+        data[mask + 3 * layout.map_width + 2] = colonization.Tile.mask_bits['Road'] | colonization.Tile.mask_bits['Plowed']
+
+        self.data = bytes(data)
+        self.map = colonization.Map.from_data(self.data)
+
+    def test_array_is_a_window(self):
+        terrain = self.map.array(colonization.map.TERRAIN)
+        self.assertEqual(terrain.shape, (12, 20))
+        self.assertFalse(terrain.flags.writeable)
+        self.assertTrue(np.shares_memory(terrain, np.frombuffer(self.data, dtype=np.uint8)))
+        self.assertEqual(terrain[3, 2], colonization.Tile.terrain['Mixed Forest Minor River'])
+        with self.assertRaises(ValueError):
+            self.map.array(4)
+
+    def test_flags(self):
+        self.assertEqual(self.map.positions(self.map.is_forest()).tolist(), [[2, 3]])
+        self.assertEqual(self.map.positions(self.map.is_hills()).tolist(), [[4, 5]])
+        self.assertEqual(self.map.positions(self.map.is_mountains()).tolist(), [[6, 7]])
+        self.assertEqual(self.map.positions(self.map.is_water()).tolist(), [[8, 1], [9, 1]])
+        self.assertEqual(self.map.positions(self.map.is_special('Arctic')).tolist(), [[10, 1]])
+        self.assertEqual(self.map.positions(self.map.has_river()).tolist(), [[11, 2], [2, 3]])
+        self.assertEqual(self.map.positions(self.map.has_major_river()).tolist(), [[11, 2]])
+        self.assertEqual(self.map.positions(self.map.has_road() & self.map.is_plowed()).tolist(), [[2, 3]])
+        self.assertFalse(self.map.has_colony().any())
+
+    def test_savefile_map_shares_the_buffer(self):
+        with colonization.SaveFile.from_data(self.data, lazy=True) as save:
+            self.assertTrue(np.array_equal(save.maps.array(colonization.map.TERRAIN), self.map.array(colonization.map.TERRAIN)))
+            self.assertTrue(np.shares_memory(save.maps.array(colonization.map.MASK), np.frombuffer(save.buffer, dtype=np.uint8)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import math
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+class SeaPortTest(unittest.TestCase):
+    def setUp(self):
+        # Land west of column 10 and ocean east of it, a colony at (9, 2) and
+        # a village at (9, 4) on the coast, both with the mask's Colony bit
+        data = make_save(colony_count=1, unit_count=0, village_count=1)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        mask = layout.map_start_addresses[colonization.map.MASK]
+        for y in range(layout.map_height):
+            start = terrain + y * layout.map_width
+            data[start + 10:start + layout.map_width] = bytes([colonization.Tile.specials['Ocean']]) * (layout.map_width - 10)
+
+        colony = layout.colonies_start_address
+        village = layout.villages_start_address
+        data[colony:colony + 2] = bytes([9, 2])
+        data[village:village + 2] = bytes([9, 4])
+        for x, y in [(9, 2), (9, 4)]:
+            data[mask + y * layout.map_width + x] |= colonization.Tile.mask_bits['Colony']
+
+        self.save = colonization.SaveFile.from_data(bytes(data), lazy=True)
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_ships_enter_colonies_only(self):
+        sea = colonization.Pathfinder.for_save(self.save, domain='sea')
+        self.assertEqual(sea.grid[2, 9], colonization.Pathfinder.costs['water'])
+        self.assertTrue(math.isinf(sea.grid[4, 9]))
+        self.assertTrue(math.isfinite(sea.distance((9, 2), (15, 6))))
+
+    def test_ports_cached_separately(self):
+        ports = colonization.Pathfinder.for_save(self.save, domain='sea')
+        closed = colonization.Pathfinder.for_map(self.save.maps, domain='sea')
+        self.assertIsNot(ports, closed)
+        self.assertTrue(math.isinf(closed.grid[2, 9]))
+
+class DistanceFieldTest(unittest.TestCase):
+    def setUp(self):
+        # Mixed terrain with a lake, a river and a road, so every kind of step cost occurs
+        data = make_save(colony_count=0, unit_count=0, village_count=0)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        mask = layout.map_start_addresses[colonization.map.MASK]
+        kinds = [colonization.Tile.terrain[name] for name in
+                 ['Plains', 'Mixed Forest', 'Plains Hills', 'Plains Mountains', 'Marsh']]
+        for y in range(layout.map_height):
+            for x in range(layout.map_width):
+                address = y * layout.map_width + x
+                data[terrain + address] = kinds[(x * 7 + y * 3) % len(kinds)]
+                if x == 12:
+                    data[terrain + address] = colonization.Tile.terrain['Plains Minor River']
+                if y == 5:
+                    data[mask + address] |= colonization.Tile.mask_bits['Road']
+        for x, y in [(6, 3), (7, 3), (6, 4), (7, 4)]:
+            data[terrain + y * layout.map_width + x] = colonization.Tile.specials['Ocean']
+
+        self.save = colonization.SaveFile.from_data(bytes(data), lazy=True)
+        self.land = colonization.Pathfinder.for_save(self.save, domain='land')
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_matches_path_costs(self):
+        sources = [(2, 2), (15, 9)]
+        distance = self.land.distance_field(sources)
+        for y in range(self.save.maps.height):
+            for x in range(self.save.maps.width):
+                expected = min(self.land.distance(source, (x, y)) for source in sources)
+                self.assertAlmostEqual(distance[y, x], expected, msg=f"at {(x, y)}")
+
+    def test_limit(self):
+        distance = self.land.distance_field([(2, 2)])
+        limited = self.land.distance_field([(2, 2)], limit=4)
+        reached = distance <= 4
+        self.assertTrue(reached.any() and not reached.all())
+        self.assertTrue((limited[reached] == distance[reached]).all())
+        self.assertTrue((limited[~reached] == math.inf).all())
+
+    def test_boolean_sources(self):
+        sources = self.save.maps.is_water()
+        self.assertTrue((self.land.distance_field(sources)[sources] == 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+class PowerTest(unittest.TestCase):
+    def test_check(self):
+        colonization.Power.check('tax', np.uint8(40))
+        colonization.Power.check('gold', np.int64(5000))
+        for value in [True, 4.0, -1, 100]:
+            with self.assertRaises(ValueError):
+                colonization.Power.check('tax', value)
+
+    def test_power_index(self):
+        self.assertEqual(colonization.SaveFileWriter.power_index('Dutch'), 3)
+        self.assertEqual(colonization.SaveFileWriter.power_index(np.int64(2)), 2)
+        for index in ['Unknown', 4, -1, False]:
+            with self.assertRaises(ValueError):
+                colonization.SaveFileWriter.power_index(index)
+
+    def test_write_powers(self):
+        writer = colonization.SaveFileWriter(make_save())
+        writer.write_powers({np.int64(3): {'gold': np.int64(5000), 'tax': np.uint8(12)}})
+
+        with colonization.SaveFile.from_data(bytes(writer.data)) as save:
+            self.assertEqual((save.powers[3].gold, save.powers[3].tax), (5000, 12))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+class FitTest(unittest.TestCase):
+    def save(self, suppressed):
+        # Ocean east of column 8, land to the west
+        data = make_save(colony_count=0, unit_count=0, village_count=0, map_width=40, map_height=30)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        mask = layout.map_start_addresses[colonization.map.MASK]
+        for y in range(layout.map_height):
+            start = y * layout.map_width
+            data[terrain + start + 8:terrain + start + layout.map_width] = bytes([colonization.Tile.specials['Ocean']]) * (layout.map_width - 8)
+            for x in range(layout.map_width):
+                if suppressed(start + x) and x >= 12:
+                    data[mask + start + x] |= colonization.Tile.mask_bits['Suppress Prime']
+        return colonization.SaveFile.from_data(bytes(data), lazy=True)
+
+    def test_fits_pattern(self):
+        with self.save(lambda index: index % 12 in (2, 7)) as save:
+            pattern = colonization.PrimePattern.fit(save.maps)
+            self.assertEqual((pattern.period, pattern.residues, pattern.offset), (12, (2, 7), 0))
+            self.assertTrue(pattern.live(save.maps)[save.maps.is_water() & save.maps.suppress_prime()].sum() == 0)
+
+    def test_no_pattern(self):
+        rng = np.random.default_rng(1)
+        noise = rng.random(40 * 30) < 0.4
+        with self.save(lambda index: noise[index]) as save:
+            self.assertIsNone(colonization.PrimePattern.fit(save.maps))
+        with self.save(lambda index: False) as save:
+            self.assertIsNone(colonization.PrimePattern.fit(save.maps))
+
+    def test_for_map_caches(self):
+        with self.save(lambda index: index % 12 in (2, 7)) as save:
+            self.assertIs(colonization.PrimePattern.for_map(save.maps), colonization.PrimePattern.for_map(save.maps))
+
+class MarksTest(unittest.TestCase):
+    def test_marked_tiles(self):
+        array = np.zeros((2, 3), dtype=np.uint8)
+        marks = np.array([[False, True, False], [False, False, False]])
+        pixels = colonization.render.image(array, scale=4, marks=marks)
+        colour = colonization.render.colour_table()[0]
+
+        self.assertTrue((pixels[1:3, 5:7] == colonization.render.mark_colour).all())
+        self.assertTrue((pixels[0, 4:8] == colour).all())
+        self.assertTrue((pixels[:, 0:4] == colour).all())
+        self.assertTrue((colonization.render.image(array, marks=marks)[0, 1] == colonization.render.mark_colour).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+def state(value):
+    """Decoded attributes of a record, nested records included, without its bytes.
+    """
+    if isinstance(value, (list, tuple)):
+        return [state(element) for element in value]
+    names = getattr(value, '__slots__', None) or getattr(value, '__dict__', None)
+    if names is None:
+        return value
+    return {name: state(getattr(value, name)) for name in names if name not in ('data', '_data', 'unknown')}
+
+class RoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.data = bytes(make_save())
+        self.save = colonization.SaveFile.from_data(self.data, lazy=True)
+
+    def tearDown(self):
+        self.save.close()
+
+    def assertPacks(self, records, start, byte_length):
+        self.assertTrue(records)
+        for index, record in enumerate(records):
+            address = start + index * byte_length
+            self.assertEqual(record.pack(), self.data[address:address + byte_length])
+
+    def test_colonies(self):
+        self.assertPacks(self.save.colonies, self.save.header.colonies_start_address, colonization.Colony.byte_length)
+
+    def test_units(self):
+        self.assertPacks(self.save.units, self.save.header.units_start_address, colonization.Unit.byte_length)
+
+    def test_villages(self):
+        self.assertPacks(self.save.villages, self.save.header.villages_start_address, colonization.Village.byte_length)
+
+    def test_trade_routes(self):
+        self.assertPacks(self.save.trade_routes, self.save.header.trade_routes_start_address, colonization.TradeRoute.byte_length)
+
+    def test_edited_village(self):
+        village = self.save.villages[1]
+        village.power = 'Aztec'
+        village.last_sold = 'Furs'
+        village.dutch_alarm = 40
+
+        edited = colonization.Village()
+        edited.unpack(village.pack())
+        self.assertEqual((edited.power, edited.last_sold, edited.dutch_alarm), ('Aztec', 'Furs', 40))
+        self.assertEqual(edited.position, village.position)
+
+    def test_new_village(self):
+        village = colonization.Village()
+        village.position = (3, 4)
+        self.assertIsNone(village.power)
+        with self.assertRaises(ValueError):
+            village.pack()
+
+        village.power = 'Sioux'
+        decoded = colonization.Village()
+        decoded.unpack(village.pack())
+        self.assertEqual(decoded.position, (3, 4))
+        self.assertEqual((decoded.power, decoded.last_bought, decoded.last_sold), ('Sioux', '(None)', '(None)'))
+
+class UnpackPackTest(unittest.TestCase):
+    """Edits a record of every type and checks that decoding its pack() gives it back.
+    """
+    def setUp(self):
+        self.save = colonization.SaveFile.from_data(bytes(make_save()), lazy=True)
+
+    def tearDown(self):
+        self.save.close()
+
+    def assertRoundTrips(self, record, decode):
+        self.assertEqual(state(decode(record.pack())), state(record))
+
+    def test_unit(self):
+        unit = self.save.units[0]
+        unit.position = (7, 8)
+        unit.form = 'Galleon'
+        unit.power = 'Dutch'
+        unit.order = 'Go'
+        unit.destination = (12, 3)
+        unit.cargo = [('Sugar', 100), ('Furs', 50), ('Ore', 20), ('Rum', 70), ('Coats', 5), ('Muskets', 100)]
+        self.assertRoundTrips(unit, colonization.Unit)
+
+        pioneer = self.save.units[1]
+        pioneer.form = 'Pioneer'
+        pioneer.tools = 60
+        self.assertRoundTrips(pioneer, colonization.Unit)
+
+    def test_colony(self):
+        colony = self.save.colonies[0]
+        colony.name = 'Jamestown'
+        colony.hammers = 120
+        colony.constructing = 'Docks'
+        colony.bells = 300
+        colony.dutch_count = 2
+        colony.built['Stockade'] = True
+        colony.custom_house['Furs'] = True
+        colony.storage['Tools'] = 250
+        colony.fields = dict(colony.fields, N=0)
+        worker = colonization.units.Colonist()
+        worker.occupation, worker.specialty, worker.time = 'Farmer', 'Fisherman', 3
+        colony.colonists.append(worker)
+        self.assertRoundTrips(colony, colonization.Colony)
+
+    def test_village(self):
+        village = self.save.villages[0]
+        village.power = 'Sioux'
+        village.last_bought = 'Muskets'
+        village.english_alarm = 90
+
+        def decode(data):
+            decoded = colonization.Village()
+            decoded.unpack(data)
+            return decoded
+        self.assertRoundTrips(village, decode)
+
+    def test_power(self):
+        power = self.save.powers[2]
+        power.tax = 35
+        power.gold = 12345
+        decoded = colonization.Power(power.serialize(), order=2)
+        self.assertEqual(state(decoded), state(power))
+
+    def test_trade_route(self):
+        route = self.save.trade_routes[0]
+        route.name = 'Sugar run'
+        route.sea = False
+        stop = colonization.trade.Destination()
+        stop.location, stop.loads, stop.unloads = 1, ['Sugar', 'Rum'], ['Tools']
+        route.destinations = [stop, stop]
+
+        def decode(data):
+            decoded = colonization.TradeRoute()
+            decoded.unpack(data)
+            return decoded
+        self.assertRoundTrips(route, decode)
+
+class SlotsTest(unittest.TestCase):
+    """Records keep no per-object dict, and their dict style views write through.
+    """
+    def setUp(self):
+        self.save = colonization.SaveFile.from_data(bytes(make_save()), lazy=True)
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_no_instance_dict(self):
+        worker = colonization.units.Colonist()
+        for record in [self.save.units[0], self.save.colonies[0], self.save.villages[0], worker]:
+            self.assertFalse(hasattr(record, '__dict__'))
+            with self.assertRaises(AttributeError):
+                record.misspelt = 1
+
+    def test_views_write_through(self):
+        colony = self.save.colonies[0]
+        colony.built['Docks'] = True
+        self.assertEqual(colony.built_mask, 1 << colonization.Colony.buildings['Docks'])
+        self.assertTrue(colony.built['Docks'])
+        self.assertEqual(len(colony.built), len(colonization.Colony.buildings))
+
+        colony.custom_house['Rum'] = True
+        colony.custom_house['Rum'] = False
+        self.assertEqual(colony.exports_mask, 0)
+
+        colony.storage['Tools'] = 250
+        self.assertEqual(colony.stock[colonization.Colony.supplies['Tools']], 250)
+        with self.assertRaises(TypeError):
+            del colony.storage['Tools']
+
+    def test_unknown_read_from_record(self):
+        colony = self.save.colonies[0]
+        self.assertEqual(colony.unknown, b''.join(bytes(colony.data[start:end + 1]) for start, end in colonization.Colony.unknowns))
+        self.assertEqual(colonization.Village().unknown, b'')
+
+if __name__ == '__main__':
+    unittest.main()
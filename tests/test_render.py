@@ -0,0 +1,140 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+import colonization
+from colonization import render
+
+from tests.synthetic import make_save
+
+class PaletteTest(unittest.TestCase):
+    def glyph(self, name):
+        return chr(render.terrain_palette()[0][colonization.Tile.terrain[name]])
+
+    def test_terrain_glyphs(self):
+        self.assertEqual(self.glyph('Tundra'), 't')
+        self.assertEqual(self.glyph('Mixed Forest Minor River'), 'M')
+        self.assertEqual(self.glyph('Ocean'), ' ')
+        self.assertEqual(self.glyph('Plains Hills'), render.hills_glyph)
+        self.assertEqual(self.glyph('Plains Mountains'), render.mountains_glyph)
+        # Arctic keeps its glyph under hills
+        self.assertEqual(self.glyph('Arctic Hills'), '#')
+
+    def test_terrain_colours(self):
+        glyphs, colours = render.terrain_palette()
+        plains = colonization.Tile.terrain['Plains']
+        self.assertEqual(tuple(colours[plains]), render.terrain_colours['Plains'])
+        # Hills and mountains darken, rivers tint towards blue
+        self.assertTrue((colours[colonization.Tile.terrain['Plains Hills']] < colours[plains]).all())
+        self.assertTrue((colours[colonization.Tile.terrain['Plains Mountains']] < colours[colonization.Tile.terrain['Plains Hills']]).all())
+        self.assertGreater(colours[colonization.Tile.terrain['Plains Major River']][2], colours[plains][2])
+
+    def test_unknown_bytes(self):
+        # Special over base 7 names no terrain
+        glyphs, colours = render.terrain_palette()
+        self.assertEqual(chr(glyphs[0x1F]), '?')
+        self.assertEqual(tuple(colours[0x1F]), (255, 0, 255))
+
+    def test_tables_are_shared_and_read_only(self):
+        self.assertIs(render.palette(colonization.map.TERRAIN), render.terrain_palette())
+        glyphs, colours = render.palette(colonization.map.MASK)
+        self.assertIs(glyphs, render.value_glyphs())
+        self.assertIs(colours, render.colour_table())
+        for table in render.terrain_palette() + (glyphs, colours):
+            self.assertFalse(table.flags.writeable)
+
+    def test_value_glyphs_wrap(self):
+        glyphs = render.value_glyphs()
+        self.assertEqual(chr(glyphs[0]), 'a')
+        self.assertEqual(chr(glyphs[len(render.chars)]), 'a')
+        self.assertEqual(chr(glyphs[len(render.chars) - 1]), render.chars[-1])
+
+    def test_colour_table_separates_neighbours(self):
+        table = render.colour_table().astype(int)
+        self.assertEqual(table.shape, (256, 3))
+        self.assertEqual(len({tuple(colour) for colour in table.tolist()}), 256)
+
+class TextTest(unittest.TestCase):
+    def setUp(self):
+        data = make_save(colony_count=0, unit_count=0, village_count=0, map_width=12, map_height=7)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        data[terrain + 2 * layout.map_width + 3] = colonization.Tile.terrain['Plains Hills']
+        self.map = colonization.Map.from_data(bytes(data))
+
+    def test_plain_frame(self):
+        lines = self.map.text(colonization.map.TERRAIN, labels=False).split('\n')
+        self.assertEqual(lines[-1], '')
+        self.assertEqual(lines[:-1], ['t' * 12] * 2 + ['tttntttttttt'] + ['t' * 12] * 4)
+
+    def test_labels(self):
+        lines = self.map.text(colonization.map.TERRAIN).split('\n')
+        ruler = render.ruler.split('\n')[:2]
+        self.assertEqual(lines[:2], ruler)
+        self.assertEqual(lines[9:11], ruler)
+        self.assertEqual(lines[2], 't' * 12 + ' 0')
+        self.assertEqual(lines[7], 't' * 12 + ' 5')
+        self.assertEqual(lines[3], 't' * 12)
+
+    def test_image(self):
+        pixels = self.map.image(colonization.map.TERRAIN, scale=2)
+        self.assertEqual(pixels.shape, (14, 24, 3))
+        self.assertEqual(tuple(pixels[0, 0]), render.terrain_colours['Tundra'])
+        hills = tuple(render.terrain_palette()[1][colonization.Tile.terrain['Plains Hills']])
+        self.assertEqual({tuple(pixel) for pixel in pixels[4:6, 6:8].reshape(-1, 3).tolist()}, {hills})
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.pixels = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def chunks(self, data):
+        offset = 8
+        while offset < len(data):
+            length, = struct.unpack_from('>I', data, offset)
+            kind = data[offset + 4:offset + 8]
+            body = data[offset + 8:offset + 8 + length]
+            crc, = struct.unpack_from('>I', data, offset + 8 + length)
+            self.assertEqual(crc, zlib.crc32(kind + body))
+            yield kind, body
+            offset += 12 + length
+
+    def test_png_bytes(self):
+        data = render.png_bytes(self.pixels)
+        self.assertEqual(data[:8], b'\x89PNG\r\n\x1a\n')
+        chunks = list(self.chunks(data))
+        self.assertEqual([kind for kind, _ in chunks], [b'IHDR', b'IDAT', b'IEND'])
+        self.assertEqual(struct.unpack('>IIBBBBB', chunks[0][1]), (3, 2, 8, 2, 0, 0, 0))
+
+        # Each scanline is filter type 0 and the row's RGB bytes
+        scanlines = zlib.decompress(chunks[1][1])
+        self.assertEqual(scanlines, b'\0' + self.pixels[0].tobytes() + b'\0' + self.pixels[1].tobytes())
+
+    def test_writers(self):
+        self.assertEqual(sorted(render.writers), ['png', 'ppm'])
+        for extension, writer in render.writers.items():
+            path = os.path.join(self.directory.name, f'map.{extension}')
+            writer(path, self.pixels)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if extension == 'png':
+                self.assertEqual(data, render.png_bytes(self.pixels))
+            else:
+                self.assertEqual(data, b'P6\n3 2\n255\n' + self.pixels.tobytes())
+
+    def test_ppm_of_a_view(self):
+        # Strided views, such as a flipped image, are written in row order
+        path = os.path.join(self.directory.name, 'map.ppm')
+        render.write_ppm(path, self.pixels[::-1])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read()[len(b'P6\n3 2\n255\n'):], self.pixels[::-1].tobytes())
+
+if __name__ == '__main__':
+    unittest.main()
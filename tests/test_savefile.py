@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+import colonization
+
+from tests.synthetic import make_save
+
+class CloseTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'COLONY00.SAV')
+        with open(self.path, 'wb') as f:
+            f.write(make_save())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_close_with_records_held(self):
+        with self.assertWarns(ResourceWarning):
+            with colonization.SaveFile(self.path, lazy=True) as save:
+                for power in save.powers:
+                    pass
+                colony = save.colonies[0]
+                units = save.unit_table
+                terrain = save.maps.array(colonization.map.TERRAIN)
+
+        # Records and arrays taken from the save stay readable after close
+        self.assertEqual(colony.position, (1, 1))
+        self.assertEqual(len(units.records), 3)
+        self.assertEqual(terrain.shape, (12, 20))
+        self.assertEqual(power.tax, 0)
+
+    def test_close_twice(self):
+        save = colonization.SaveFile(self.path, lazy=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            save.close()
+            save.close()
+
+    def test_archive_close_with_records_held(self):
+        path = os.path.join(self.directory.name, 'saves.car')
+        colonization.SaveArchive.write(path, [self.path])
+
+        with self.assertWarns(ResourceWarning):
+            with colonization.SaveArchive(path) as archive:
+                save = archive.open(0)
+                colony = save.colonies[0]
+                save.close()
+
+        self.assertEqual(colony.position, (1, 1))
+
+class OffMapUnitsTest(unittest.TestCase):
+    def units(self, *positions):
+        data = make_save(unit_count=len(positions))
+        start = colonization.Layout.from_data(data).units_start_address
+        for index, position in enumerate(positions):
+            address = start + index * colonization.Unit.byte_length
+            data[address:address + 2] = bytes(position)
+        with colonization.SaveFile.from_data(bytes(data), lazy=True) as save:
+            return save.units
+
+    def test_units_in_europe(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            self.assertEqual(len(self.units((3, 4), (239, 239), (235, 235))), 3)
+
+    def test_units_off_the_map(self):
+        with self.assertWarns(UserWarning):
+            self.units((3, 4), (30, 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import math
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+class DistancePenaltyTest(unittest.TestCase):
+    def setUp(self):
+        # Plains everywhere but an ocean channel at column 20, one colony at (3, 5)
+        data = make_save(colony_count=1, unit_count=0, village_count=0, map_width=30, map_height=12)
+        layout = colonization.Layout.from_data(data)
+        terrain = layout.map_start_addresses[colonization.map.TERRAIN]
+        data[terrain:terrain + layout.map_width * layout.map_height] = bytes([colonization.Tile.terrain['Plains']]) * (layout.map_width * layout.map_height)
+        for y in range(layout.map_height):
+            data[terrain + y * layout.map_width + 20] = colonization.Tile.specials['Ocean']
+        colony = layout.colonies_start_address
+        data[colony:colony + 2] = bytes([3, 5])
+
+        self.save = colonization.SaveFile.from_data(bytes(data), lazy=True)
+        self.scorer = colonization.SiteScorer()
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_penalty_grows_with_cost(self):
+        plain = self.scorer.scores(self.save.maps, [(3, 5)])
+        scores = self.scorer.scores(self.save.maps, [(3, 5)], colonies=[(3, 5)])
+        with np.errstate(invalid='ignore'):
+            penalty = plain - scores
+
+        weight, falloff = self.scorer.weights['distance'], self.scorer.falloff
+        self.assertAlmostEqual(penalty[5, 8], weight * (1 - math.exp(-5 / falloff)), places=5)
+        self.assertAlmostEqual(penalty[5, 15], weight * (1 - math.exp(-12 / falloff)), places=5)
+        # Across the channel the site cannot be reached by land
+        self.assertAlmostEqual(penalty[5, 25], weight, places=5)
+
+    def test_no_colonies(self):
+        plain = self.scorer.scores(self.save.maps, [(3, 5)])
+        self.assertTrue(np.array_equal(plain, self.scorer.scores(self.save.maps, [(3, 5)], colonies=[])))
+
+    def test_rank_prefers_nearby_sites(self):
+        sites = self.scorer.rank(self.save, count=3)
+        self.assertTrue(all(abs(x - 3) <= 4 and abs(y - 5) <= 4 for x, y, _ in sites.tolist()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+import warnings
+
+import colonization
+
+from tests.synthetic import make_save
+
+class SpatialIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = colonization.SpatialIndex(10, 8, {
+            'units': [(2, 3), (2, 3), (5, 5), (240, 240), (240, 240), (9, 7)],
+            'colonies': [(2, 3), (6, 1)],
+            'villages': [(4, 4)],
+        })
+
+    def test_at(self):
+        self.assertEqual(self.index.at(2, 3), [('units', 0), ('units', 1), ('colonies', 0)])
+        self.assertEqual(self.index.at(2, 3, kind='colonies'), [('colonies', 0)])
+        self.assertEqual(self.index.at(9, 7), [('units', 5)])
+        self.assertEqual(self.index.at(0, 0), [])
+
+    def test_off_map(self):
+        self.assertEqual(self.index.at(240, 240), [('units', 3), ('units', 4)])
+        self.assertEqual(self.index.at(240, 240, kind='villages'), [])
+        self.assertEqual(self.index.in_europe(), [('units', 3), ('units', 4)])
+        self.assertNotIn(('units', 3), self.index.rect(0, 0, 300, 300))
+
+    def test_rect(self):
+        self.assertEqual(sorted(self.index.rect(2, 3, 5, 5)),
+                         [('colonies', 0), ('units', 0), ('units', 1), ('units', 2), ('villages', 0)])
+        # Rows are returned top to bottom
+        self.assertEqual(self.index.rect(-5, -5, 20, 20, kind='colonies'), [('colonies', 1), ('colonies', 0)])
+        self.assertEqual(self.index.rect(5, 5, 2, 3), [])
+
+    def test_radius(self):
+        self.assertEqual(sorted(self.index.radius(4, 4, 1)), [('units', 2), ('villages', 0)])
+        # (2, 3) is one diagonal step from (3, 2) but more than one tile away in a straight line
+        self.assertEqual(self.index.radius(3, 2, 1, kind='units'), [('units', 0), ('units', 1)])
+        self.assertEqual(self.index.radius(3, 2, 1, kind='units', metric='euclidean'), [])
+        self.assertEqual(self.index.radius(3, 3, 1, kind='units', metric='euclidean'), [('units', 0), ('units', 1)])
+        with self.assertRaises(ValueError):
+            self.index.radius(3, 3, 1, metric='manhattan')
+
+    def test_positions(self):
+        self.assertEqual(self.index.positions([('units', 3), ('villages', 0)]), [(240, 240), (4, 4)])
+
+    def test_from_save(self):
+        data = make_save(map_width=20, map_height=12)
+        layout = colonization.Layout(2, 3, 2, 20, 12)
+        units = layout.units_start_address
+        data[units:units + 2] = bytes([5, 6])
+        data[units + 28:units + 30] = bytes([235, 236])
+
+        save = colonization.SaveFile.from_data(bytes(data))
+        index = save.spatial_index
+        self.assertIs(save.spatial_index, index)
+        self.assertEqual(index.at(5, 6), [('units', 0)])
+        self.assertEqual(index.at(1, 1), [('colonies', 0)])
+        self.assertEqual(index.at(2, 2, kind='villages'), [('villages', 1)])
+        self.assertEqual(index.in_europe(kind='units'), [('units', 1)])
+
+    def test_stray_units_warn(self):
+        data = make_save(map_width=20, map_height=12)
+        layout = colonization.Layout(2, 3, 2, 20, 12)
+        units = layout.units_start_address
+        data[units + 28:units + 30] = bytes([235, 236])
+
+        # Europe is expected off the map
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            colonization.SaveFile.from_data(bytes(data)).units
+
+        data[units:units + 2] = bytes([30, 3])
+        with self.assertWarns(UserWarning):
+            colonization.SaveFile.from_data(bytes(data)).units
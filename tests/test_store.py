@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import colonization
+
+from tests.synthetic import make_save
+
+class SaveStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.saves = os.path.join(self.directory.name, 'saves')
+        os.makedirs(os.path.join(self.saves, 'game'))
+
+        # Two different saves and a renamed copy of the first
+        self.paths = []
+        for name, data in [('COLONY00.SAV', make_save()), ('COLONY01.SAV', make_save(colony_count=3)),
+                           (os.path.join('game', 'colony02.sav'), make_save())]:
+            path = os.path.join(self.saves, name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.paths.append(path)
+
+        self.store = colonization.SaveStore(os.path.join(self.directory.name, 'store'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_find_ignores_case(self):
+        self.assertEqual(sorted(colonization.SaveStore.find(self.saves)), sorted(self.paths))
+
+    def test_duplicates_stored_once(self):
+        self.assertEqual(self.store.ingest(self.paths), 2)
+        saves = self.store.table('saves')
+        self.assertEqual(saves['save'].tolist(), [0, 1])
+        self.assertEqual(saves['colony_count'].tolist(), [2, 3])
+
+        colonies = self.store.table('colonies')
+        self.assertEqual(colonies['save'].tolist(), [0, 0, 1, 1, 1])
+        self.assertEqual(len(self.store.table('powers')), 2 * colonization.Power.count)
+        self.assertEqual(self.store.paths().tolist(), self.paths[:2])
+
+    def test_reingest_adds_nothing(self):
+        self.store.ingest(self.paths[:1])
+        shards = self.store.shards()
+        self.assertEqual(self.store.ingest(self.paths), 1)
+        self.assertEqual(self.store.ingest(self.paths), 0)
+        self.assertEqual(len(self.store.shards()), len(shards) + 1)
+        self.assertEqual(self.store.table('saves')['save'].tolist(), [0, 1])
+
+    def test_shard_size(self):
+        self.store.ingest(self.paths, shard_size=1)
+        self.assertEqual(len(self.store.shards()), 2)
+        self.assertEqual(self.store.table('units')['save'].tolist(), [0, 0, 0, 1, 1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+import colonization
+
+def unit_data(form, cargo=(), tools=0):
+    data = bytearray(colonization.Unit.byte_length)
+    data[0:3] = bytes([4, 5, colonization.Unit.forms[form]])
+    data[12] = len(cargo)
+    types = 0
+    for slot, (name, quantity) in enumerate(cargo):
+        types |= colonization.Unit.supplies[name] << (slot * 4)
+        data[16 + slot] = quantity
+    data[13:16] = types.to_bytes(3, 'little')
+    if tools:
+        data[21] = tools
+    return bytes(data)
+
+class UnitTest(unittest.TestCase):
+    cargo = [('Sugar', 100), ('Furs', 50), ('Ore', 20), ('Rum', 70), ('Coats', 5), ('Muskets', 100)]
+
+    def test_six_holds(self):
+        data = unit_data('Galleon', self.cargo)
+        unit = colonization.Unit(data)
+        self.assertEqual(unit.cargo, self.cargo)
+        self.assertEqual(unit.pack(), data)
+
+        unit.cargo[5] = ('Tools', 60)
+        self.assertEqual(colonization.Unit(unit.pack()).cargo[5], ('Tools', 60))
+
+    def test_pioneer_tools(self):
+        data = unit_data('Pioneer', tools=80)
+        unit = colonization.Unit(data)
+        self.assertEqual(unit.tools, 80)
+        self.assertEqual(unit.pack(), data)
+
+        unit.tools = 60
+        self.assertEqual(colonization.Unit(unit.pack()).tools, 60)
+    def test_table(self):
+        data = unit_data('Galleon', self.cargo) + unit_data('Pioneer', tools=80)
+        table = colonization.UnitTable(data, 0, 2)
+
+        galleon = table.records[0]
+        self.assertEqual(galleon['cargo_types'].tolist(), [colonization.Unit.supplies[name] for name, _ in self.cargo])
+        self.assertEqual(galleon['cargo_quantities'].tolist(), [quantity for _, quantity in self.cargo])
+
+        pioneer = table.records[1]
+        self.assertEqual(pioneer['tools'], 80)
+        self.assertEqual(pioneer['cargo_quantities'].tolist(), [0] * colonization.Unit.holds)
+        self.assertEqual(table[1].tools, 80)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+import colonization
+
+from tests.synthetic import make_save
+
+class VillageTableTest(unittest.TestCase):
+    # tribe, English alarm and attacks, Dutch alarm and attacks of each village
+    villages = [('Inca', 10, 1, 0, 0), ('Sioux', 70, 0, 5, 2), ('Inca', 30, 2, 80, 0), ('Aztec', 0, 0, 20, 1)]
+
+    def setUp(self):
+        data = make_save(village_count=len(self.villages))
+        start = colonization.Layout.from_data(data).villages_start_address
+        for index, (tribe, english, english_attacks, dutch, dutch_attacks) in enumerate(self.villages):
+            record = start + index * colonization.Village.byte_length
+            data[record + 2] = colonization.Village.powers[tribe]
+            # Alarm and attacks alternate from byte 10, English first and Dutch last
+            data[record + 10:record + 12] = bytes([english, english_attacks])
+            data[record + 16:record + 18] = bytes([dutch, dutch_attacks])
+        self.save = colonization.SaveFile.from_data(bytes(data))
+        self.table = self.save.village_table
+
+    def tearDown(self):
+        self.save.close()
+
+    def test_columns(self):
+        self.assertEqual(self.table.alarm('English').tolist(), [10, 70, 30, 0])
+        self.assertEqual(self.table.attacks('English').tolist(), [1, 0, 2, 0])
+        self.assertEqual(self.table.alarm('Dutch').tolist(), [0, 5, 80, 20])
+        self.assertEqual(self.table.attacks('French').tolist(), [0, 0, 0, 0])
+        self.assertEqual(self.table.positions.tolist(), [[1, 2], [2, 2], [3, 2], [4, 2]])
+
+    def test_matches_the_records(self):
+        for index, village in enumerate(self.save.villages):
+            self.assertEqual(self.table.alarm('English')[index], village.english_alarm)
+            self.assertEqual(self.table.alarm('Dutch')[index], village.dutch_alarm)
+            self.assertEqual(self.table[index].power, village.power)
+            self.assertEqual(self.table[index].position, village.position)
+
+    def test_unknown_power(self):
+        for power in ['Unknown', 'Inca', 'England']:
+            with self.assertRaises(ValueError):
+                self.table.alarm(power)
+
+    def test_of_tribe(self):
+        self.assertEqual(self.table.of_tribe('Inca').tolist(), [True, False, True, False])
+        self.assertFalse(self.table.of_tribe('Apache').any())
+
+    def test_by_tribe(self):
+        self.assertEqual(self.table.by_tribe(self.table.alarm('English')), {'Inca': 30, 'Aztec': 0, 'Sioux': 70})
+        self.assertEqual(self.table.by_tribe(self.table.alarm('Dutch'), reduce=np.minimum), {'Inca': 0, 'Aztec': 20, 'Sioux': 5})
+        # Wider values are not wrapped to the uint8 columns
+        self.assertEqual(self.table.by_tribe(self.table.alarm('English').astype(np.int64) * 10, reduce=np.add),
+                         {'Inca': 400, 'Aztec': 0, 'Sioux': 700})
+
+    def test_empty(self):
+        save = colonization.SaveFile.from_data(bytes(make_save(village_count=0)))
+        self.assertEqual(len(save.village_table), 0)
+        self.assertEqual(save.village_table.by_tribe(save.village_table.alarm('English')), {})
+        save.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import os
+import tempfile
+import unittest
+import contextlib
+
+import colonization
+
+from tests.synthetic import make_save
+
+class SaveFileWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'COLONY00.SAV')
+        with open(self.path, 'wb') as f:
+            f.write(make_save())
+        self.writer = colonization.SaveFileWriter.from_file(self.path)
+        self.layout = self.writer._header.layout
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_dirty_ranges_merge(self):
+        start = self.layout.units_start_address
+        self.assertEqual(self.writer.write(start, b'\x01\x02'), (start, start + 2))
+        self.writer.write(start + 2, b'\x03')
+        self.writer.write(start + 10, b'\x04')
+        self.writer.write(start + 1, b'\x02\x05\x05')
+        self.assertEqual(self.writer.dirty, {'Units': [(start, start + 4), (start + 10, start + 11)]})
+
+    def test_only_changed_bytes_are_dirty(self):
+        start = self.layout.units_start_address
+        self.assertIsNone(self.writer.write(start, b'\x00\x00'))
+        self.assertEqual(self.writer.write(start, b'\x00\x07\x00\x08\x00'), (start + 1, start + 4))
+
+    def test_ranges_by_section(self):
+        tile = self.layout.map_start_addresses[colonization.map.MASK]
+        unit = self.layout.units_start_address
+        self.writer.write(tile, b'\x08')
+        self.writer.write(unit, b'\x01')
+        self.assertEqual(sorted(self.writer.dirty), ['Units', 'Unknown Map C'])
+        self.assertEqual(self.writer.dirty_ranges(), [(unit, unit + 1), (tile, tile + 1)])
+
+    def test_write_outside(self):
+        with self.assertRaises(ValueError):
+            self.writer.write(len(self.writer.data) - 1, b'\x01\x02')
+
+    def test_patch(self):
+        start = self.layout.units_start_address
+        self.writer.write(start, b'\x01\x02')
+        self.writer.write(start + 10, b'\x03')
+        self.assertEqual(self.writer.patch(), 3)
+        self.assertEqual(self.writer.dirty, {})
+
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), bytes(self.writer.data))
+
+    def test_patch_checks_size(self):
+        other = os.path.join(self.directory.name, 'COLONY01.SAV')
+        with open(other, 'wb') as f:
+            f.write(make_save(colony_count=3))
+        self.writer.write(self.layout.units_start_address, b'\x01')
+        with self.assertRaises(ValueError):
+            self.writer.patch(other)
+
+    def test_save(self):
+        copy = os.path.join(self.directory.name, 'COLONY02.SAV')
+        self.writer.write(self.layout.units_start_address, b'\x01')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.writer.save(copy)
+        self.assertEqual(self.writer.dirty, {})
+        with open(copy, 'rb') as f:
+            self.assertEqual(f.read(), bytes(self.writer.data))
+        self.assertFalse(os.path.exists(copy + '.tmp'))
+
+if __name__ == '__main__':
+    unittest.main()